@@ -0,0 +1,38 @@
+"""
+Memory footprint and rendering time of `DomAttributes`, on attributes typical of real pages (most nodes only set a
+few of the supported attributes).
+
+Usage:
+    uv run python benchmarks/dom_attributes.py
+"""
+
+import time
+import tracemalloc
+
+from notte_core.browser.dom_tree import AttributeValue, DomAttributes
+
+SAMPLES: list[dict[str, AttributeValue]] = [
+    {"tag_name": "div", "class": "flex items-center"},
+    {"tag_name": "a", "href": "/products/1", "class": "link", "title": "Product"},
+    {"tag_name": "span"},
+    {"tag_name": "input", "type": "text", "name": "q", "placeholder": "Search", "aria-label": "Search"},
+]
+NB_NODES = 20_000
+
+
+def main() -> None:
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    attributes = [DomAttributes.safe_init(**SAMPLES[i % len(SAMPLES)]) for i in range(NB_NODES)]
+    size = sum(stat.size_diff for stat in tracemalloc.take_snapshot().compare_to(before, "filename"))
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    for attrs in attributes:
+        _ = attrs.relevant_attrs()
+    render_s = time.perf_counter() - start
+    print(f"memory: {size / NB_NODES:.0f} bytes/node, relevant_attrs: {render_s / NB_NODES * 1e6:.2f} us/node")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Compare the legacy DOM conversion (`DOMBaseNode` tree -> sequential ids -> `DomNode` tree) with the
+single-pass `DomNodeBuilder`.
+
+The raw DOM tree of every page is extracted once in the browser, only the python conversion is timed.
+
+Usage:
+    uv run python benchmarks/dom_builder.py [url_or_html_file ...]
+
+Defaults to the html pages in `tests/data`.
+"""
+
+import asyncio
+import sys
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+from notte_browser.dom.builder import DomNodeBuilder
+from notte_browser.dom.id_generation import generate_sequential_ids
+from notte_browser.dom.parsing import ParseDomTreePipe
+from notte_browser.dom.types import DomTreeDict
+from notte_core.browser.dom_tree import DomNode
+from patchright.async_api import async_playwright
+
+DEFAULT_PAGES = sorted((Path(__file__).parent.parent / "tests" / "data").glob("*.html"))
+NB_RUNS = 20
+
+
+def legacy_build(tree: DomTreeDict, url: str) -> DomNode:
+    parsed = ParseDomTreePipe._parse_node(  # pyright: ignore[reportPrivateUsage]
+        tree,
+        parent=None,
+        in_iframe=False,
+        in_shadow_root=False,
+        iframe_parent_css_paths=[],
+        notte_selector=url,
+    )
+    assert parsed is not None
+    return generate_sequential_ids(parsed).to_notte_domnode()
+
+
+def single_pass_build(tree: DomTreeDict, url: str) -> DomNode:
+    node = DomNodeBuilder().build(tree, notte_selector=url)
+    assert node is not None
+    return node
+
+
+def measure(build: Callable[[DomTreeDict, str], DomNode], tree: DomTreeDict, url: str) -> tuple[int, float]:
+    nb_nodes, total = 0, 0.0
+    for _ in range(NB_RUNS):
+        start = time.perf_counter()
+        node = build(tree, url)
+        total += time.perf_counter() - start
+        nb_nodes = len(node.flatten())
+    return nb_nodes, total / NB_RUNS * 1000
+
+
+async def main(targets: list[str]) -> None:
+    async with async_playwright() as playwright:
+        browser = await playwright.chromium.launch(headless=True)
+        page = await browser.new_page(viewport={"width": 1280, "height": 1080})
+        print(f"{'page':<40} {'nodes':>7} {'legacy (ms)':>12} {'single pass (ms)':>17} {'speedup':>8}")
+        for target in targets:
+            url = Path(target).resolve().as_uri() if Path(target).exists() else target
+            _ = await page.goto(url)
+            tree = await ParseDomTreePipe.extract_dom_tree(page)
+            nb_nodes, legacy_ms = measure(legacy_build, tree, page.url)
+            _, single_pass_ms = measure(single_pass_build, tree, page.url)
+            print(
+                f"{Path(target).name[:40]:<40} {nb_nodes:>7} {legacy_ms:>12.2f} {single_pass_ms:>17.2f} {legacy_ms / single_pass_ms:>7.1f}x"
+            )
+        await browser.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(sys.argv[1:] or [str(page) for page in DEFAULT_PAGES]))
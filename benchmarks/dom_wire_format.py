@@ -0,0 +1,76 @@
+"""
+Compare the nested JSON and columnar wire formats used to transfer the DOM tree from the browser.
+
+For every page, reports the payload size and the time spent in the browser (extraction + transfer)
+and in python (decoding + `DomNodeBuilder` conversion) for both formats.
+
+Usage:
+    uv run python benchmarks/dom_wire_format.py [url_or_html_file ...]
+
+Defaults to the html pages in `tests/data`.
+"""
+
+import asyncio
+import json
+import sys
+import time
+from pathlib import Path
+
+from notte_browser.dom.builder import DomNodeBuilder
+from notte_browser.dom.parsing import (
+    DOM_EXTRACTOR_CALL_JS,
+    ParseDomTreePipe,
+    dom_extractor_install_js,
+    dom_extractor_version,
+)
+from notte_browser.dom.types import DomTreeDict
+from notte_core.common.config import config
+from patchright.async_api import Page, async_playwright
+
+DEFAULT_PAGES = sorted((Path(__file__).parent.parent / "tests" / "data").glob("*.html"))
+NB_RUNS = 5
+
+
+async def measure(page: Page, columnar: bool) -> tuple[int, float, float]:
+    # `DomNodeBuilder` requires the bbox of highlighted elements when `config.highlight_elements` is set
+    dom_config = {
+        "highlight_elements": config.highlight_elements,
+        "focus_element": -1,
+        "viewport_expansion": -1,
+        "columnar": columnar,
+    }
+    browser_time, python_time, size = 0.0, 0.0, 0
+    for _ in range(NB_RUNS):
+        start = time.perf_counter()
+        result = await page.evaluate(DOM_EXTRACTOR_CALL_JS, [dom_extractor_version(), dom_config])
+        browser_time += time.perf_counter() - start
+        raw: DomTreeDict | str = result["tree"]
+        size = len(raw) if isinstance(raw, str) else len(json.dumps(raw))
+        start = time.perf_counter()
+        tree = ParseDomTreePipe.decode(raw)
+        assert tree is not None
+        _ = DomNodeBuilder().build(tree, notte_selector=page.url)
+        python_time += time.perf_counter() - start
+    return size, browser_time / NB_RUNS * 1000, python_time / NB_RUNS * 1000
+
+
+async def main(targets: list[str]) -> None:
+    async with async_playwright() as playwright:
+        browser = await playwright.chromium.launch(headless=True)
+        page = await browser.new_page(viewport={"width": 1280, "height": 1080})
+        print(f"{'page':<40} {'format':<9} {'payload (kB)':>12} {'browser (ms)':>13} {'python (ms)':>12}")
+        for target in targets:
+            url = Path(target).resolve().as_uri() if Path(target).exists() else target
+            _ = await page.goto(url)
+            await page.evaluate(dom_extractor_install_js())
+            for columnar in (False, True):
+                size, browser_ms, python_ms = await measure(page, columnar)
+                name = "columnar" if columnar else "nested"
+                print(
+                    f"{Path(target).name[:40]:<40} {name:<9} {size / 1024:>12.1f} {browser_ms:>13.1f} {python_ms:>12.1f}"
+                )
+        await browser.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(sys.argv[1:] or [str(page) for page in DEFAULT_PAGES]))
@@ -83,6 +83,11 @@ class NotteAgent(BaseAgent):
             # hide vault leaked credentials within screenshots
             self.session.window.screenshot_mask = VaultSecretsScreenshotMask(vault=self.vault)
 
+        resource_blocker = self.session.window.resource_blocker
+        if resource_blocker is not None and not self.config.use_vision:
+            # screenshots are never sent to the LLM: pages can be loaded without images (`images_without_vision`)
+            resource_blocker.use_vision = False
+
         # ####################################
         # ######### Conversation Setup #######
         # ####################################
@@ -183,7 +188,7 @@ class NotteAgent(BaseAgent):
         last_obs = self.trajectory.last_obs()
         self.conv.add_user_message(
             content=self.perception.perceive(last_obs),
-            image=(last_obs.screenshot.bytes() if self.config.use_vision else None),
+            image=(await last_obs.screenshot.abytes() if self.config.use_vision else None),
         )
         self.conv.add_user_message(self.prompt.select_action())
         return self.conv.messages()
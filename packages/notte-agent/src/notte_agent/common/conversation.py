@@ -20,6 +20,7 @@ from loguru import logger
 from notte_core.common.config import LlmModel, config
 from notte_core.errors.llm import LLMParsingError
 from notte_core.llms.engine import StructuredContent
+from notte_core.utils.image import image_mime_type
 from pydantic import BaseModel, Field, PrivateAttr
 from typing_extensions import override
 
@@ -133,7 +134,7 @@ class Conversation(BaseModel):
         image_str = base64.b64encode(image).decode("utf-8")
         return ChatCompletionImageObject(
             type="image_url",
-            image_url={"url": f"data:image/png;base64,{image_str}"},
+            image_url={"url": f"data:{image_mime_type(image)};base64,{image_str}"},
         )
 
     def format_user_contents(self, contents: list[str | bytes]) -> OpenAIMessageContent:
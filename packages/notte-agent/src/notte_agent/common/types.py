@@ -52,7 +52,11 @@ class AgentResponse(BaseModel):
         texts: list[str] = []
 
         for step in self.trajectory:
-            screenshots.append(step.obs.screenshot.bytes(screenshot_type))
+            screenshot = step.obs.screenshot.bytes(screenshot_type)
+            # steps observed without screenshot (e.g `screenshot_policy = "lazy"`) are skipped
+            if len(screenshot) == 0:
+                continue
+            screenshots.append(screenshot)
             texts.append(step.agent_response.state.next_goal)
 
         if len(screenshots) == 0:
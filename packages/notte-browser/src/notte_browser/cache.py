@@ -0,0 +1,295 @@
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from typing import ClassVar
+
+from loguru import logger
+from notte_core.common.config import config
+from patchright.async_api import BrowserContext, Route
+
+# static assets that are identical across sessions
+CACHEABLE_RESOURCE_TYPES = frozenset({"script", "stylesheet", "font", "image"})
+# headers specific to the original response that must not be replayed
+SKIPPED_HEADERS = frozenset(
+    {"set-cookie", "content-encoding", "content-length", "transfer-encoding", "connection", "date", "age"}
+)
+
+
+def cache_lifetime(headers: dict[str, str]) -> float | None:
+    """
+    Number of seconds a response can be reused by other sessions, or `None` if it must not be shared.
+
+    Only responses that are explicitly cacheable by any client (`max-age` or `Expires`) and do not depend
+    on the session cookies are shared. Responses with other `Vary` headers are only shared with the requests
+    that send the same values for these headers (see `varied_headers`).
+    """
+    if "set-cookie" in headers:
+        return None
+    vary = headers.get("vary", "").lower()
+    if "*" in vary or "cookie" in vary or "authorization" in vary:
+        return None
+    directives: dict[str, str] = {}
+    for directive in headers.get("cache-control", "").lower().split(","):
+        name, _, value = directive.strip().partition("=")
+        directives[name] = value.strip('"')
+    if len({"no-store", "no-cache", "private"} & directives.keys()) > 0:
+        return None
+    lifetime: float | None = None
+    if "max-age" in directives:
+        try:
+            lifetime = float(directives["max-age"])
+        except ValueError:
+            return None
+    elif "expires" in headers:
+        try:
+            lifetime = parsedate_to_datetime(headers["expires"]).timestamp() - time.time()
+        except (TypeError, ValueError):
+            return None
+    if lifetime is None or lifetime <= 0:
+        return None
+    return lifetime
+
+
+def varied_headers(response_headers: dict[str, str], request_headers: dict[str, str]) -> dict[str, str]:
+    """Values of the request headers listed in the `Vary` header of the response"""
+    names = {name.strip().lower() for name in response_headers.get("vary", "").split(",")} - {""}
+    return {name: request_headers.get(name, "") for name in sorted(names)}
+
+
+@dataclass
+class HttpCacheEntry:
+    url: str
+    status: int
+    headers: dict[str, str]
+    expires_at: float
+    size: int
+    # request headers the response varies on: the entry is only served to requests with the same values
+    vary: dict[str, str] = field(default_factory=dict)
+
+    def matches(self, request_headers: dict[str, str]) -> bool:
+        return all(request_headers.get(name, "") == value for name, value in self.vary.items())
+
+
+@dataclass
+class HttpCacheStats:
+    hits: int = 0
+    misses: int = 0
+    stored: int = 0
+    evicted: int = 0
+
+
+class SharedHttpCache:
+    """
+    On-disk cache of static assets shared by all the browser contexts of a process (and across processes using
+    the same directory). Requests are served through context routing so cookies, local storage and the browser
+    HTTP cache stay isolated per context. Least recently used entries are evicted above `max_size_bytes`.
+
+    The usage is tracked incrementally by each process. Since the directory is shared, it is only an estimate:
+    the directory is scanned (usage and recency, i.e modification time of the body files, of the entries of all
+    the processes) when the estimate exceeds `max_size_bytes` or every `rescan_interval` writes.
+    """
+
+    caches: ClassVar[dict[Path, "SharedHttpCache"]] = {}
+    # number of writes between two scans of the directory
+    rescan_interval: ClassVar[int] = 100
+    # eviction frees some headroom (fraction of `max_size_bytes` kept) so that the next writes do not rescan
+    eviction_target: ClassVar[float] = 0.9
+
+    def __init__(self, directory: Path, max_size_bytes: int) -> None:
+        self.directory: Path = directory
+        self.max_size_bytes: int = max_size_bytes
+        self.stats: HttpCacheStats = HttpCacheStats()
+        # metadata of the entries read or written by this process (loaded on demand)
+        self.index: dict[str, HttpCacheEntry] = {}
+        # estimated disk usage of the directory
+        self.size: int = 0
+        # the first write scans the directory (entries of previous runs and other processes)
+        self.nb_puts_since_scan: int = self.rescan_interval
+        # disk reads/writes run in worker threads
+        self.lock: threading.Lock = threading.Lock()
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def from_config() -> "SharedHttpCache | None":
+        """Cache shared by all managers of the process, `None` if `http_cache_dir` is not set"""
+        if config.http_cache_dir is None:
+            return None
+        directory = Path(config.http_cache_dir).expanduser().resolve()
+        if directory not in SharedHttpCache.caches:
+            SharedHttpCache.caches[directory] = SharedHttpCache(directory, config.http_cache_max_size_mb * 1024 * 1024)
+        return SharedHttpCache.caches[directory]
+
+    @staticmethod
+    def key(url: str) -> str:
+        return hashlib.sha256(url.encode("utf-8")).hexdigest()
+
+    def _paths(self, key: str) -> tuple[Path, Path]:
+        return self.directory / f"{key}.json", self.directory / f"{key}.body"
+
+    def _load_entry(self, key: str) -> HttpCacheEntry | None:
+        meta_path, _ = self._paths(key)
+        try:
+            entry = HttpCacheEntry(**json.loads(meta_path.read_text()))
+        except (OSError, ValueError, TypeError):
+            return None
+        self.index[key] = entry
+        return entry
+
+    def _remove(self, key: str) -> None:
+        _ = self.index.pop(key, None)
+        meta_path, body_path = self._paths(key)
+        try:
+            self.size = max(0, self.size - body_path.stat().st_size)
+        except OSError:
+            pass
+        for path in (meta_path, body_path):
+            path.unlink(missing_ok=True)
+
+    def _disk_entries(self) -> list[tuple[int, str, int]]:
+        """(last use in ns, key, size) of the entries of the directory, including those of other processes"""
+        entries: list[tuple[int, str, int]] = []
+        with os.scandir(self.directory) as it:
+            for dir_entry in it:
+                # temporary files end with `.tmp`
+                if not dir_entry.name.endswith(".body"):
+                    continue
+                try:
+                    stat = dir_entry.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime_ns, dir_entry.name.removesuffix(".body"), stat.st_size))
+        return entries
+
+    @staticmethod
+    def _touch(path: Path) -> None:
+        # explicit nanosecond timestamps: the filesystem clock can be too coarse to order consecutive uses
+        now = time.time_ns()
+        os.utime(path, ns=(now, now))
+
+    def get(self, url: str, request_headers: dict[str, str] | None = None) -> tuple[HttpCacheEntry, bytes] | None:
+        with self.lock:
+            return self._get(url, request_headers or {})
+
+    def put(
+        self,
+        url: str,
+        status: int,
+        headers: dict[str, str],
+        body: bytes,
+        lifetime: float,
+        request_headers: dict[str, str] | None = None,
+    ) -> None:
+        with self.lock:
+            self._put(url, status, headers, body, lifetime, request_headers or {})
+
+    def _get(self, url: str, request_headers: dict[str, str]) -> tuple[HttpCacheEntry, bytes] | None:
+        key = self.key(url)
+        # entries can also be written (or evicted) by other processes sharing the directory
+        entry = self.index.get(key) or self._load_entry(key)
+        if entry is None:
+            return None
+        if entry.expires_at <= time.time():
+            self._remove(key)
+            return None
+        if not entry.matches(request_headers):
+            return None
+        _, body_path = self._paths(key)
+        try:
+            body = body_path.read_bytes()
+            self._touch(body_path)
+        except OSError:
+            self._remove(key)
+            return None
+        return entry, body
+
+    def _put(
+        self,
+        url: str,
+        status: int,
+        headers: dict[str, str],
+        body: bytes,
+        lifetime: float,
+        request_headers: dict[str, str],
+    ) -> None:
+        if len(body) > self.max_size_bytes:
+            return
+        key = self.key(url)
+        self._remove(key)
+        entry = HttpCacheEntry(
+            url=url,
+            status=status,
+            headers={name: value for name, value in headers.items() if name.lower() not in SKIPPED_HEADERS},
+            expires_at=time.time() + lifetime,
+            size=len(body),
+            vary=varied_headers(headers, request_headers),
+        )
+        meta_path, body_path = self._paths(key)
+        # write to temporary files first: other processes never read partial entries
+        for path, data in ((body_path, body), (meta_path, json.dumps(asdict(entry)).encode("utf-8"))):
+            tmp_path = path.with_suffix(f"{path.suffix}.{os.getpid()}.tmp")
+            _ = tmp_path.write_bytes(data)
+            os.replace(tmp_path, path)
+        self._touch(body_path)
+        self.index[key] = entry
+        self.size += entry.size
+        self.stats.stored += 1
+        self.nb_puts_since_scan += 1
+        if self.size > self.max_size_bytes or self.nb_puts_since_scan >= self.rescan_interval:
+            self._evict()
+
+    def _evict(self) -> None:
+        """Remove the least recently used entries of the directory if it does not fit in `max_size_bytes`"""
+        # the directory is shared: the usage of this process alone does not tell whether it is full
+        entries = self._disk_entries()
+        self.size = sum(size for _, _, size in entries)
+        self.nb_puts_since_scan = 0
+        if self.size <= self.max_size_bytes:
+            return
+        target = self.max_size_bytes * self.eviction_target
+        for _, key, _ in sorted(entries):
+            if self.size <= target:
+                break
+            self._remove(key)
+            self.stats.evicted += 1
+
+    async def install(self, context: BrowserContext) -> None:
+        await context.route("**/*", self.handle)
+
+    async def handle(self, route: Route) -> None:
+        request = route.request
+        if (
+            request.method != "GET"
+            or request.resource_type not in CACHEABLE_RESOURCE_TYPES
+            or "authorization" in request.headers
+        ):
+            await route.fallback()
+            return
+        cached = await asyncio.to_thread(self.get, request.url, request.headers)
+        if cached is not None:
+            entry, body = cached
+            self.stats.hits += 1
+            await route.fulfill(status=entry.status, headers=entry.headers, body=body)
+            return
+        self.stats.misses += 1
+        try:
+            response = await route.fetch()
+            body = await response.body()
+        except Exception:
+            # let the browser handle (and report) network errors
+            await route.fallback()
+            return
+        lifetime = cache_lifetime(response.headers) if response.status == 200 else None
+        if lifetime is not None:
+            try:
+                await asyncio.to_thread(
+                    self.put, request.url, response.status, response.headers, body, lifetime, request.headers
+                )
+            except OSError as e:
+                logger.warning(f"Failed to store '{request.url}' in the shared http cache: {e}")
+        await route.fulfill(response=response, body=body)
@@ -212,7 +212,7 @@ class BrowserController:
                     raise FailedToGetFileError(action.id, file_path)
 
                 if prev_snapshot is not None:
-                    locator_node = prev_snapshot.dom_node.find(action.id)
+                    locator_node = prev_snapshot.find(action.id)
 
                     if locator_node is not None and locator_node.attributes is not None:
                         clickable_els = ["button", "a"]
@@ -307,6 +307,11 @@ class BrowserController:
     ) -> bool:
         context = window.page.context
         num_pages = len(context.pages)
+        nb_waits, waited, saved = (
+            window.settle_stats.nb_waits,
+            window.settle_stats.waited_s,
+            window.settle_stats.saved_s,
+        )
         retval = True
         match action:
             case InteractionAction():
@@ -335,4 +340,11 @@ class BrowserController:
             if self.verbose:
                 logger.info(f"🪦 Action {action.id} resulted in a new tab, switched to it...")
             await self.switch_tab(window, -1)
+        if self.verbose and window.settle_stats.nb_waits > nb_waits:
+            logger.info(
+                (
+                    f"🪦 Waited {(window.settle_stats.waited_s - waited) * 1000:.0f}ms for the page to settle "
+                    f"after action {action.id} ({(window.settle_stats.saved_s - saved) * 1000:.0f}ms saved over fixed waits)"
+                )
+            )
         return retval
@@ -1,9 +1,11 @@
 // file taken from: https://github.com/browser-use/browser-use/blob/main/browser_use/dom/buildDomTree.js
 (
-	{ highlight_elements, focus_element, viewport_expansion }
+	{ highlight_elements, focus_element, viewport_expansion, incremental = false, max_mutations = 0, generation = null, columnar = false }
 ) => {
 
 	let highlightIndex = 0; // Reset highlight index
+	// incremental snapshot state (see `extractIncremental`), null when incremental snapshots are disabled
+	let state = null;
 
 	function highlightElement(node, parentIframe = null) {
 		// Create or get node container
@@ -313,6 +315,16 @@
 		}
 	}
 
+	// Helper function to check if element intersects the viewport (`isElementVisible` ignores the scroll position)
+	function isInViewport(element, parentIframe = null) {
+		const rect = element.getBoundingClientRect();
+		const left = rect.left + (parentIframe ? parentIframe.getBoundingClientRect().left : 0);
+		const top = rect.top + (parentIframe ? parentIframe.getBoundingClientRect().top : 0);
+		return rect.width > 0 && rect.height > 0 &&
+			left + rect.width > 0 && left < window.innerWidth &&
+			top + rect.height > 0 && top < window.innerHeight;
+	}
+
 	// Helper function to check if text node is visible
 	function isTextNodeVisible(textNode) {
 		const range = document.createRange();
@@ -359,6 +371,11 @@
 			children: [],
 		};
 
+		// stable node id used to patch the previous snapshot with changed subtrees
+		if (state && node.nodeType === Node.ELEMENT_NODE) {
+			nodeData.nid = nodeIdOf(node);
+		}
+
 		// Copy all attributes if the node is an element
 		if (node.nodeType === Node.ELEMENT_NODE && node.attributes) {
 			// Use getAttributeNames() instead of directly iterating attributes
@@ -378,10 +395,11 @@
 			nodeData.isVisible = isVisible;
 			nodeData.isTopElement = isTop;
 			nodeData.isEditable = isEditable;
+			nodeData.isInViewport = isVisible && isInViewport(node, parentIframe);
 
 			// Highlight if element meets all criteria and highlighting is enabled
 			if (isInteractive && isVisible && isTop) {
-				nodeData.highlightIndex = highlightIndex++;
+				nodeData.highlightIndex = nextHighlightIndex(node);
 				if (highlight_elements) {
 					if (focus_element >= 0) {
 						if (focus_element === nodeData.highlightIndex) {
@@ -392,6 +410,15 @@
 					}
 				}
 			}
+
+			// geometry of interactive elements is refreshed on every incremental snapshot
+			if (state && isInteractive) {
+				state.interactive.set(nodeData.nid, {
+					element: node,
+					parentIframe: parentIframe,
+					geometry: geometryKey(nodeData),
+				});
+			}
 		}
 
 		// Only add iframeContext if we're inside an iframe
@@ -402,6 +429,9 @@
 		// Only add shadowRoot field if it exists
 		if (node.shadowRoot) {
 			nodeData.shadowRoot = true;
+			if (state) {
+				observe(node.shadowRoot);
+			}
 		}
 
 		// Handle shadow DOM
@@ -416,6 +446,9 @@
 		if (node.tagName === 'IFRAME') {
 			try {
 				const iframeDoc = node.contentDocument || node.contentWindow.document;
+				if (state && iframeDoc) {
+					observe(iframeDoc);
+				}
 				if (iframeDoc && node.childNodes != undefined) {
 					const iframeChildren = Array.from(iframeDoc.body.childNodes).map(child =>
 						buildDomTree(child, node)
@@ -438,5 +471,255 @@
 	}
 
 
-	return buildDomTree(document.body);
+	// Columnar wire format: the nested tree is flattened (pre-order) into parallel arrays with an interned
+	// string table and sent as a single JSON string. See `notte_browser/dom/columnar.py` for the decoder.
+	const COLUMNAR_FLAGS = {
+		TEXT_NODE: 1,
+		VISIBLE: 2,
+		INTERACTIVE: 4,
+		TOP_ELEMENT: 8,
+		EDITABLE: 16,
+		SHADOW_ROOT: 32,
+		// xpath is stored relative to the parent xpath
+		RELATIVE_XPATH: 64,
+		IN_VIEWPORT: 128,
+	};
+
+	function encodeColumnar(root) {
+		const strings = [];
+		const stringIds = new Map();
+		function intern(value) {
+			let id = stringIds.get(value);
+			if (id === undefined) {
+				id = strings.length;
+				strings.push(value);
+				stringIds.set(value, id);
+			}
+			return id;
+		}
+		const columns = {
+			parents: [],
+			flags: [],
+			tags: [],
+			texts: [],
+			xpaths: [],
+			highlights: [],
+			nids: [],
+			attributes: [],
+			attribute_offsets: [0],
+			bboxes: {},
+		};
+		const stack = [[root, -1, null]];
+		while (stack.length > 0) {
+			const [node, parent, parentXpath] = stack.pop();
+			const index = columns.parents.length;
+			columns.parents.push(parent);
+			if (node.type === 'TEXT_NODE') {
+				columns.flags.push(COLUMNAR_FLAGS.TEXT_NODE | (node.isVisible ? COLUMNAR_FLAGS.VISIBLE : 0));
+				columns.tags.push(-1);
+				columns.texts.push(intern(node.text));
+				columns.xpaths.push(-1);
+				columns.highlights.push(-1);
+				columns.nids.push(-1);
+				columns.attribute_offsets.push(columns.attributes.length);
+				continue;
+			}
+			let flags = (node.isVisible ? COLUMNAR_FLAGS.VISIBLE : 0) |
+				(node.isInteractive ? COLUMNAR_FLAGS.INTERACTIVE : 0) |
+				(node.isTopElement ? COLUMNAR_FLAGS.TOP_ELEMENT : 0) |
+				(node.isEditable ? COLUMNAR_FLAGS.EDITABLE : 0) |
+				(node.shadowRoot ? COLUMNAR_FLAGS.SHADOW_ROOT : 0) |
+				(node.isInViewport ? COLUMNAR_FLAGS.IN_VIEWPORT : 0);
+			let xpath = node.xpath;
+			if (xpath !== null && parentXpath !== null && xpath.startsWith(parentXpath + '/')) {
+				flags |= COLUMNAR_FLAGS.RELATIVE_XPATH;
+				xpath = xpath.slice(parentXpath.length + 1);
+			}
+			columns.flags.push(flags);
+			columns.tags.push(node.tagName === null ? -1 : intern(node.tagName));
+			columns.texts.push(-1);
+			columns.xpaths.push(xpath === null ? -1 : intern(xpath));
+			columns.highlights.push(node.highlightIndex ?? -1);
+			columns.nids.push(node.nid ?? -1);
+			for (const [name, value] of Object.entries(node.attributes)) {
+				columns.attributes.push(intern(name), intern(value));
+			}
+			columns.attribute_offsets.push(columns.attributes.length);
+			if (node.bbox) {
+				columns.bboxes[index] = node.bbox;
+			}
+			for (let i = node.children.length - 1; i >= 0; i--) {
+				if (node.children[i]) {
+					stack.push([node.children[i], index, node.xpath]);
+				}
+			}
+		}
+		return JSON.stringify({ strings: strings, ...columns });
+	}
+
+	function encode(tree) {
+		return columnar && tree ? encodeColumnar(tree) : tree;
+	}
+
+	// Incremental snapshots: serialized elements get a stable id (`nid`) and a MutationObserver
+	// records the elements that changed since the last extraction. Only the smallest subtrees
+	// containing these changes are serialized again, the caller patches its previous tree with them.
+	const STATE_KEY = '__notte_dom_state__';
+
+	function nodeIdOf(element) {
+		let nid = state.nids.get(element);
+		if (nid === undefined) {
+			nid = state.nextNid++;
+			state.nids.set(element, nid);
+		}
+		return nid;
+	}
+
+	// highlight indices are kept across incremental snapshots: patched subtrees cannot reuse an index
+	function nextHighlightIndex(element) {
+		if (!state) return highlightIndex++;
+		let index = state.highlights.get(element);
+		if (index === undefined) {
+			index = state.nextHighlightIndex++;
+			state.highlights.set(element, index);
+		}
+		return index;
+	}
+
+	function geometryKey(nodeData) {
+		return JSON.stringify([
+			nodeData.isVisible, nodeData.isTopElement, nodeData.isInViewport, nodeData.highlightIndex ?? null, nodeData.bbox ?? null
+		]);
+	}
+
+	// visibility, top element & bbox depend on the layout of the whole page, not only on the subtree of
+	// the element: an unchanged subtree can move or get covered. They are recomputed for the interactive
+	// elements of the previous snapshot and only the changed ones are sent.
+	function geometryUpdates() {
+		const updates = [];
+		for (const [nid, entry] of state.interactive) {
+			if (!entry.element.isConnected) {
+				state.interactive.delete(nid);
+				continue;
+			}
+			const update = { nid: nid, isVisible: isElementVisible(entry.element), isTopElement: isTopElement(entry.element) };
+			update.isInViewport = update.isVisible && isInViewport(entry.element, entry.parentIframe);
+			update.highlightIndex = update.isVisible && update.isTopElement ? nextHighlightIndex(entry.element) : null;
+			update.bbox = null;
+			if (update.highlightIndex !== null && highlight_elements && (focus_element < 0 || focus_element === update.highlightIndex)) {
+				update.bbox = highlightElement(entry.element, entry.parentIframe);
+			}
+			const geometry = geometryKey(update);
+			if (geometry !== entry.geometry) {
+				entry.geometry = geometry;
+				updates.push(update);
+			}
+		}
+		return updates;
+	}
+
+	function observe(root) {
+		if (state.observed.has(root)) return;
+		state.observed.add(root);
+		state.observer.observe(root, { subtree: true, childList: true, attributes: true, characterData: true });
+	}
+
+	// parent in the composed tree: crosses shadow roots and same-origin iframes
+	function composedParent(node) {
+		const parent = node.parentNode;
+		if (!parent) return null;
+		if (parent.nodeType === Node.DOCUMENT_FRAGMENT_NODE && parent.host) return parent.host;
+		if (parent.nodeType === Node.DOCUMENT_NODE) return parent.defaultView?.frameElement ?? null;
+		return parent;
+	}
+
+	function recordMutations(targetState, records) {
+		for (const record of records) {
+			targetState.nbMutations++;
+			let target = record.target;
+			if (target.nodeType === Node.DOCUMENT_FRAGMENT_NODE && target.host) target = target.host;
+			if (target.nodeType !== Node.ELEMENT_NODE) target = composedParent(target);
+			if (target) targetState.dirty.add(target);
+		}
+	}
+
+	function newState() {
+		const previous = window[STATE_KEY];
+		if (previous) previous.observer.disconnect();
+		const created = {
+			generation: `${Date.now().toString(36)}-${Math.random().toString(36).slice(2)}`,
+			nids: new WeakMap(),
+			nextNid: 0,
+			highlights: new WeakMap(),
+			nextHighlightIndex: 0,
+			// nid -> interactive element of the previous snapshots (see `geometryUpdates`)
+			interactive: new Map(),
+			observed: new WeakSet(),
+			dirty: new Set(),
+			nbMutations: 0,
+			viewport: viewportKey(),
+			observer: new MutationObserver((records) => recordMutations(created, records)),
+		};
+		Object.defineProperty(window, STATE_KEY, { value: created, configurable: true, enumerable: false, writable: true });
+		return created;
+	}
+
+	function viewportKey() {
+		// visibility & top element checks depend on scroll position and viewport size
+		return `${window.scrollX}:${window.scrollY}:${window.innerWidth}:${window.innerHeight}`;
+	}
+
+	function fullSync() {
+		state = newState();
+		observe(document);
+		return { generation: state.generation, tree: encode(buildDomTree(document.body)) };
+	}
+
+	function extractIncremental() {
+		state = window[STATE_KEY] ?? null;
+		if (
+			!state ||
+			state.generation !== generation ||
+			state.viewport !== viewportKey() ||
+			!state.nids.has(document.body)
+		) {
+			return fullSync();
+		}
+		recordMutations(state, state.observer.takeRecords());
+		if (state.nbMutations > max_mutations) {
+			return fullSync();
+		}
+		// smallest previously serialized subtrees containing all changes
+		const roots = new Set();
+		for (const element of state.dirty) {
+			if (!element.isConnected) continue; // removal is recorded on the parent
+			let current = element;
+			while (current && !state.nids.has(current)) {
+				current = composedParent(current);
+			}
+			// changes outside of the serialized tree (e.g. <head>) are ignored
+			if (current) roots.add(current);
+		}
+		if (roots.has(document.body)) {
+			return fullSync();
+		}
+		const patches = [];
+		for (const root of roots) {
+			let ancestor = composedParent(root);
+			while (ancestor && !roots.has(ancestor)) {
+				ancestor = composedParent(ancestor);
+			}
+			if (ancestor) continue; // already covered by a parent patch
+			const parentIframe = root.ownerDocument.defaultView?.frameElement ?? null;
+			patches.push({ nid: state.nids.get(root), tree: encode(buildDomTree(root, parentIframe)) });
+		}
+		state.dirty = new Set();
+		state.nbMutations = 0;
+		return { generation: state.generation, patches: patches, updates: geometryUpdates() };
+	}
+
+	if (incremental) {
+		return extractIncremental();
+	}
+	return encode(buildDomTree(document.body));
 }
@@ -0,0 +1,287 @@
+from collections import defaultdict
+from dataclasses import dataclass, field
+
+from loguru import logger
+from notte_core.browser.dom_tree import ComputedDomAttributes, DomAttributes, NodeSelectors
+from notte_core.browser.dom_tree import DomNode as NotteDomNode
+from notte_core.browser.highlighter import BoundingBox
+from notte_core.browser.node_type import NodeRole, NodeType
+from notte_core.common.config import config
+from notte_core.profiling import profiler
+
+from notte_browser.dom.csspaths import build_csspath
+from notte_browser.dom.types import DomTreeDict, cleanup_aria_attributes, element_name, element_role
+
+# elements named after their (visible) text content
+TEXT_NAMED_TAGS = frozenset({"button", "a", "label"})
+
+
+@dataclass
+class _PendingElement:
+    """Element whose children are being built"""
+
+    tag_name: str
+    attributes: dict[str, str]
+    role: NodeRole | str
+    id: str | None
+    is_interactive: bool
+    computed_attributes: ComputedDomAttributes
+    bbox: BoundingBox | None
+    parent: "_PendingElement | None"
+    children: list[NotteDomNode] = field(default_factory=list)
+    # visible text of the subtree, only collected when a named element needs it
+    text_parts: list[str] | None = None
+
+    def build(self) -> NotteDomNode:
+        text = "".join(self.text_parts) if self.text_parts is not None else ""
+        node = NotteDomNode(
+            id=self.id,
+            type=NodeType.INTERACTION if self.is_interactive else NodeType.OTHER,
+            role=self.role,
+            text=element_name(self.tag_name, self.attributes, lambda: text),
+            children=self.children,
+            attributes=DomAttributes.safe_init(tag_name=self.tag_name, **self.attributes),
+            computed_attributes=self.computed_attributes,
+            bbox=self.bbox,
+        )
+        for child in node.children:
+            child.set_parent(node)
+        if self.parent is not None:
+            self.parent.children.append(node)
+            if self.parent.text_parts is not None:
+                self.parent.text_parts.append(text)
+        return node
+
+
+class _SelectorsResolver:
+    """
+    Selectors of an element, computed on first access (see `ComputedDomAttributes.selectors`): css paths and
+    notte selectors (which grow with the depth of the node) are only built for the nodes that are acted on.
+    """
+
+    __slots__: tuple[str, ...] = (
+        "tag_name",
+        "xpath",
+        "attributes",
+        "highlight_index",
+        "parent",
+        "url",
+        "in_iframe",
+        "in_shadow_root",
+        "iframe_parent_css_paths",
+        "_css_path",
+        "_notte_selector",
+    )
+
+    def __init__(
+        self,
+        tag_name: str,
+        xpath: str,
+        attributes: dict[str, str],
+        highlight_index: int | None,
+        parent: "_SelectorsResolver | None",
+        url: str,
+        in_iframe: bool,
+        in_shadow_root: bool,
+        iframe_parent_css_paths: list[str],
+    ) -> None:
+        self.tag_name: str = tag_name
+        self.xpath: str = xpath
+        self.attributes: dict[str, str] = attributes
+        self.highlight_index: int | None = highlight_index
+        self.parent: _SelectorsResolver | None = parent
+        self.url: str = url
+        self.in_iframe: bool = in_iframe
+        self.in_shadow_root: bool = in_shadow_root
+        self.iframe_parent_css_paths: list[str] = iframe_parent_css_paths
+        self._css_path: str | None = None
+        self._notte_selector: str | None = None
+
+    def css_path(self) -> str:
+        if self._css_path is None:
+            self._css_path = build_csspath(
+                tag_name=self.tag_name,
+                xpath=self.xpath,
+                attributes=self.attributes,
+                highlight_index=self.highlight_index,
+            )
+        return self._css_path
+
+    def notte_selector(self) -> str:
+        # iterative: ancestors are resolved top-down, deep trees would exceed the recursion limit
+        path: list[_SelectorsResolver] = []
+        current: _SelectorsResolver | None = self
+        while current is not None and current._notte_selector is None:
+            path.append(current)
+            current = current.parent
+        selector: str = self.url if current is None or current._notte_selector is None else current._notte_selector
+        for resolver in reversed(path):
+            selector = ":".join([selector, str(hash(resolver.xpath)), str(hash(resolver.css_path()))])
+            resolver._notte_selector = selector
+        assert self._notte_selector is not None
+        return self._notte_selector
+
+    def __call__(self) -> NodeSelectors:
+        return NodeSelectors(
+            css_selector=self.css_path(),
+            xpath_selector=self.xpath,
+            notte_selector=self.notte_selector(),
+            in_iframe=self.in_iframe,
+            iframe_parent_css_selectors=self.iframe_parent_css_paths,
+            in_shadow_root=self.in_shadow_root,
+        )
+
+
+@dataclass(frozen=True)
+class _Scope:
+    """Context inherited from the ancestors of a node"""
+
+    in_iframe: bool
+    in_shadow_root: bool
+    iframe_parent_css_paths: list[str]
+    url: str
+    # selectors of the parent element
+    parent: _SelectorsResolver | None = None
+
+
+class DomNodeBuilder:
+    """
+    Converts the raw DOM tree extracted from the page into notte `DomNode`s in a single iterative pass:
+    ids are assigned in document order and roles/names are computed once per element, without building
+    intermediate trees nor recursing (deep pages cannot hit the recursion limit).
+    """
+
+    def __init__(self) -> None:
+        self.id_counter: defaultdict[str, int] = defaultdict(lambda: 1)
+
+    def node_id(self, role: NodeRole | str, highlight_index: int | None) -> str | None:
+        if isinstance(role, str):
+            logger.debug(
+                f"Unsupported role to convert to ID: {role}. Please add this role to the NodeRole e logic ASAP."
+            )
+            return None
+        if highlight_index is None:
+            return None
+        short_id = role.short_id(force_id=True)
+        if short_id is None:
+            raise ValueError(
+                (
+                    f"Role {role} was incorrectly converted from raw Dom Node."
+                    " It is an interaction node. It should have a short ID but is currently None"
+                )
+            )
+        node_id = f"{short_id}{self.id_counter[short_id]}"
+        self.id_counter[short_id] += 1
+        return node_id
+
+    @profiler.profiled()
+    def build(self, tree: DomTreeDict, notte_selector: str) -> NotteDomNode | None:
+        root: NotteDomNode | None = None
+        # `None` entries close the element on top of `pending` once all its children are built
+        stack: list[tuple[DomTreeDict, _Scope] | None] = [
+            (
+                tree,
+                _Scope(in_iframe=False, in_shadow_root=False, iframe_parent_css_paths=[], url=notte_selector),
+            )
+        ]
+        pending: list[_PendingElement] = []
+        while stack:
+            item = stack.pop()
+            if item is None:
+                node = pending.pop().build()
+                if len(pending) == 0:
+                    root = node
+                continue
+            raw, scope = item
+            parent = pending[-1] if len(pending) > 0 else None
+
+            if raw.get("type") == "TEXT_NODE":
+                text_node = NotteDomNode(
+                    id=None,
+                    role=NodeRole.TEXT,
+                    type=NodeType.TEXT,
+                    text=raw["text"],
+                    children=[],
+                    computed_attributes=ComputedDomAttributes(in_viewport=raw["isVisible"]),
+                    attributes=None,
+                )
+                if parent is None:
+                    return text_node
+                parent.children.append(text_node)
+                if parent.text_parts is not None and raw["isVisible"]:
+                    parent.text_parts.append(raw["text"])
+                continue
+
+            tag_name = raw["tagName"]
+            attrs = raw.get("attributes", {})
+            xpath = raw["xpath"]
+            children = [child for child in raw.get("children", []) if child is not None]
+            if tag_name is None:
+                if xpath is None and len(attrs) == 0 and len(children) == 0:
+                    continue
+                raise ValueError(f"Tag name is None for node: {raw}")
+            if xpath is None:
+                raise ValueError(f"XPath is None for node: {raw}")
+
+            highlight_index = raw.get("highlightIndex")
+            shadow_root = raw.get("shadowRoot", False)
+            is_iframe = tag_name.lower() == "iframe"
+            selectors = _SelectorsResolver(
+                tag_name=tag_name,
+                xpath=xpath,
+                attributes=attrs,
+                highlight_index=highlight_index,
+                parent=scope.parent,
+                url=scope.url,
+                in_iframe=scope.in_iframe or is_iframe,
+                in_shadow_root=scope.in_shadow_root or shadow_root,
+                iframe_parent_css_paths=scope.iframe_parent_css_paths,
+            )
+            child_scope = _Scope(
+                in_iframe=selectors.in_iframe,
+                in_shadow_root=selectors.in_shadow_root,
+                iframe_parent_css_paths=(
+                    # needed to locate any node of the iframe: computed upfront
+                    scope.iframe_parent_css_paths + [selectors.css_path()]
+                    if is_iframe
+                    else scope.iframe_parent_css_paths
+                ),
+                url=scope.url,
+                parent=selectors,
+            )
+            if tag_name.startswith("wiz_"):
+                tag_name = tag_name[len("wiz_") :].replace("_", "-")
+            attrs = cleanup_aria_attributes(attrs)
+            is_interactive = raw.get("isInteractive", False)
+            bbox = raw.get("bbox")
+            if highlight_index is not None and config.highlight_elements:
+                assert bbox is not None, "Bbox is required for highlighted elements"
+            role = NodeRole.from_value(element_role(tag_name, attrs, has_children=len(children) > 0))
+
+            element = _PendingElement(
+                tag_name=tag_name,
+                attributes=attrs,
+                role=role,
+                id=self.node_id(role, highlight_index),
+                is_interactive=is_interactive,
+                computed_attributes=ComputedDomAttributes(
+                    in_viewport=raw.get("isInViewport", False),
+                    is_interactive=is_interactive,
+                    is_top_element=raw.get("isTopElement", False),
+                    is_editable=raw.get("isEditable", False),
+                    shadow_root=shadow_root,
+                    highlight_index=highlight_index,
+                    selectors=selectors,
+                ),
+                bbox=BoundingBox.model_validate(bbox) if bbox else None,
+                parent=parent,
+                text_parts=(
+                    []
+                    if tag_name.lower() in TEXT_NAMED_TAGS or (parent is not None and parent.text_parts is not None)
+                    else None
+                ),
+            )
+            pending.append(element)
+            stack.append(None)
+            stack.extend((child, child_scope) for child in reversed(children))
+        return root
@@ -0,0 +1,532 @@
+import asyncio
+from typing import Any
+from urllib.parse import urlparse
+
+from notte_core.profiling import profiler
+from patchright.async_api import CDPSession, Page
+from typing_extensions import TypedDict
+
+# order matters: styles are returned as a list of string indices in the same order
+COMPUTED_STYLES = ["display", "visibility", "opacity", "pointer-events", "clip"]
+DISPLAY, VISIBILITY, OPACITY, POINTER_EVENTS, CLIP = range(len(COMPUTED_STYLES))
+# `clip` of visually hidden elements (screen reader only text): they are not hit by `elementFromPoint`
+EMPTY_CLIP = "rect(0px, 0px, 0px, 0px)"
+
+ELEMENT_NODE = 1
+TEXT_NODE = 3
+
+# same rules as `buildDomNode.js`
+LEAF_ELEMENT_DENY_LIST = {"svg", "script", "style", "link", "meta"}
+INTERACTIVE_ELEMENTS = {
+    "a",
+    "button",
+    "details",
+    "embed",
+    "input",
+    "label",
+    "menu",
+    "menuitem",
+    "object",
+    "select",
+    "textarea",
+    "summary",
+}
+INTERACTIVE_ROLES = {
+    "button",
+    "menu",
+    "menuitem",
+    "link",
+    "checkbox",
+    "radio",
+    "slider",
+    "tab",
+    "tabpanel",
+    "textbox",
+    "combobox",
+    "grid",
+    "listbox",
+    "option",
+    "progressbar",
+    "scrollbar",
+    "searchbox",
+    "switch",
+    "tree",
+    "treeitem",
+    "spinbutton",
+    "tooltip",
+    "a-button-inner",
+    "a-dropdown-button",
+    "click",
+    "menuitemcheckbox",
+    "menuitemradio",
+    "a-button-text",
+    "button-text",
+    "button-icon",
+    "button-icon-only",
+    "button-text-icon-only",
+    "dropdown",
+}
+CLICK_HANDLER_ATTRIBUTES = {"onclick", "ng-click", "@click", "v-on:click"}
+INTERACTIVE_ARIA_ATTRIBUTES = {"aria-expanded", "aria-pressed", "aria-selected", "aria-checked"}
+DISABLEABLE_ELEMENTS = {"button", "input", "select", "textarea", "fieldset", "optgroup", "option"}
+
+VIEWPORT_JS = "() => [window.scrollX, window.scrollY, window.innerWidth, window.innerHeight]"
+
+
+class Viewport(TypedDict):
+    scroll_x: float
+    scroll_y: float
+    width: float
+    height: float
+
+
+class SnapshotDocument:
+    """Flat `DOMSnapshot` document with the indices needed to rebuild the `buildDomNode.js` tree"""
+
+    def __init__(self, document: dict[str, Any], strings: list[str]) -> None:
+        self.strings: list[str] = strings
+        nodes: dict[str, Any] = document["nodes"]
+        # the snapshot follows the flat tree: remapped to the DOM tree below
+        self.parents: list[int] = list(nodes["parentIndex"])
+        self.types: list[int] = nodes["nodeType"]
+        self.names: list[int] = nodes["nodeName"]
+        self.values: list[int] = nodes["nodeValue"]
+        self.raw_attributes: list[list[int]] = nodes["attributes"]
+        self.url: str = strings[document["documentURL"]] if document.get("documentURL", -1) >= 0 else ""
+        self.scroll_x: float = document.get("scrollOffsetX", 0)
+        self.scroll_y: float = document.get("scrollOffsetY", 0)
+        # type of the shadow root each node is in (no shadow root nodes: their content is listed under the host)
+        self.shadow_root_types: dict[int, str] = SnapshotDocument.rare_values(nodes.get("shadowRootType"), strings)
+        self.content_documents: dict[int, int] = SnapshotDocument.rare_values(nodes.get("contentDocumentIndex"))
+        pseudo_nodes: set[int] = set(nodes.get("pseudoType", {}).get("index", []))
+
+        # children as seen by `node.childNodes` (no pseudo elements, shadow roots are kept apart)
+        self.children: list[list[int]] = [[] for _ in self.parents]
+        # host -> top-level nodes of its shadow root
+        self.shadow_roots: dict[int, list[int]] = {}
+        for index, parent in enumerate(self.parents):
+            if parent < 0 or index in pseudo_nodes:
+                continue
+            if self.is_shadow_root_child(index):
+                self.shadow_roots.setdefault(parent, []).append(index)
+                continue
+            if self.types[parent] == ELEMENT_NODE and self.name(parent) == "SLOT":
+                # light DOM node assigned to a slot: child of the shadow host in the DOM tree. Nodes of the light
+                # DOM that are not assigned to any slot are not part of the snapshot
+                host = parent
+                while host >= 0 and self.shadow_root_types.get(host) != self.shadow_root_types.get(index):
+                    host = self.parents[host]
+                parent = self.parents[index] = host
+                if parent < 0:
+                    continue
+            self.children[parent].append(index)
+
+        layout: dict[str, Any] = document["layout"]
+        self.layout: dict[int, int] = {node: index for index, node in enumerate(layout["nodeIndex"])}
+        self.bounds: list[list[float]] = layout["bounds"]
+        self.styles: list[list[int]] = layout["styles"]
+        self.paint_orders: list[int] = layout.get("paintOrders", [])
+        self.offset_rects: list[list[float]] = layout.get("offsetRects", [])
+
+        self._xpaths: dict[int, str] = {}
+        self._sibling_positions: dict[int, tuple[int, bool]] = {}
+
+    @staticmethod
+    def rare_values(data: dict[str, list[int]] | None, strings: list[str] | None = None) -> dict[int, Any]:
+        if data is None:
+            return {}
+        if strings is None:
+            return dict(zip(data["index"], data["value"]))
+        return {index: strings[value] for index, value in zip(data["index"], data["value"])}
+
+    def name(self, node: int) -> str:
+        return self.strings[self.names[node]]
+
+    def value(self, node: int) -> str:
+        value = self.values[node]
+        return self.strings[value] if value >= 0 else ""
+
+    def attributes(self, node: int) -> dict[str, str]:
+        raw = self.raw_attributes[node]
+        return {self.strings[raw[i]]: self.strings[raw[i + 1]] for i in range(0, len(raw), 2)}
+
+    def style(self, node: int, style: int) -> str | None:
+        layout = self.layout.get(node)
+        # the document node has a layout but no computed styles
+        if layout is None or len(self.styles[layout]) == 0:
+            return None
+        return self.strings[self.styles[layout][style]]
+
+    def rect(self, node: int) -> tuple[float, float, float, float] | None:
+        """Bounding rect relative to the document viewport (i.e. `getBoundingClientRect`)"""
+        layout = self.layout.get(node)
+        if layout is None:
+            return None
+        x, y, width, height = self.bounds[layout]
+        return x - self.scroll_x, y - self.scroll_y, width, height
+
+    def offset_size(self, node: int) -> tuple[float, float] | None:
+        """`offsetWidth` and `offsetHeight` of the element (the layout bounds if the offset rects are missing)"""
+        layout = self.layout.get(node)
+        if layout is None:
+            return None
+        if layout < len(self.offset_rects) and len(self.offset_rects[layout]) == 4:
+            _, _, width, height = self.offset_rects[layout]
+            return width, height
+        _, _, width, height = self.bounds[layout]
+        return width, height
+
+    def body(self) -> int | None:
+        for index, name in enumerate(self.names):
+            if self.types[index] == ELEMENT_NODE and self.strings[name] == "BODY":
+                return index
+        return None
+
+    def is_shadow_root_child(self, node: int) -> bool:
+        """
+        Whether the node is a top-level node of the shadow root of its parent. The shadow root of a host nested in
+        another shadow root of the same type cannot be told apart from its light DOM: it is then treated as such.
+        """
+        shadow_root_type = self.shadow_root_types.get(node)
+        return shadow_root_type is not None and shadow_root_type != self.shadow_root_types.get(self.parents[node])
+
+    def sibling_position(self, node: int) -> tuple[int, bool]:
+        """Index among same-name element siblings and whether any sibling shares the name"""
+        if node not in self._sibling_positions:
+            parent = self.parents[node]
+            siblings = self.children[parent] if parent >= 0 else [node]
+            counts: dict[int, int] = {}
+            for sibling in siblings:
+                if self.types[sibling] == ELEMENT_NODE:
+                    name = self.names[sibling]
+                    self._sibling_positions[sibling] = (counts.get(name, 0), False)
+                    counts[name] = counts.get(name, 0) + 1
+            for sibling in siblings:
+                if self.types[sibling] == ELEMENT_NODE:
+                    position, _ = self._sibling_positions[sibling]
+                    self._sibling_positions[sibling] = (position, counts[self.names[sibling]] > 1)
+        return self._sibling_positions[node]
+
+    def xpath(self, node: int) -> str:
+        """Same as `getXPathTree(element, stopAtBoundary=true)` in `buildDomNode.js`"""
+        # ancestors are resolved first (iteratively: deep pages would exceed the recursion limit)
+        path: list[int] = []
+        current = node
+        while current not in self._xpaths:
+            path.append(current)
+            parent = self.parents[current]
+            if parent < 0 or self.is_shadow_root_child(current) or self.types[parent] != ELEMENT_NODE:
+                break
+            current = parent
+        for current in reversed(path):
+            parent = self.parents[current]
+            if parent >= 0 and self.is_shadow_root_child(current):
+                xpath = ""
+            else:
+                index, more_siblings = self.sibling_position(current)
+                segment = self.name(current).lower()
+                if index > 0 or more_siblings:
+                    segment = f"{segment}[{index + 1}]"
+                prefix = self._xpaths[parent] if parent >= 0 and self.types[parent] == ELEMENT_NODE else ""
+                xpath = f"{prefix}/{segment}" if prefix else segment
+            self._xpaths[current] = xpath
+        return self._xpaths[node]
+
+
+# (document, node, parent iframe, in shadow root, children list of the parent) of a node left to build
+_PendingNode = tuple[SnapshotDocument, int, tuple[SnapshotDocument, int] | None, bool, list[dict[str, Any] | None]]
+
+
+class DomSnapshotTreeBuilder:
+    """
+    Builds the same tree as `buildDomNode.js` from a CDP `DOMSnapshot.captureSnapshot` response.
+
+    Visibility, top element (hit testing with paint order) and interactivity checks are computed from the
+    snapshot layout and computed styles instead of calling `getBoundingClientRect` / `getComputedStyle` /
+    `elementFromPoint` on every element. Click listeners attached with `element.onclick = ...` are not part
+    of the snapshot and are therefore not detected.
+    """
+
+    def __init__(self, snapshot: dict[str, Any], viewport: Viewport, dom_config: dict[str, Any]) -> None:
+        strings: list[str] = snapshot["strings"]
+        self.documents: list[SnapshotDocument] = [SnapshotDocument(doc, strings) for doc in snapshot["documents"]]
+        self.viewport: Viewport = viewport
+        self.highlight_elements: bool = dom_config["highlight_elements"]
+        self.focus_element: int = dom_config["focus_element"]
+        self.viewport_expansion: int = dom_config["viewport_expansion"]
+        self.highlight_index: int = 0
+        self._hit_boxes: list[tuple[float, float, float, float, int]] | None = None
+
+    def build(self) -> dict[str, Any] | None:
+        if len(self.documents) == 0:
+            return None
+        main = self.documents[0]
+        body = main.body()
+        if body is None:
+            return None
+        roots: list[dict[str, Any] | None] = []
+        # nodes are built in document order (same highlight indices as `buildDomNode.js`) with an explicit stack:
+        # deep pages would exceed the recursion limit
+        stack: list[_PendingNode] = [(main, body, None, False, roots)]
+        while stack:
+            doc, node, parent_iframe, in_shadow_root, siblings = stack.pop()
+            node_data = self.build_node(doc, node, parent_iframe, in_shadow_root)
+            siblings.append(node_data)
+            if node_data is None or "tagName" not in node_data:
+                continue
+            children: list[dict[str, Any] | None] = node_data["children"]
+            pending: list[_PendingNode] = []
+            shadow_root = doc.shadow_roots.get(node, [])
+            # closed & user-agent shadow roots are not visible from javascript (`element.shadowRoot` is null)
+            if len(shadow_root) > 0 and doc.shadow_root_types[shadow_root[0]] == "open":
+                node_data["shadowRoot"] = True
+                pending.extend((doc, child, parent_iframe, True, children) for child in shadow_root)
+
+            if node_data["tagName"] == "iframe":
+                content = self.same_origin_content(doc, node)
+                if content is not None:
+                    content_body = content.body()
+                    if content_body is not None:
+                        pending.extend(
+                            (content, child, (doc, node), in_shadow_root, children)
+                            for child in content.children[content_body]
+                        )
+            else:
+                pending.extend((doc, child, parent_iframe, in_shadow_root, children) for child in doc.children[node])
+            stack.extend(reversed(pending))
+        return roots[0]
+
+    def build_node(
+        self,
+        doc: SnapshotDocument,
+        node: int,
+        parent_iframe: tuple[SnapshotDocument, int] | None,
+        in_shadow_root: bool,
+    ) -> dict[str, Any] | None:
+        """Data of a single node (children are filled in by `build`)"""
+        node_type = doc.types[node]
+        if node_type == TEXT_NODE:
+            text = doc.value(node).strip()
+            if len(text) > 0 and self.is_text_visible(doc, node):
+                return {"type": "TEXT_NODE", "text": text, "isVisible": True}
+            return None
+        if node_type != ELEMENT_NODE:
+            # comments, processing instructions: dropped by the python parser anyway
+            return None
+        tag_name = doc.name(node).lower()
+        if tag_name in LEAF_ELEMENT_DENY_LIST:
+            return None
+
+        attributes = doc.attributes(node)
+        is_interactive = self.is_interactive(tag_name, attributes)
+        is_visible = self.is_visible(doc, node)
+        is_top = self.is_top_element(doc, node, in_shadow_root)
+        node_data: dict[str, Any] = {
+            "tagName": tag_name,
+            "attributes": attributes,
+            "xpath": doc.xpath(node),
+            "children": [],
+            "isInteractive": is_interactive,
+            "isVisible": is_visible,
+            "isTopElement": is_top,
+            "isEditable": self.is_editable(tag_name, attributes),
+            "isInViewport": is_visible and self.is_in_viewport(doc, node, parent_iframe),
+        }
+        if is_interactive and is_visible and is_top:
+            node_data["highlightIndex"] = self.highlight_index
+            self.highlight_index += 1
+            if self.highlight_elements and (
+                self.focus_element < 0 or self.focus_element == node_data["highlightIndex"]
+            ):
+                node_data["bbox"] = self.bbox(doc, node, parent_iframe)
+        return node_data
+
+    def same_origin_content(self, doc: SnapshotDocument, iframe: int) -> SnapshotDocument | None:
+        """Content document of the iframe if it can be accessed from the page (same origin)"""
+        content_index = doc.content_documents.get(iframe)
+        if content_index is None:
+            return None
+        content = self.documents[content_index]
+        if content.url.startswith("about:") or content.url == "":
+            return content
+        main = urlparse(self.documents[0].url)
+        url = urlparse(content.url)
+        if (url.scheme, url.netloc) != (main.scheme, main.netloc):
+            return None
+        return content
+
+    @staticmethod
+    def is_interactive(tag_name: str, attributes: dict[str, str]) -> bool:
+        tab_index = attributes.get("tabindex")
+        if (
+            tag_name in INTERACTIVE_ELEMENTS
+            or "address-input__container__input" in attributes.get("class", "").split()
+            or attributes.get("role") in INTERACTIVE_ROLES
+            or attributes.get("aria-role") in INTERACTIVE_ROLES
+            or (tab_index is not None and tab_index != "-1")
+            or attributes.get("data-action") in ("a-dropdown-select", "a-dropdown-button")
+        ):
+            return True
+        if any(name in attributes for name in CLICK_HANDLER_ATTRIBUTES):
+            return True
+        if any(name in attributes for name in INTERACTIVE_ARIA_ATTRIBUTES):
+            return True
+        # `element.draggable`: "auto" (or any other value) falls back to the default of the tag, true for images
+        # (links are already interactive)
+        draggable = attributes.get("draggable", "").lower()
+        if draggable in ("true", "false"):
+            return draggable == "true"
+        return tag_name == "img"
+
+    @staticmethod
+    def is_editable(tag_name: str, attributes: dict[str, str]) -> bool:
+        if (tag_name in DISABLEABLE_ELEMENTS and "disabled" in attributes) or attributes.get("aria-disabled") == "true":
+            return False
+        is_readonly = "readonly" in attributes or attributes.get("aria-readonly") == "true"
+        if tag_name in ("select", "input", "textarea"):
+            return not is_readonly
+        if "contenteditable" in attributes and attributes["contenteditable"] != "false":
+            return not is_readonly
+        return False
+
+    @staticmethod
+    def is_visible(doc: SnapshotDocument, node: int) -> bool:
+        size = doc.offset_size(node)
+        if size is None:
+            return False
+        width, height = size
+        return (
+            width > 0 and height > 0 and doc.style(node, VISIBILITY) != "hidden" and doc.style(node, DISPLAY) != "none"
+        )
+
+    def is_in_viewport(
+        self, doc: SnapshotDocument, node: int, parent_iframe: tuple[SnapshotDocument, int] | None
+    ) -> bool:
+        left, top, width, height = doc.rect(node) or (0.0, 0.0, 0.0, 0.0)
+        if parent_iframe is not None:
+            iframe_doc, iframe = parent_iframe
+            iframe_x, iframe_y, _, _ = iframe_doc.rect(iframe) or (0.0, 0.0, 0.0, 0.0)
+            left, top = left + iframe_x, top + iframe_y
+        return (
+            width > 0
+            and height > 0
+            and left + width > 0
+            and left < self.viewport["width"]
+            and top + height > 0
+            and top < self.viewport["height"]
+        )
+
+    def is_text_visible(self, doc: SnapshotDocument, node: int) -> bool:
+        rect = doc.rect(node)
+        if rect is None:
+            return False
+        _, top, width, height = rect
+        if width == 0 or height == 0 or top < 0 or top > self.viewport["height"]:
+            return False
+        parent = doc.parents[node]
+        if parent < 0 or doc.types[parent] != ELEMENT_NODE:
+            return False
+        # `checkVisibility({checkOpacity: true, checkVisibilityCSS: true})` on the parent element
+        return (
+            parent in doc.layout
+            and doc.style(parent, VISIBILITY) != "hidden"
+            and doc.style(parent, OPACITY) not in ("0", None)
+        )
+
+    def is_top_element(self, doc: SnapshotDocument, node: int, in_shadow_root: bool) -> bool:
+        # elements in iframes are considered top by default
+        if doc is not self.documents[0]:
+            return True
+        left, top, width, height = doc.rect(node) or (0.0, 0.0, 0.0, 0.0)
+        if not in_shadow_root:
+            if self.viewport_expansion == -1:
+                return True
+            expansion = self.viewport_expansion
+            if (
+                top + height < -expansion
+                or top > self.viewport["height"] + expansion
+                or left + width < -expansion
+                or left > self.viewport["width"] + expansion
+            ):
+                return False
+        center_x, center_y = left + width / 2, top + height / 2
+        if center_x < 0 or center_x >= self.viewport["width"] or center_y < 0 or center_y >= self.viewport["height"]:
+            return False
+        hit = self.element_from_point(center_x, center_y)
+        while hit is not None and hit >= 0:
+            if hit == node:
+                return True
+            hit = doc.parents[hit]
+        return False
+
+    def element_from_point(self, x: float, y: float) -> int | None:
+        """Topmost node (by paint order) of the main document at the given viewport position"""
+        if self._hit_boxes is None:
+            self._hit_boxes = self.hit_boxes()
+        for left, top, right, bottom, node in self._hit_boxes:
+            if left <= x < right and top <= y < bottom:
+                return node
+        return None
+
+    def hit_boxes(self) -> list[tuple[float, float, float, float, int]]:
+        doc = self.documents[0]
+        boxes: list[tuple[int, int, tuple[float, float, float, float, int]]] = []
+        for node, layout in doc.layout.items():
+            if doc.types[node] not in (ELEMENT_NODE, TEXT_NODE):
+                continue
+            if (
+                doc.style(node, POINTER_EVENTS) == "none"
+                or doc.style(node, VISIBILITY) == "hidden"
+                or doc.style(node, CLIP) == EMPTY_CLIP
+            ):
+                continue
+            x, y, width, height = doc.bounds[layout]
+            left, top = x - doc.scroll_x, y - doc.scroll_y
+            if width <= 0 or height <= 0 or left + width < 0 or top + height < 0:
+                continue
+            if left > self.viewport["width"] or top > self.viewport["height"]:
+                continue
+            paint_order = doc.paint_orders[layout] if layout < len(doc.paint_orders) else 0
+            boxes.append((paint_order, node, (left, top, left + width, top + height, node)))
+        # painted last (and last in document order for equal paint order) is on top
+        boxes.sort(key=lambda box: (box[0], box[1]), reverse=True)
+        return [box for _, _, box in boxes]
+
+    def bbox(
+        self, doc: SnapshotDocument, node: int, parent_iframe: tuple[SnapshotDocument, int] | None
+    ) -> dict[str, float]:
+        left, top, width, height = doc.rect(node) or (0.0, 0.0, 0.0, 0.0)
+        iframe_x, iframe_y = 0.0, 0.0
+        if parent_iframe is not None:
+            iframe_doc, iframe = parent_iframe
+            iframe_x, iframe_y, _, _ = iframe_doc.rect(iframe) or (0.0, 0.0, 0.0, 0.0)
+        return {
+            "x": left,
+            "y": top,
+            "width": width,
+            "height": height,
+            "scroll_x": self.viewport["scroll_x"],
+            "scroll_y": self.viewport["scroll_y"],
+            "iframe_offset_x": iframe_x,
+            "iframe_offset_y": iframe_y,
+            "viewport_width": self.viewport["width"],
+            "viewport_height": self.viewport["height"],
+        }
+
+
+@profiler.profiled()
+async def capture_dom_snapshot_tree(
+    page: Page, cdp_session: CDPSession, dom_config: dict[str, Any]
+) -> dict[str, Any] | None:
+    """Build the `buildDomNode.js` tree of the page from a single `DOMSnapshot.captureSnapshot` call"""
+
+    async def capture_snapshot() -> dict[str, Any]:
+        snapshot: dict[str, Any] = await cdp_session.send(  # pyright: ignore[reportUnknownMemberType, reportUnknownVariableType]
+            "DOMSnapshot.captureSnapshot",
+            {"computedStyles": COMPUTED_STYLES, "includePaintOrder": True, "includeDOMRects": True},
+        )
+        return snapshot
+
+    snapshot, (scroll_x, scroll_y, width, height) = await asyncio.gather(capture_snapshot(), page.evaluate(VIEWPORT_JS))
+    viewport = Viewport(scroll_x=scroll_x, scroll_y=scroll_y, width=width, height=height)
+    return DomSnapshotTreeBuilder(snapshot, viewport, dom_config).build()
@@ -0,0 +1,78 @@
+import json
+from typing import Any
+
+from notte_core.profiling import profiler
+
+# node flags of the columnar DOM wire format (must match `COLUMNAR_FLAGS` in `buildDomNode.js`)
+TEXT_NODE_FLAG = 1
+VISIBLE_FLAG = 2
+INTERACTIVE_FLAG = 4
+TOP_ELEMENT_FLAG = 8
+EDITABLE_FLAG = 16
+SHADOW_ROOT_FLAG = 32
+# xpath is stored relative to the parent xpath
+RELATIVE_XPATH_FLAG = 64
+IN_VIEWPORT_FLAG = 128
+
+
+@profiler.profiled()
+def decode_columnar_tree(payload: str) -> dict[str, Any] | None:
+    """
+    Decode the columnar DOM wire format into the nested `DomTreeDict` returned by the default format.
+
+    Nodes are encoded in pre-order with parallel arrays (parent index, flags, tag, text, xpath, ...)
+    and all strings are interned in a single table. Parents always come before their children,
+    so the tree is rebuilt in a single pass.
+    """
+    data: dict[str, Any] = json.loads(payload)
+    strings: list[str] = data["strings"]
+    attributes: list[int] = data["attributes"]
+    offsets: list[int] = data["attribute_offsets"]
+    bboxes: dict[str, dict[str, float]] = data["bboxes"]
+    parents: list[int] = data["parents"]
+    flags: list[int] = data["flags"]
+    tags: list[int] = data["tags"]
+    texts: list[int] = data["texts"]
+    xpaths: list[int] = data["xpaths"]
+    highlights: list[int] = data["highlights"]
+    nids: list[int] = data["nids"]
+    nodes: list[dict[str, Any]] = []
+    for index, parent in enumerate(parents):
+        flag, tag, text, xpath = flags[index], tags[index], texts[index], xpaths[index]
+        node: dict[str, Any]
+        if flag & TEXT_NODE_FLAG:
+            node = {"type": "TEXT_NODE", "text": strings[text], "isVisible": bool(flag & VISIBLE_FLAG)}
+        else:
+            node_xpath: str | None = strings[xpath] if xpath >= 0 else None
+            if flag & RELATIVE_XPATH_FLAG:
+                node_xpath = f"{nodes[parent]['xpath']}/{node_xpath}"
+            node = {
+                "tagName": strings[tag] if tag >= 0 else None,
+                "attributes": {
+                    strings[attributes[i]]: strings[attributes[i + 1]]
+                    for i in range(offsets[index], offsets[index + 1], 2)
+                },
+                "xpath": node_xpath,
+                "children": [],
+                "isVisible": bool(flag & VISIBLE_FLAG),
+                "isInteractive": bool(flag & INTERACTIVE_FLAG),
+                "isTopElement": bool(flag & TOP_ELEMENT_FLAG),
+                "isEditable": bool(flag & EDITABLE_FLAG),
+                "isInViewport": bool(flag & IN_VIEWPORT_FLAG),
+            }
+            if highlights[index] >= 0:
+                node["highlightIndex"] = highlights[index]
+            if flag & SHADOW_ROOT_FLAG:
+                node["shadowRoot"] = True
+            if nids[index] >= 0:
+                node["nid"] = nids[index]
+            bbox = bboxes.get(str(index))
+            if bbox is not None:
+                node["bbox"] = bbox
+        nodes.append(node)
+        if parent >= 0:
+            children: list[dict[str, Any]] = nodes[parent]["children"]
+            children.append(node)
+    if len(nodes) == 0:
+        return None
+    return nodes[0]
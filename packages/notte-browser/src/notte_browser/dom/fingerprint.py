@@ -0,0 +1,84 @@
+from typing import Any
+
+from notte_core.browser.snapshot import PageFingerprint
+from notte_core.profiling import profiler
+from patchright.async_api import Page
+
+# elements that can show up in the action space (cheap superset of the `isInteractiveElement` rules of the extractor)
+INTERACTIVE_SELECTOR = ", ".join(
+    [
+        "a[href]",
+        "button",
+        "input",
+        "select",
+        "textarea",
+        "summary",
+        "details",
+        "label",
+        "[role]",
+        "[tabindex]",
+        "[onclick]",
+        "[contenteditable]",
+    ]
+)
+
+# Fingerprint of the page: a DOM mutation counter and a hash of the interactive elements, scroll position and url.
+# Only the structure and identifying attributes of the elements are hashed: visibility toggles (carousels, tickers,
+# spinners...) do not change the fingerprint.
+# When no mutation happened since the `previous` fingerprint of the same document, the hash is not recomputed.
+PAGE_FINGERPRINT_JS = f"""(previous) => {{
+    let state = window.__notte_fingerprint__;
+    if (!state) {{
+        state = {{ document_id: Math.random().toString(36).slice(2), nb_mutations: 0 }};
+        state.observer = new MutationObserver((records) => {{ state.nb_mutations += records.length; }});
+        state.observer.observe(document, {{ childList: true, subtree: true, attributes: true, characterData: true }});
+        Object.defineProperty(window, "__notte_fingerprint__", {{ value: state, enumerable: false, configurable: true }});
+    }}
+    state.nb_mutations += state.observer.takeRecords().length;
+    const url = window.location.href;
+    if (
+        previous &&
+        previous.document_id === state.document_id &&
+        previous.nb_mutations === state.nb_mutations &&
+        previous.url === url &&
+        previous.scroll === `${{window.scrollX}},${{window.scrollY}}`
+    ) {{
+        return previous;
+    }}
+    // 32 bits FNV-1a
+    let hash = 0x811c9dc5;
+    const update = (value) => {{
+        const str = value === null || value === undefined ? "" : String(value);
+        for (let i = 0; i < str.length; i++) {{
+            hash ^= str.charCodeAt(i);
+            hash = Math.imul(hash, 0x01000193);
+        }}
+        hash ^= 0x1f;
+        hash = Math.imul(hash, 0x01000193);
+    }};
+    update(url);
+    const scroll = `${{window.scrollX}},${{window.scrollY}}`;
+    update(scroll);
+    for (const el of document.querySelectorAll({INTERACTIVE_SELECTOR!r})) {{
+        update(el.tagName);
+        update(el.id);
+        for (const name of ["name", "type", "role", "href", "aria-label", "disabled", "placeholder"]) {{
+            update(el.getAttribute(name));
+        }}
+    }}
+    return {{
+        document_id: state.document_id,
+        nb_mutations: state.nb_mutations,
+        url: url,
+        scroll: scroll,
+        hash: (hash >>> 0).toString(16),
+    }};
+}}"""
+
+
+@profiler.profiled()
+async def page_fingerprint(page: Page, previous: PageFingerprint | None = None) -> PageFingerprint:
+    result: dict[str, Any] = await page.evaluate(
+        PAGE_FINGERPRINT_JS, previous.model_dump() if previous is not None else None
+    )
+    return PageFingerprint.model_validate(result)
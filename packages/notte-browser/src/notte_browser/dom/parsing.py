@@ -1,61 +1,263 @@
+import hashlib
+from dataclasses import dataclass
+from functools import cache
 from pathlib import Path
+from typing import Any, ClassVar, cast
+from weakref import WeakKeyDictionary
 
 from loguru import logger
 from notte_core.browser.dom_tree import DomErrorBuffer
 from notte_core.browser.dom_tree import DomNode as NotteDomNode
-from notte_core.common.config import config
+from notte_core.common.config import DomExtractionBackend, config
 from notte_core.errors.processing import SnapshotProcessingError
 from notte_core.profiling import profiler
-from patchright.async_api import Page
-from typing_extensions import TypedDict
+from patchright.async_api import BrowserContext, CDPSession, Page
+from typing_extensions import NotRequired, TypedDict
 
+from notte_browser.dom.builder import DomNodeBuilder
+from notte_browser.dom.cdp_snapshot import capture_dom_snapshot_tree
+from notte_browser.dom.columnar import decode_columnar_tree
 from notte_browser.dom.csspaths import build_csspath
-from notte_browser.dom.id_generation import generate_sequential_ids
-from notte_browser.dom.types import DOMBaseNode, DOMElementNode, DOMTextNode
+from notte_browser.dom.types import DOMBaseNode, DOMElementNode, DOMTextNode, DomTreeDict
 
 DOM_TREE_JS_PATH = Path(__file__).parent / "buildDomNode.js"
+# window property under which the DOM extractor is installed in the page
+DOM_EXTRACTOR_NAME = "__notte_dom_extractor__"
+# returns `null` if the extractor is missing (e.g. it was not registered before navigation) or outdated
+DOM_EXTRACTOR_CALL_JS = f"""([version, config]) => {{
+    const extractor = window.{DOM_EXTRACTOR_NAME};
+    if (!extractor || extractor.version !== version) {{
+        return null;
+    }}
+    return {{ tree: extractor.extract(config) }};
+}}"""
 
 
-class DomTreeDict(TypedDict):
-    type: str
-    text: str
-    tagName: str | None
-    xpath: str | None
-    attributes: dict[str, str]
+@cache
+def dom_extractor_version() -> str:
+    return hashlib.sha1(DOM_TREE_JS_PATH.read_bytes()).hexdigest()[:12]
+
+
+@cache
+def dom_extractor_install_js() -> str:
+    """Script defining the DOM extractor in the page (non-enumerable so that it doesn't show up in `window` keys)"""
+    return f"""(() => {{
+    const version = "{dom_extractor_version()}";
+    const extractor = window.{DOM_EXTRACTOR_NAME};
+    if (extractor && extractor.version === version) {{
+        return;
+    }}
+    Object.defineProperty(window, "{DOM_EXTRACTOR_NAME}", {{
+        value: {{ version: version, extract: {DOM_TREE_JS_PATH.read_text()} }},
+        configurable: true,
+        enumerable: false,
+        writable: false,
+    }});
+}})();"""
+
+
+class DomTreePatchDict(TypedDict):
+    nid: int
+    # encoded as a JSON string with the columnar wire format
+    tree: DomTreeDict | str
+
+
+class DomGeometryUpdateDict(TypedDict):
+    nid: int
     isVisible: bool
-    isInteractive: bool
     isTopElement: bool
-    isEditable: bool
+    isInViewport: bool
     highlightIndex: int | None
-    shadowRoot: bool
-    children: list["DomTreeDict"]
     bbox: dict[str, float] | None
 
 
+class IncrementalDomTreeDict(TypedDict):
+    generation: str
+    # full tree (first snapshot or resync)
+    tree: NotRequired[DomTreeDict | str | None]
+    # subtrees that changed since the previous snapshot
+    patches: NotRequired[list[DomTreePatchDict]]
+    # new geometry of the interactive elements outside of the patches (layout changes)
+    updates: NotRequired[list[DomGeometryUpdateDict]]
+
+
+@dataclass
+class IncrementalDomCache:
+    """Previous raw DOM tree of a page, indexed by stable element id"""
+
+    generation: str
+    tree: DomTreeDict
+    nodes: dict[int, DomTreeDict]
+
+    @staticmethod
+    def index(tree: DomTreeDict) -> dict[int, DomTreeDict]:
+        nodes: dict[int, DomTreeDict] = {}
+        stack = [tree]
+        while stack:
+            node = stack.pop()
+            nid = node.get("nid")
+            if nid is not None:
+                nodes[nid] = node
+            stack.extend(child for child in node.get("children", []) if child is not None)
+        return nodes
+
+    @staticmethod
+    def from_tree(generation: str, tree: DomTreeDict) -> "IncrementalDomCache":
+        return IncrementalDomCache(generation=generation, tree=tree, nodes=IncrementalDomCache.index(tree))
+
+    def patch(self, patches: list[DomTreePatchDict]) -> bool:
+        """Replace changed subtrees in place. Returns False if a patch targets an unknown subtree"""
+        for patch in patches:
+            target = self.nodes.get(patch["nid"])
+            if target is None:
+                return False
+            for nid in IncrementalDomCache.index(target):
+                del self.nodes[nid]
+            # in place update: the parent keeps pointing to the patched node
+            tree = ParseDomTreePipe.decode(patch["tree"])
+            if tree is None:
+                return False
+            node: dict[str, Any] = target  # pyright: ignore[reportAssignmentType]
+            node.clear()
+            node.update(tree)
+            self.nodes.update(IncrementalDomCache.index(target))
+        return True
+
+    def update(self, updates: list[DomGeometryUpdateDict]) -> bool:
+        """Refresh the geometry of unchanged elements. Returns False if an update targets an unknown element"""
+        for update in updates:
+            target = self.nodes.get(update["nid"])
+            if target is None:
+                return False
+            target["isVisible"] = update["isVisible"]
+            target["isTopElement"] = update["isTopElement"]
+            target["isInViewport"] = update["isInViewport"]
+            target["highlightIndex"] = update["highlightIndex"]
+            target["bbox"] = update["bbox"]
+        return True
+
+
+DomConfig = dict[str, bool | int | str | None]
+
+
 class ParseDomTreePipe:
+    # previous raw DOM tree of each page, used when `config.incremental_snapshots` is enabled
+    incremental_cache: ClassVar[WeakKeyDictionary[Page, IncrementalDomCache]] = WeakKeyDictionary()
+
     @profiler.profiled("domforward")
     @staticmethod
-    async def forward(page: Page) -> NotteDomNode:
-        dom_tree = await ParseDomTreePipe.parse_dom_tree(page)
-        dom_tree = generate_sequential_ids(dom_tree)
-        notte_dom_tree = dom_tree.to_notte_domnode()
+    async def forward(page: Page, cdp_session: CDPSession | None = None) -> NotteDomNode:
+        tree = await ParseDomTreePipe.extract_dom_tree(page, cdp_session)
+        notte_dom_tree = DomNodeBuilder().build(tree, notte_selector=page.url)
+        if notte_dom_tree is None:
+            raise SnapshotProcessingError(page.url, f"Failed to parse DOM tree. Dom Tree is empty. {tree}")
         DomErrorBuffer.flush()
         return notte_dom_tree
 
+    @staticmethod
+    async def install(context: BrowserContext) -> None:
+        """Register the DOM extractor for every page (and future navigation) of the context"""
+        await context.add_init_script(script=dom_extractor_install_js())
+
+    @staticmethod
+    def decode(tree: DomTreeDict | str | None) -> DomTreeDict | None:
+        if isinstance(tree, str):
+            return cast(DomTreeDict | None, decode_columnar_tree(tree))
+        return tree
+
+    @staticmethod
+    async def extract(page: Page, dom_config: DomConfig) -> "DomTreeDict | IncrementalDomTreeDict | str | None":
+        result: dict[str, DomTreeDict | IncrementalDomTreeDict | str | None] | None = await page.evaluate(
+            DOM_EXTRACTOR_CALL_JS, [dom_extractor_version(), dom_config]
+        )
+        if result is None:
+            # extractor went missing (context created without `install`, init script not run yet, etc.)
+            if config.verbose:
+                logger.trace(f"DOM extractor not found for {page.url}. Injecting it...")
+            await page.evaluate(dom_extractor_install_js())
+            result = await page.evaluate(DOM_EXTRACTOR_CALL_JS, [dom_extractor_version(), dom_config])
+            if result is None:
+                raise SnapshotProcessingError(page.url, "Failed to install DOM extractor")
+        return result["tree"]
+
+    @staticmethod
+    async def extract_incremental(page: Page, dom_config: DomConfig) -> DomTreeDict | None:
+        """Patch the previous tree of the page with the subtrees that changed since the last snapshot"""
+        cache = ParseDomTreePipe.incremental_cache.get(page)
+        generation = cache.generation if cache is not None else None
+        result = cast(
+            IncrementalDomTreeDict | None,
+            await ParseDomTreePipe.extract(page, {**dom_config, "incremental": True, "generation": generation}),
+        )
+        if result is None:
+            return None
+        if "patches" in result:
+            patches = result["patches"]
+            updates = result.get("updates", [])
+            if (
+                cache is not None
+                and cache.generation == result["generation"]
+                and cache.patch(patches)
+                and cache.update(updates)
+            ):
+                if config.verbose:
+                    logger.trace(
+                        f"Patched {len(patches)} DOM subtrees and {len(updates)} element geometries for {page.url}"
+                    )
+                return cache.tree
+            # previous tree is out of sync with the page: full resync
+            result = cast(
+                IncrementalDomTreeDict | None,
+                await ParseDomTreePipe.extract(page, {**dom_config, "incremental": True, "generation": None}),
+            )
+            if result is None:
+                return None
+        tree = ParseDomTreePipe.decode(result.get("tree"))
+        if tree is None:
+            _ = ParseDomTreePipe.incremental_cache.pop(page, None)
+            return None
+        ParseDomTreePipe.incremental_cache[page] = IncrementalDomCache.from_tree(result["generation"], tree)
+        return tree
+
     @profiler.profiled()
     @staticmethod
-    async def parse_dom_tree(page: Page) -> DOMBaseNode:
-        js_code = DOM_TREE_JS_PATH.read_text()
-        dom_config: dict[str, bool | int] = {
+    async def extract_dom_tree(page: Page, cdp_session: CDPSession | None = None) -> DomTreeDict:
+        """Raw DOM tree of the page, as extracted by the configured backend"""
+        dom_config: DomConfig = {
             "highlight_elements": config.highlight_elements,
             "focus_element": config.focus_element,
             "viewport_expansion": config.viewport_expansion,
+            "max_mutations": config.incremental_max_mutations,
+            "columnar": config.columnar_dom_transfer,
         }
         if config.verbose:
             logger.trace(f"Parsing DOM tree for {page.url} with config: {dom_config}")
-        node: DomTreeDict | None = await page.evaluate(js_code, dom_config)
+        node: DomTreeDict | None
+        if config.dom_extraction_backend is DomExtractionBackend.CDP:
+            session = cdp_session or await page.context.new_cdp_session(page)
+            try:
+                node = cast(DomTreeDict | None, await capture_dom_snapshot_tree(page, session, dom_config))
+            finally:
+                if cdp_session is None:
+                    # sessions of the callers are reused across snapshots: only the temporary one is detached
+                    await session.detach()
+        elif config.incremental_snapshots:
+            node = await ParseDomTreePipe.extract_incremental(page, dom_config)
+        else:
+            node = ParseDomTreePipe.decode(
+                cast(DomTreeDict | str | None, await ParseDomTreePipe.extract(page, dom_config))
+            )
         if node is None:
             raise SnapshotProcessingError(page.url, "Failed to parse HTML to dictionary")
+        return node
+
+    @staticmethod
+    async def parse_dom_tree(page: Page, cdp_session: CDPSession | None = None) -> DOMBaseNode:
+        """
+        Intermediate `DOMBaseNode` tree of the page (without ids). `forward` builds the notte `DomNode`s
+        directly instead.
+        """
+        node = await ParseDomTreePipe.extract_dom_tree(page, cdp_session)
         parsed = ParseDomTreePipe._parse_node(
             node,
             parent=None,
@@ -127,6 +329,7 @@ class ParseDomTreePipe:
             is_interactive=node.get("isInteractive", False),
             is_top_element=node.get("isTopElement", False),
             is_editable=node.get("isEditable", False),
+            is_in_viewport=node.get("isInViewport", False),
             highlight_index=node.get("highlightIndex"),
             bbox=node.get("bbox"),
             shadow_root=shadow_root,
@@ -1,3 +1,4 @@
+from collections.abc import Callable
 from dataclasses import dataclass, field
 from typing import Any
 
@@ -7,13 +8,38 @@ from notte_core.browser.dom_tree import DomNode as NotteDomNode
 from notte_core.browser.highlighter import BoundingBox
 from notte_core.browser.node_type import NodeRole, NodeType
 from notte_core.common.config import config
-from typing_extensions import override
+from typing_extensions import NotRequired, TypedDict, override
 
 VERBOSE = False
 
 
+class DomTreeDict(TypedDict):
+    """Raw DOM tree as extracted from the page"""
+
+    type: str
+    text: str
+    tagName: str | None
+    xpath: str | None
+    attributes: dict[str, str]
+    isVisible: bool
+    isInteractive: bool
+    isTopElement: bool
+    isEditable: bool
+    # visible and intersecting the viewport
+    isInViewport: bool
+    highlightIndex: int | None
+    shadowRoot: bool
+    children: list["DomTreeDict | None"]
+    bbox: dict[str, float] | None
+    # stable element id, only set for incremental snapshots
+    nid: NotRequired[int]
+
+
 # clean up aria attributes
 def cleanup_aria_attributes(attrs: dict[str, str]) -> dict[str, str]:
+    """Copy of `attrs` with the prefixes of the aria attributes removed (e.g `x-aria-label` -> `aria-label`)"""
+    # `attrs` is left untouched: the raw dicts are used to compute selectors and kept across incremental snapshots
+    attrs = dict(attrs)
     to_add: dict[str, str] = {}
     to_remove: list[str] = []
     pattern = "aria-"
@@ -34,6 +60,250 @@ def cleanup_aria_attributes(attrs: dict[str, str]) -> dict[str, str]:
     return attrs
 
 
+def element_role(tag_name: str, attributes: dict[str, str], has_children: bool) -> str:
+    """Accessibility role of an element"""
+    # transform to axt role
+    if attributes.get("role"):
+        return attributes["role"]
+    if tag_name is None or len(tag_name) == 0:  # type: ignore[arg-type]
+        if len(attributes) == 0 and not has_children:
+            return "none"
+        raise ValueError(f"No tag_name found for element with attributes: {attributes}")
+    clean_tag_name = tag_name.lower().replace("-", "").replace("_", "")
+    match tag_name.lower():
+        # Structural elements
+        case "body":
+            return "WebArea"
+        case "nav":
+            return "navigation"
+        case "main":
+            return "main"
+        case "header":
+            return "banner"
+        case "footer":
+            return "contentinfo"
+        case "aside":
+            return "complementary"
+        case "section" | "article":
+            return "article"
+        case "div":
+            return "group"
+
+        # Interactive elements
+        case "a":
+            return "link"
+        case "button":
+            return "button"
+        case "input":
+            input_type = attributes.get("type", "text").lower()
+            match input_type:
+                # TODO: could create a special type for submit/reset
+                case "button" | "submit" | "reset":
+                    return "button"
+                case "radio":
+                    return "radio"
+                case "checkbox":
+                    return "checkbox"
+                case "search":
+                    return "searchbox"
+                case _:
+                    return "textbox"
+        case "select":
+            return "combobox"
+        case "textarea":
+            return "textbox"
+        case "option":
+            return "option"
+
+        # Text elements
+        case "h1" | "h2" | "h3" | "h4" | "h5" | "h6":
+            return "heading"
+        case "p":
+            return "paragraph"
+        case "span" | "strong" | "em" | "small" | "bdi" | "i":
+            return "text"
+        case "label":
+            return "LabelText"
+        case "blockquote":
+            return "blockquote"
+        case "code" | "pre":
+            return "code"
+        case "time":
+            return "time"
+        case "br":
+            return "LineBreak"
+
+        # List elements
+        case "ul" | "ol" | "dl":
+            return "list"
+        case "li":
+            return "listitem"
+        case "dt" | "dd":
+            return "listitem"
+
+        # Table elements
+        case "table":
+            return "table"
+        case "tr":
+            return "row"
+        case "td":
+            return "cell"
+        case "th":
+            return "columnheader"
+        case "thead" | "tbody" | "tfoot":
+            return "rowgroup"
+
+        # Media elements
+        case "img":
+            return "img"
+        case "figure":
+            return "figure"
+        case "iframe":
+            return "Iframe"
+
+        # Form elements
+        case "form":
+            return "form"
+        case "fieldset":
+            return "group"
+        case "dialog":
+            return "dialog"
+        case "progress":
+            return "progressbar"
+        case "meter":
+            return "meter"
+
+        # Menu elements
+        case "menu":
+            return "menu"
+        case "menuitem":
+            return "menuitem"
+
+        # Default case
+        case "hr":
+            return "separator"
+        case _:
+            roles_to_check = ["menuitemcheckbox", "menuitemradio", "menuitem", "menu", "dialog"]
+            for role in roles_to_check:
+                if role in clean_tag_name:
+                    return role
+            if "popup" in clean_tag_name:
+                return "MenuListPopup"
+
+            if VERBOSE:
+                logger.debug(f"No role found for tag: {tag_name} with attributes: {attributes}")
+            return "generic"
+
+
+def element_name(tag_name: str, attributes: dict[str, str], text_content: Callable[[], str]) -> str:
+    """Accessible name of an element, `text_content` is only called for elements named by their text"""
+    if len(attributes) == 0:
+        return ""
+    # Check explicit ARIA labeling
+    if "aria-label" in attributes:
+        if len(attributes["aria-label"]) > 0:
+            return attributes["aria-label"]
+
+    # Check for standard labeling attributes
+    for attr in ["name", "title", "alt", "placeholder", "value"]:
+        if attr in attributes:
+            value = attributes.get(attr)
+            if value and value.strip():
+                return value.strip()
+
+    # Check for button/input value
+    if tag_name.lower() in ["button", "input"]:
+        if "value" in attributes:
+            value = attributes.get("value")
+            if value and len(value.strip()) > 0:
+                return value.strip()
+
+    # Check aria-labelledby if present
+    # if "aria-labelledby" in attributes:
+    #     # Note: This would require access to other elements
+    #     # TODO: Implement aria-labelledby resolution
+    #     pass
+
+    # Check for text content for certain elements
+    if tag_name.lower() in ["button", "a", "label"]:
+        content = text_content().strip()
+        if len(content) > 0:
+            return content
+
+    if tag_name.lower() in ["img", "a"]:
+        if "src" in attributes:
+            return attributes["src"]
+        if "href" in attributes:
+            return attributes["href"]
+
+    if tag_name.lower() in ["body"]:
+        # Usually in accessibility mode, the WebArea name is the page title
+        # TODO: get the page title from the browser
+        return "body content"
+
+    if tag_name.lower() in [
+        "main",
+        "div",
+        "section",
+        "article",
+        "header",
+        "footer",
+        "aside",
+        "h1",
+        "h2",
+        "h3",
+        "h4",
+        "h5",
+        "h6",
+        "span",
+        "label",
+        "strong",
+        "em",
+        "small",
+        "bdi",
+        "li",
+        "ol",
+        "ul",
+        "dl",
+        "dt",
+        "dd",
+        "table",
+        "tr",
+        "td",
+        "th",
+        "thead",
+        "tbody",
+        "tfoot",
+        "img",
+        "figure",
+        "iframe",
+        "form",
+        "fieldset",
+        "dialog",
+        "progress",
+        "meter",
+        "menu",
+        "menuitem",
+        "hr",
+        "br",
+        "p",
+        "i",
+    ]:
+        # TODO: create a better name computation using text children and attributes
+        return ""
+
+    if tag_name.lower() in ["footer"]:
+        return tag_name
+
+    if tag_name.lower() in ["button"]:
+        return attributes.get("type") or ""
+
+    first_5_attrs = list(attributes.items())[:5]
+    if VERBOSE:
+        logger.debug(f"No name found for element: <{tag_name}> with attributes: {first_5_attrs}")
+    return ""
+
+
 @dataclass(frozen=False)
 class DOMBaseNode:
     parent: "DOMElementNode | None"
@@ -134,6 +404,7 @@ class DOMElementNode(DOMBaseNode):
     is_top_element: bool = False
     shadow_root: bool = False
     is_editable: bool = False
+    is_in_viewport: bool = False
 
     @override
     def __post_init__(self) -> None:
@@ -170,246 +441,12 @@ class DOMElementNode(DOMBaseNode):
     @property
     @override
     def role(self) -> str:
-        # transform to axt role
-        if self.attributes.get("role"):
-            return self.attributes["role"]
-        if self.tag_name is None or len(self.tag_name) == 0:  # type: ignore[arg-type]
-            if len(self.attributes) == 0 and len(self.children) == 0:
-                return "none"
-            raise ValueError(f"No tag_name found for element: {self} with attributes: {self.attributes}")
-        clean_tag_name = self.tag_name.lower().replace("-", "").replace("_", "")
-        match self.tag_name.lower():
-            # Structural elements
-            case "body":
-                return "WebArea"
-            case "nav":
-                return "navigation"
-            case "main":
-                return "main"
-            case "header":
-                return "banner"
-            case "footer":
-                return "contentinfo"
-            case "aside":
-                return "complementary"
-            case "section" | "article":
-                return "article"
-            case "div":
-                return "group"
-
-            # Interactive elements
-            case "a":
-                return "link"
-            case "button":
-                return "button"
-            case "input":
-                input_type = self.attributes.get("type", "text").lower()
-                match input_type:
-                    # TODO: could create a special type for submit/reset
-                    case "button" | "submit" | "reset":
-                        return "button"
-                    case "radio":
-                        return "radio"
-                    case "checkbox":
-                        return "checkbox"
-                    case "search":
-                        return "searchbox"
-                    case _:
-                        return "textbox"
-            case "select":
-                return "combobox"
-            case "textarea":
-                return "textbox"
-            case "option":
-                return "option"
-
-            # Text elements
-            case "h1" | "h2" | "h3" | "h4" | "h5" | "h6":
-                return "heading"
-            case "p":
-                return "paragraph"
-            case "span" | "strong" | "em" | "small" | "bdi" | "i":
-                return "text"
-            case "label":
-                return "LabelText"
-            case "blockquote":
-                return "blockquote"
-            case "code" | "pre":
-                return "code"
-            case "time":
-                return "time"
-            case "br":
-                return "LineBreak"
-
-            # List elements
-            case "ul" | "ol" | "dl":
-                return "list"
-            case "li":
-                return "listitem"
-            case "dt" | "dd":
-                return "listitem"
-
-            # Table elements
-            case "table":
-                return "table"
-            case "tr":
-                return "row"
-            case "td":
-                return "cell"
-            case "th":
-                return "columnheader"
-            case "thead" | "tbody" | "tfoot":
-                return "rowgroup"
-
-            # Media elements
-            case "img":
-                return "img"
-            case "figure":
-                return "figure"
-            case "iframe":
-                return "Iframe"
-
-            # Form elements
-            case "form":
-                return "form"
-            case "fieldset":
-                return "group"
-            case "dialog":
-                return "dialog"
-            case "progress":
-                return "progressbar"
-            case "meter":
-                return "meter"
-
-            # Menu elements
-            case "menu":
-                return "menu"
-            case "menuitem":
-                return "menuitem"
-
-            # Default case
-            case "hr":
-                return "separator"
-            case _:
-                roles_to_check = ["menuitemcheckbox", "menuitemradio", "menuitem", "menu", "dialog"]
-                for role in roles_to_check:
-                    if role in clean_tag_name:
-                        return role
-                if "popup" in clean_tag_name:
-                    return "MenuListPopup"
-
-                if VERBOSE:
-                    logger.debug(f"No role found for tag: {self.tag_name} with attributes: {self.attributes}")
-                return "generic"
+        return element_role(self.tag_name, self.attributes, has_children=len(self.children) > 0)
 
     @property
     @override
     def name(self) -> str:
-        if len(self.attributes) == 0:
-            return ""
-        # Check explicit ARIA labeling
-        if "aria-label" in self.attributes:
-            if len(self.attributes["aria-label"]) > 0:
-                return self.attributes["aria-label"]
-
-        # Check for standard labeling attributes
-        for attr in ["name", "title", "alt", "placeholder", "value"]:
-            if attr in self.attributes:
-                value = self.attributes.get(attr)
-                if value and value.strip():
-                    return value.strip()
-
-        # Check for button/input value
-        if self.tag_name.lower() in ["button", "input"]:
-            if "value" in self.attributes:
-                value = self.attributes.get("value")
-                if value and len(value.strip()) > 0:
-                    return value.strip()
-
-        # Check aria-labelledby if present
-        # if "aria-labelledby" in self.attributes:
-        #     # Note: This would require access to other elements
-        #     # TODO: Implement aria-labelledby resolution
-        #     pass
-
-        # Check for text content for certain elements
-        if self.tag_name.lower() in ["button", "a", "label"]:
-            text_content = self._get_text_content().strip()
-            if len(text_content) > 0:
-                return text_content
-
-        if self.tag_name.lower() in ["img", "a"]:
-            if "src" in self.attributes:
-                return self.attributes["src"]
-            if "href" in self.attributes:
-                return self.attributes["href"]
-
-        if self.tag_name.lower() in ["body"]:
-            # Usually in accessibility mode, the WebArea name is the page title
-            # TODO: get the page title from the browser
-            return "body content"
-
-        if self.tag_name.lower() in [
-            "main",
-            "div",
-            "section",
-            "article",
-            "header",
-            "footer",
-            "aside",
-            "h1",
-            "h2",
-            "h3",
-            "h4",
-            "h5",
-            "h6",
-            "span",
-            "label",
-            "strong",
-            "em",
-            "small",
-            "bdi",
-            "li",
-            "ol",
-            "ul",
-            "dl",
-            "dt",
-            "dd",
-            "table",
-            "tr",
-            "td",
-            "th",
-            "thead",
-            "tbody",
-            "tfoot",
-            "img",
-            "figure",
-            "iframe",
-            "form",
-            "fieldset",
-            "dialog",
-            "progress",
-            "meter",
-            "menu",
-            "menuitem",
-            "hr",
-            "br",
-            "p",
-            "i",
-        ]:
-            # TODO: create a better name computation using text children and attributes
-            return ""
-
-        if self.tag_name.lower() in ["footer"]:
-            return self.tag_name
-
-        if self.tag_name.lower() in ["button"]:
-            return self.attributes.get("type") or ""
-
-        first_5_attrs = list(self.attributes.items())[:5]
-        if VERBOSE:
-            logger.debug(f"No name found for element: {self} with attributes: {first_5_attrs}")
-        return ""
+        return element_name(self.tag_name, self.attributes, self._get_text_content)
 
     def _get_text_content(self) -> str:
         """Recursively get text content from child text nodes."""
@@ -449,7 +486,7 @@ class DOMElementNode(DOMBaseNode):
                 **self.attributes,
             ),
             computed_attributes=ComputedDomAttributes(
-                in_viewport=self.is_visible,
+                in_viewport=self.is_in_viewport,
                 is_interactive=self.is_interactive,
                 is_top_element=self.is_top_element,
                 is_editable=self.is_editable,
@@ -0,0 +1,76 @@
+from typing import ClassVar
+from urllib.parse import urlsplit
+from weakref import WeakKeyDictionary
+
+from loguru import logger
+from notte_core.browser.snapshot import NetworkData
+from notte_core.common.config import config
+from notte_sdk.types import ResourceBlockingProfile
+from patchright.async_api import BrowserContext, Route
+
+
+def domain_matches(host: str, domains: frozenset[str]) -> bool:
+    """Whether `host` is one of `domains` or one of their subdomains"""
+    parts = host.split(".")
+    return any(".".join(parts[i:]) in domains for i in range(len(parts)))
+
+
+class ResourceBlocker:
+    """
+    Aborts the requests matched by a `ResourceBlockingProfile` for every page of a browser context.
+
+    /!\\ Playwright disables the HTTP cache of contexts with request routing: only install a blocker
+    if the profile blocks something.
+    """
+
+    blockers: ClassVar[WeakKeyDictionary[BrowserContext, "ResourceBlocker"]] = WeakKeyDictionary()
+
+    def __init__(self, profile: ResourceBlockingProfile) -> None:
+        self.profile: ResourceBlockingProfile = profile
+        self.resource_types: frozenset[str] = frozenset(profile.resource_types)
+        self.domains: frozenset[str] = frozenset(domain.lower() for domain in profile.domains)
+        self.allowed_domains: frozenset[str] = frozenset(domain.lower() for domain in profile.allowed_domains)
+        # set by agents that never send screenshots to the LLM
+        self.use_vision: bool = True
+        self.stats: NetworkData = NetworkData()
+
+    @staticmethod
+    async def install(context: BrowserContext, profile: ResourceBlockingProfile | None) -> "ResourceBlocker | None":
+        if profile is None or (
+            len(profile.resource_types) == 0 and len(profile.domains) == 0 and not profile.images_without_vision
+        ):
+            return None
+        blocker = ResourceBlocker(profile)
+        await context.route("**/*", blocker.handle)
+        ResourceBlocker.blockers[context] = blocker
+        return blocker
+
+    @staticmethod
+    def of(context: BrowserContext) -> "ResourceBlocker | None":
+        return ResourceBlocker.blockers.get(context)
+
+    def should_block(self, resource_type: str, url: str) -> bool:
+        host = (urlsplit(url).hostname or "").lower()
+        if len(self.allowed_domains) > 0 and domain_matches(host, self.allowed_domains):
+            return False
+        if resource_type in self.resource_types:
+            return True
+        if resource_type == "image" and self.profile.images_without_vision and not self.use_vision:
+            return True
+        return len(self.domains) > 0 and domain_matches(host, self.domains)
+
+    async def handle(self, route: Route) -> None:
+        request = route.request
+        # never block page navigations (iframes documents can be blocked)
+        is_page_navigation = request.is_navigation_request() and request.frame.parent_frame is None
+        if not is_page_navigation and self.should_block(request.resource_type, request.url):
+            self.stats.nb_blocked_requests += 1
+            self.stats.blocked_resource_types[request.resource_type] = (
+                self.stats.blocked_resource_types.get(request.resource_type, 0) + 1
+            )
+            if config.verbose:
+                logger.trace(f"🚫 Blocked {request.resource_type} request to {request.url}")
+            await route.abort("blockedbyclient")
+            return
+        self.stats.nb_allowed_requests += 1
+        await route.fallback()
@@ -15,10 +15,13 @@ from patchright.async_api import (
     Playwright,
     async_playwright,
 )
-from pydantic import PrivateAttr
+from pydantic import Field, PrivateAttr
 from typing_extensions import override
 
+from notte_browser.cache import SharedHttpCache
+from notte_browser.dom.parsing import ParseDomTreePipe
 from notte_browser.errors import BrowserNotStartedError, CdpConnectionError, FirefoxNotAvailableError
+from notte_browser.network import ResourceBlocker
 from notte_browser.window import BrowserResource, BrowserWindow, BrowserWindowOptions
 
 
@@ -35,6 +38,8 @@ class PlaywrightManager(BaseModel, BaseWindowManager):
     BROWSER_CREATION_TIMEOUT_SECONDS: ClassVar[int] = 30
     BROWSER_OPERATION_TIMEOUT_SECONDS: ClassVar[int] = 30
     verbose: bool = False
+    # shared across the contexts created by the manager (opt-in with `http_cache_dir`)
+    http_cache: SharedHttpCache | None = Field(default_factory=SharedHttpCache.from_config, exclude=True)
     _playwright: Playwright | None = PrivateAttr(default=None)
 
     @override
@@ -115,42 +120,53 @@ class PlaywrightManager(BaseModel, BaseWindowManager):
                 raise FirefoxNotAvailableError()
         return browser
 
-    async def get_browser_resource(self, options: BrowserWindowOptions, browser: PlaywrightBrowser) -> BrowserResource:
-        async with asyncio.timeout(self.BROWSER_OPERATION_TIMEOUT_SECONDS):
-            viewport = None
-            if options.viewport_width is not None or options.viewport_height is not None:
-                viewport = {
-                    "width": options.viewport_width,
-                    "height": options.viewport_height,
-                }
-            else:
-                logger.warning(
-                    f"🪟 No viewport set in {'headless' if options.headless else 'headful'} mode, using default viewport in playwright"
-                )
-
-            context: BrowserContext = await browser.new_context(
-                # no viewport should be False for headless browsers
-                no_viewport=not options.headless,
-                viewport=viewport,  # pyright: ignore[reportArgumentType]
-                permissions=[
-                    # Needed for clipboard copy/paste to respect tabs / new lines for chromium browsers
-                    "clipboard-read",
-                    "clipboard-write",
-                ]
-                if options.browser_type in [BrowserType.CHROMIUM, BrowserType.CHROME]
-                else [],
-                proxy=options.proxy,
-                user_agent=options.user_agent,
+    async def create_browser_context(self, options: BrowserWindowOptions, browser: PlaywrightBrowser) -> BrowserContext:
+        viewport = None
+        if options.viewport_width is not None or options.viewport_height is not None:
+            viewport = {
+                "width": options.viewport_width,
+                "height": options.viewport_height,
+            }
+        else:
+            logger.warning(
+                f"🪟 No viewport set in {'headless' if options.headless else 'headful'} mode, using default viewport in playwright"
             )
 
-            if len(context.pages) == 0:
-                page = await context.new_page()
-            else:
-                page = context.pages[-1]
-            return BrowserResource(
-                page=page,
-                options=options,
-            )
+        context = await browser.new_context(
+            # no viewport should be False for headless browsers
+            no_viewport=not options.headless,
+            viewport=viewport,  # pyright: ignore[reportArgumentType]
+            permissions=[
+                # Needed for clipboard copy/paste to respect tabs / new lines for chromium browsers
+                "clipboard-read",
+                "clipboard-write",
+            ]
+            if options.browser_type in [BrowserType.CHROMIUM, BrowserType.CHROME]
+            else [],
+            proxy=options.proxy,
+            user_agent=options.user_agent,
+        )
+        await ParseDomTreePipe.install(context)
+        # routes registered last are matched first: blocked requests never reach the cache
+        if self.http_cache is not None:
+            await self.http_cache.install(context)
+        _ = await ResourceBlocker.install(context, options.resource_blocking)
+        return context
+
+    async def get_context_resource(self, options: BrowserWindowOptions, context: BrowserContext) -> BrowserResource:
+        if len(context.pages) == 0:
+            page = await context.new_page()
+        else:
+            page = context.pages[-1]
+        return BrowserResource(
+            page=page,
+            options=options,
+        )
+
+    async def get_browser_resource(self, options: BrowserWindowOptions, browser: PlaywrightBrowser) -> BrowserResource:
+        async with asyncio.timeout(self.BROWSER_OPERATION_TIMEOUT_SECONDS):
+            context = await self.create_browser_context(options, browser)
+            return await self.get_context_resource(options, context)
 
     @override
     async def new_window(self, options: BrowserWindowOptions | None = None) -> BrowserWindow:
@@ -0,0 +1,410 @@
+import asyncio
+import json
+from dataclasses import dataclass, field
+
+from loguru import logger
+from notte_sdk.types import SessionStartRequest
+from patchright.async_api import Browser as PlaywrightBrowser
+from patchright.async_api import BrowserContext
+from pydantic import BaseModel, PrivateAttr
+from typing_extensions import override
+
+from notte_browser.playwright import PlaywrightManager
+from notte_browser.window import BrowserWindow, BrowserWindowOptions
+
+
+class BrowserPoolMetrics(BaseModel):
+    # window requests served by an idle pooled browser
+    hits: int = 0
+    # window requests that had to launch a new browser
+    misses: int = 0
+    # window requests served by a pre-created browser context
+    context_hits: int = 0
+    launched: int = 0
+    # browsers closed after reaching `max_reuse`
+    retired: int = 0
+    # browsers closed because they failed the health check
+    unhealthy: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        if total == 0:
+            return 0.0
+        return self.hits / total
+
+
+async def new_remote_window(manager: PlaywrightManager, options: BrowserWindowOptions) -> BrowserWindow:
+    """Open a window on a CDP browser. Unlike `PlaywrightManager.new_window`, closing it keeps the driver alive."""
+    browser = await manager.connect_cdp_browser(options)
+    resource = await manager.get_browser_resource(options, browser)
+
+    async def on_close() -> None:
+        try:
+            async with asyncio.timeout(manager.BROWSER_OPERATION_TIMEOUT_SECONDS):
+                await browser.close()
+        except Exception as e:
+            logger.error(f"Failed to close window: {e}")
+
+    return BrowserWindow(resource=resource, on_close=on_close)
+
+
+@dataclass
+class PooledBrowser:
+    browser: PlaywrightBrowser
+    key: str
+    options: BrowserWindowOptions
+    nb_uses: int = 0
+    warm_contexts: list[tuple[str, BrowserContext]] = field(default_factory=list)
+
+
+class PooledPlaywrightManager(PlaywrightManager):
+    """
+    Window manager that keeps browsers warm across windows.
+
+    Every window gets a fresh `BrowserContext` (i.e. no cookies / storage leak between sessions) but the
+    underlying browser process and playwright driver are reused. Browsers are keyed by their launch options
+    so that sessions with different proxies / browser types never share a process.
+
+    The same manager instance should be shared by all sessions:
+
+    ```python
+    async with PooledPlaywrightManager(pool_size=4) as manager:
+        async with NotteSession(window_manager=manager) as session:
+            ...
+    ```
+    """
+
+    # number of idle browsers kept warm per launch configuration
+    pool_size: int = 2
+    # number of windows a browser can serve before being replaced by a fresh one
+    max_reuse: int = 50
+    # number of browser contexts created in advance for each idle browser
+    prewarm_contexts: int = 0
+    # check that idle browsers are still connected before handing them out
+    health_check: bool = True
+
+    _pool: dict[str, list[PooledBrowser]] = PrivateAttr(default_factory=dict)
+    _metrics: BrowserPoolMetrics = PrivateAttr(default_factory=BrowserPoolMetrics)
+
+    @property
+    def metrics(self) -> BrowserPoolMetrics:
+        return self._metrics
+
+    @staticmethod
+    def browser_key(options: BrowserWindowOptions) -> str:
+        return json.dumps(
+            [options.browser_type, options.headless, options.proxy, options.chrome_args, options.web_security],
+            sort_keys=True,
+        )
+
+    @staticmethod
+    def context_key(options: BrowserWindowOptions) -> str:
+        return json.dumps(
+            [
+                options.viewport_width,
+                options.viewport_height,
+                options.headless,
+                options.proxy,
+                options.user_agent,
+                # routes are installed when the context is created
+                options.resource_blocking.model_dump() if options.resource_blocking is not None else None,
+            ],
+            sort_keys=True,
+        )
+
+    def nb_idle(self, options: BrowserWindowOptions | None = None) -> int:
+        if options is None:
+            return sum(len(idle) for idle in self._pool.values())
+        return len(self._pool.get(self.browser_key(options), []))
+
+    @override
+    async def astop(self) -> None:
+        pools = list(self._pool.values())
+        self._pool = {}
+        for idle in pools:
+            for pooled in idle:
+                await self._close_browser(pooled)
+        await super().astop()
+
+    async def warmup(self, options: BrowserWindowOptions | None = None) -> None:
+        """Launch browsers (in parallel) until `pool_size` idle browsers are available for `options`"""
+        if not self.is_started():
+            await self.astart()
+        options = options or BrowserWindowOptions.from_request(SessionStartRequest())
+        key = self.browser_key(options)
+        nb_missing = self.pool_size - self.nb_idle(options)
+        if nb_missing <= 0:
+            return
+        launched = await asyncio.gather(*[self._launch(options, key) for _ in range(nb_missing)])
+        for pooled in launched:
+            await self._prewarm(pooled)
+        self._pool.setdefault(key, []).extend(launched)
+
+    def _is_healthy(self, pooled: PooledBrowser) -> bool:
+        if not self.health_check:
+            return True
+        return pooled.browser.is_connected()
+
+    async def _launch(self, options: BrowserWindowOptions, key: str) -> PooledBrowser:
+        browser = await self.create_playwright_browser(options)
+        self._metrics.launched += 1
+        return PooledBrowser(browser=browser, key=key, options=options)
+
+    async def _prewarm(self, pooled: PooledBrowser) -> None:
+        key = self.context_key(pooled.options)
+        while len(pooled.warm_contexts) < self.prewarm_contexts:
+            context = await self.create_browser_context(pooled.options, pooled.browser)
+            pooled.warm_contexts.append((key, context))
+
+    async def _close_browser(self, pooled: PooledBrowser) -> None:
+        try:
+            async with asyncio.timeout(self.BROWSER_OPERATION_TIMEOUT_SECONDS):
+                await pooled.browser.close()
+        except Exception as e:
+            logger.error(f"Failed to close pooled browser: {e}")
+
+    async def acquire(self, options: BrowserWindowOptions) -> PooledBrowser:
+        key = self.browser_key(options)
+        idle = self._pool.setdefault(key, [])
+        while len(idle) > 0:
+            pooled = idle.pop()
+            if self._is_healthy(pooled):
+                self._metrics.hits += 1
+                return pooled
+            self._metrics.unhealthy += 1
+            await self._close_browser(pooled)
+        self._metrics.misses += 1
+        return await self._launch(options, key)
+
+    async def release(self, pooled: PooledBrowser, context: BrowserContext) -> None:
+        try:
+            async with asyncio.timeout(self.BROWSER_OPERATION_TIMEOUT_SECONDS):
+                await context.close()
+        except Exception as e:
+            logger.error(f"Failed to close pooled browser context: {e}")
+        pooled.nb_uses += 1
+        idle = self._pool.setdefault(pooled.key, [])
+        if pooled.nb_uses >= self.max_reuse:
+            self._metrics.retired += 1
+            await self._close_browser(pooled)
+        elif not self._is_healthy(pooled):
+            self._metrics.unhealthy += 1
+            await self._close_browser(pooled)
+        elif len(idle) >= self.pool_size:
+            await self._close_browser(pooled)
+        else:
+            await self._prewarm(pooled)
+            idle.append(pooled)
+        if self.verbose:
+            logger.info(f"🪟 [Browser Pool] released browser: {self._metrics}")
+
+    async def take_context(self, pooled: PooledBrowser, options: BrowserWindowOptions) -> BrowserContext:
+        key = self.context_key(options)
+        for i, (context_key, context) in enumerate(pooled.warm_contexts):
+            if context_key == key:
+                del pooled.warm_contexts[i]
+                self._metrics.context_hits += 1
+                return context
+        return await self.create_browser_context(options, pooled.browser)
+
+    @override
+    async def new_window(self, options: BrowserWindowOptions | None = None) -> BrowserWindow:
+        if not self.is_started():
+            await self.astart()
+        options = options or BrowserWindowOptions.from_request(SessionStartRequest())
+        if options.cdp_url is not None:
+            # remote browsers are owned by the CDP provider: they can't be pooled
+            return await new_remote_window(self, options)
+
+        pooled = await self.acquire(options)
+        try:
+            async with asyncio.timeout(self.BROWSER_OPERATION_TIMEOUT_SECONDS):
+                context = await self.take_context(pooled, options)
+                resource = await self.get_context_resource(options, context)
+        except Exception:
+            await self._close_browser(pooled)
+            raise
+
+        async def on_close() -> None:
+            await self.release(pooled, context)
+
+        return BrowserWindow(
+            resource=resource,
+            on_close=on_close,
+        )
+
+
+@dataclass
+class SharedBrowser:
+    key: str
+    # resolved once the browser process is launched: the slot is reserved (and leased) before
+    launch: asyncio.Future[PlaywrightBrowser]
+    # number of windows currently hosted by this browser (including the ones waiting for its launch)
+    nb_leases: int = 0
+
+    @property
+    def browser(self) -> PlaywrightBrowser:
+        return self.launch.result()
+
+    def is_alive(self) -> bool:
+        if not self.launch.done():
+            return True
+        return not self.launch.cancelled() and self.launch.exception() is None and self.browser.is_connected()
+
+
+class SharedPlaywrightManager(PlaywrightManager):
+    """
+    Window manager that hosts many windows in a small set of browser processes.
+
+    All sessions share the same playwright driver. Each window lives in its own `BrowserContext` (isolated
+    cookies / storage, per-context proxy & user-agent) and browsers are reference counted: closing a window
+    only closes its context, the browser is kept alive as long as other windows still use it.
+
+    ```python
+    async with SharedPlaywrightManager(contexts_per_browser=32, max_browsers=8) as manager:
+        sessions = [NotteSession(window_manager=manager) for _ in range(100)]
+    ```
+    """
+
+    # number of windows hosted by a browser before a new browser process is launched
+    contexts_per_browser: int = 32
+    # maximum number of browser processes per launch configuration. Once reached, the least loaded
+    # browser is oversubscribed instead of launching a new process
+    max_browsers: int = 8
+
+    _browsers: dict[str, list[SharedBrowser]] = PrivateAttr(default_factory=dict)
+    _lock: asyncio.Lock = PrivateAttr(default_factory=asyncio.Lock)
+
+    @staticmethod
+    def browser_key(options: BrowserWindowOptions) -> str:
+        # proxy & user-agent are set per context: they don't need a dedicated browser process
+        return json.dumps(
+            [options.browser_type, options.headless, options.chrome_args, options.web_security],
+            sort_keys=True,
+        )
+
+    def nb_browsers(self) -> int:
+        return sum(len(browsers) for browsers in self._browsers.values())
+
+    def nb_windows(self) -> int:
+        return sum(shared.nb_leases for browsers in self._browsers.values() for shared in browsers)
+
+    @override
+    async def astop(self) -> None:
+        browsers = [shared for group in self._browsers.values() for shared in group]
+        self._browsers = {}
+        for shared in browsers:
+            await self._close_browser(shared)
+        await super().astop()
+
+    async def _close_browser(self, shared: SharedBrowser) -> None:
+        if not shared.launch.done() or shared.launch.cancelled() or shared.launch.exception() is not None:
+            # browsers still launching are closed by their launcher (see `acquire`)
+            return
+        try:
+            async with asyncio.timeout(self.BROWSER_OPERATION_TIMEOUT_SECONDS):
+                await shared.browser.close()
+        except Exception as e:
+            logger.error(f"Failed to close shared browser: {e}")
+
+    async def acquire(self, options: BrowserWindowOptions) -> SharedBrowser:
+        """Lease the least loaded browser for `options`, launching a new one if all browsers are full"""
+        key = self.browser_key(options)
+        # the lock only guards the bookkeeping: browsers are launched outside of it so that windows of
+        # the other browsers are not blocked by a launch (slots are reserved before)
+        async with self._lock:
+            browsers = self._browsers.setdefault(key, [])
+            for shared in [shared for shared in browsers if not shared.is_alive()]:
+                # disconnected browsers (i.e. crashed) took their contexts with them
+                browsers.remove(shared)
+            shared = min(browsers, key=lambda shared: shared.nb_leases, default=None)
+            launch = shared is None or (
+                shared.nb_leases >= self.contexts_per_browser and len(browsers) < self.max_browsers
+            )
+            if shared is None or launch:
+                shared = SharedBrowser(key=key, launch=asyncio.get_running_loop().create_future())
+                browsers.append(shared)
+            shared.nb_leases += 1
+        if not launch:
+            try:
+                # shielded: a cancelled window must not cancel the launch shared with the other windows
+                _ = await asyncio.shield(shared.launch)
+            except BaseException:
+                await self.release_lease(shared)
+                raise
+            return shared
+        try:
+            # launch without proxy: proxies are applied per context
+            browser = await self.create_playwright_browser(options.model_copy(update={"proxy": None}))
+        except BaseException as e:
+            # the windows waiting for this browser fail as well
+            if isinstance(e, Exception):
+                shared.launch.set_exception(e)
+                _ = shared.launch.exception()
+            else:
+                _ = shared.launch.cancel()
+            await self.release_lease(shared)
+            raise
+        shared.launch.set_result(browser)
+        if shared not in self._browsers.get(key, []):
+            # the manager was stopped during the launch
+            await self._close_browser(shared)
+        elif self.verbose:
+            logger.info(f"🪟 [Shared Browsers] launched browser #{len(self._browsers.get(key, []))} for {key}")
+        return shared
+
+    async def release_lease(self, shared: SharedBrowser) -> None:
+        """Give back the lease of a window that failed to start"""
+        async with self._lock:
+            shared.nb_leases -= 1
+            browsers = self._browsers.get(shared.key, [])
+            if not shared.is_alive() and shared in browsers:
+                browsers.remove(shared)
+
+    async def release(self, shared: SharedBrowser, context: BrowserContext) -> None:
+        try:
+            async with asyncio.timeout(self.BROWSER_OPERATION_TIMEOUT_SECONDS):
+                await context.close()
+        except Exception as e:
+            logger.error(f"Failed to close shared browser context: {e}")
+        async with self._lock:
+            shared.nb_leases -= 1
+            browsers = self._browsers.get(shared.key, [])
+            if shared.nb_leases > 0 or shared not in browsers:
+                return
+            # keep a single idle browser per configuration warm
+            retired = len(browsers) > 1 or not shared.browser.is_connected()
+            if retired:
+                browsers.remove(shared)
+        # closed outside of the lock: no lease can be given on a removed browser
+        if retired:
+            await self._close_browser(shared)
+        if self.verbose:
+            logger.info(f"🪟 [Shared Browsers] {self.nb_windows()} windows in {self.nb_browsers()} browsers")
+
+    @override
+    async def new_window(self, options: BrowserWindowOptions | None = None) -> BrowserWindow:
+        if not self.is_started():
+            await self.astart()
+        options = options or BrowserWindowOptions.from_request(SessionStartRequest())
+        if options.cdp_url is not None:
+            # remote browsers are owned by the CDP provider: they can't be shared
+            return await new_remote_window(self, options)
+
+        shared = await self.acquire(options)
+        try:
+            async with asyncio.timeout(self.BROWSER_OPERATION_TIMEOUT_SECONDS):
+                context = await self.create_browser_context(options, shared.browser)
+                resource = await self.get_context_resource(options, context)
+        except Exception:
+            await self.release_lease(shared)
+            raise
+
+        async def on_close() -> None:
+            await self.release(shared, context)
+
+        return BrowserWindow(
+            resource=resource,
+            on_close=on_close,
+        )
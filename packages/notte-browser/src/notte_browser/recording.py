@@ -0,0 +1,181 @@
+import base64
+import shutil
+import tempfile
+import time
+import weakref
+from collections import OrderedDict
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+from loguru import logger
+from notte_core.common.config import config
+from patchright.async_api import CDPSession, Page
+
+
+class FrameRing:
+    """
+    Bounded store of screencast frames, in memory or on disk (`directory`). Once `max_frames` is reached,
+    the oldest frames are dropped: frame references held by old trajectory steps then resolve to `None`.
+
+    Frames received less than `min_interval_s` after the previous one replace it (unless it was marked),
+    so that animations do not flush the ring.
+    """
+
+    def __init__(self, max_frames: int, directory: Path | None = None, min_interval_s: float = 0.25) -> None:
+        if max_frames <= 0:
+            raise ValueError(f"max_frames should be positive but got {max_frames}")
+        self.max_frames: int = max_frames
+        self.min_interval_s: float = min_interval_s
+        # frame id -> capture timestamp, oldest first
+        self.timestamps: OrderedDict[int, float] = OrderedDict()
+        self.marked: int | None = None
+        self.next_id: int = 0
+        self._data: dict[int, bytes] = {}
+        self.directory: Path | None = None
+        if directory is not None:
+            directory.mkdir(parents=True, exist_ok=True)
+            self.directory = Path(tempfile.mkdtemp(prefix="screencast-", dir=directory))
+            _ = weakref.finalize(self, shutil.rmtree, self.directory, True)
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    @property
+    def last_id(self) -> int | None:
+        return next(reversed(self.timestamps), None)
+
+    def _path(self, frame_id: int) -> Path:
+        assert self.directory is not None
+        return self.directory / f"{frame_id}.jpg"
+
+    def _write(self, frame_id: int, data: bytes) -> None:
+        if self.directory is None:
+            self._data[frame_id] = data
+        else:
+            _ = self._path(frame_id).write_bytes(data)
+
+    def _remove(self, frame_id: int) -> None:
+        del self.timestamps[frame_id]
+        if self.directory is None:
+            del self._data[frame_id]
+        else:
+            self._path(frame_id).unlink(missing_ok=True)
+
+    def put(self, data: bytes, timestamp: float | None = None) -> int:
+        timestamp = timestamp if timestamp is not None else time.time()
+        last_id = self.last_id
+        if (
+            last_id is not None
+            and last_id != self.marked
+            and timestamp - self.timestamps[last_id] < self.min_interval_s
+        ):
+            # keep the first timestamp: continuous animations are still sampled every `min_interval_s`
+            self._write(last_id, data)
+            return last_id
+        frame_id = self.next_id
+        self.next_id += 1
+        self._write(frame_id, data)
+        self.timestamps[frame_id] = timestamp
+        while len(self.timestamps) > self.max_frames:
+            self._remove(next(iter(self.timestamps)))
+        return frame_id
+
+    def mark(self) -> int | None:
+        """Reference to the latest frame, which is never overwritten afterwards"""
+        self.marked = self.last_id
+        return self.marked
+
+    def get(self, frame_id: int) -> bytes | None:
+        if frame_id not in self.timestamps:
+            return None
+        if self.directory is None:
+            return self._data[frame_id]
+        try:
+            return self._path(frame_id).read_bytes()
+        except OSError:
+            return None
+
+    def frames(self) -> list[bytes]:
+        return [data for data in (self.get(frame_id) for frame_id in list(self.timestamps)) if data is not None]
+
+
+class ScreencastRecorder:
+    """
+    Streams the page rendering as jpeg frames (CDP `Page.startScreencast`) into a `FrameRing`.
+
+    Only one page is recorded at a time: `attach` moves the recording to the current tab.
+    """
+
+    def __init__(self, ring: FrameRing, quality: int = 60) -> None:
+        self.ring: FrameRing = ring
+        self.quality: int = quality
+        self.page: Page | None = None
+        self._cdp_session: CDPSession | None = None
+        # first frame id of the current page
+        self._first_frame_id: int = 0
+
+    @staticmethod
+    def from_config() -> "ScreencastRecorder | None":
+        """Recorder of the `screencast` recording mode, `None` for the default `screenshots` mode"""
+        if config.recording_mode != "screencast":
+            return None
+        directory = Path(config.recording_dir).expanduser() if config.recording_dir is not None else None
+        return ScreencastRecorder(
+            ring=FrameRing(max_frames=config.recording_max_frames, directory=directory),
+            quality=config.recording_quality,
+        )
+
+    async def attach(self, page: Page) -> None:
+        if page is self.page and self._cdp_session is not None:
+            return
+        await self.detach()
+        # frames of the previous page must neither be overwritten nor returned by `mark`
+        _ = self.ring.mark()
+        self._first_frame_id = self.ring.next_id
+        cdp_session = await page.context.new_cdp_session(page)
+
+        async def on_frame(params: dict[str, Any]) -> None:
+            metadata: dict[str, Any] = params.get("metadata", {})
+            _ = self.ring.put(base64.b64decode(params["data"]), metadata.get("timestamp"))
+            try:
+                # the browser stops sending frames until the previous one is acknowledged
+                _: Any = await cdp_session.send("Page.screencastFrameAck", {"sessionId": params["sessionId"]})  # pyright: ignore[reportUnknownMemberType, reportUnknownVariableType]
+            except Exception as e:
+                logger.debug(f"Failed to acknowledge screencast frame: {e}")
+
+        cdp_session.on("Page.screencastFrame", on_frame)
+        _: Any = await cdp_session.send("Page.startScreencast", {"format": "jpeg", "quality": self.quality})  # pyright: ignore[reportUnknownMemberType, reportUnknownVariableType]
+        self.page, self._cdp_session = page, cdp_session
+
+    async def detach(self) -> None:
+        if self._cdp_session is None:
+            return
+        cdp_session, self._cdp_session, self.page = self._cdp_session, None, None
+        try:
+            _: Any = await cdp_session.send("Page.stopScreencast")  # pyright: ignore[reportUnknownMemberType, reportUnknownVariableType]
+            await cdp_session.detach()
+        except Exception as e:
+            # the page was most likely closed already
+            logger.debug(f"Failed to stop screencast: {e}")
+
+    async def mark(self, fallback: Page | None = None) -> int | None:
+        """
+        Reference to the frame currently displayed by the page. If no frame was streamed yet (e.g. a page that
+        did not repaint since the recording started), a screenshot of `fallback` is stored instead.
+        """
+        frame_id = self.ring.mark()
+        if frame_id is not None and frame_id < self._first_frame_id:
+            frame_id = None
+        if frame_id is None and fallback is not None:
+            _ = self.ring.put(await fallback.screenshot(type="jpeg", quality=self.quality))
+            frame_id = self.ring.mark()
+        return frame_id
+
+    def loader(self, frame_id: int | None) -> Callable[[], bytes]:
+        def load() -> bytes:
+            if frame_id is None:
+                return b""
+            return self.ring.get(frame_id) or b""
+
+        return load
@@ -0,0 +1,182 @@
+import heapq
+from dataclasses import dataclass, field
+from typing import ClassVar
+
+from loguru import logger
+from notte_core.browser.dom_tree import DomNode
+
+from notte_browser.rendering.markdown import MarkdownDomNodeRenderingPipe
+
+
+@dataclass
+class BudgetedRendering:
+    document: str
+    # estimated number of tokens of `document`
+    nb_tokens: int
+    nb_nodes: int
+    nb_elided_nodes: int = 0
+    # ids of the elided interaction nodes
+    elided_ids: list[str] = field(default_factory=list)
+
+    @property
+    def clipped(self) -> bool:
+        return self.nb_elided_nodes > 0
+
+
+@dataclass
+class _Unit:
+    """Rendered line of the markdown document: a node header or the inner text of a subtree without ids"""
+
+    node: DomNode
+    parent: int | None
+    indent_level: int
+    line: str
+    tokens: int
+    is_text: bool = False
+    children: list[int] = field(default_factory=list)
+    selected: bool = False
+
+
+class BudgetedMarkdownDomNodeRenderingPipe:
+    """
+    Markdown rendering (same format as `MarkdownDomNodeRenderingPipe`) limited to a token budget.
+
+    Instead of clipping the tail of the full document, nodes are selected by priority until the budget is spent:
+    nodes in the viewport first, then interaction nodes, then the remaining text closest (in document order) to
+    the selected nodes. Selecting a node also selects its ancestors so that the document structure is kept.
+    Token counts are estimated from the number of characters: the document is never tokenized.
+    """
+
+    # conservative: cl100k_base averages ~4 characters per token on web pages
+    chars_per_token: ClassVar[int] = 3
+
+    @staticmethod
+    def estimate_tokens(text: str) -> int:
+        return len(text) // BudgetedMarkdownDomNodeRenderingPipe.chars_per_token + 1
+
+    @staticmethod
+    def units(node: DomNode, include_ids: bool) -> list[_Unit]:
+        """Lines of the markdown document, in document order"""
+        estimate = BudgetedMarkdownDomNodeRenderingPipe.estimate_tokens
+        units: list[_Unit] = []
+
+        def visit(node: DomNode, parent: int | None, indent_level: int) -> None:
+            index = len(units)
+            header = MarkdownDomNodeRenderingPipe.header(node, indent_level, include_ids)
+            # nodes with children also pay for their closing bracket
+            tokens = estimate(header) + (1 if len(node.children) > 0 else 0)
+            units.append(_Unit(node=node, parent=parent, indent_level=indent_level, line=header, tokens=tokens))
+            if parent is not None:
+                units[parent].children.append(index)
+            for child in node.children:
+                if len(child.subtree_ids) > 0:
+                    visit(child, index, indent_level + 1)
+                    continue
+                inner_text = child.inner_text().strip()
+                if len(inner_text) > 0:
+                    line = f"{' ' * indent_level} inner_text: {inner_text}"
+                    units[index].children.append(len(units))
+                    units.append(
+                        _Unit(
+                            node=child,
+                            parent=index,
+                            indent_level=indent_level,
+                            line=line,
+                            tokens=estimate(line),
+                            is_text=True,
+                        )
+                    )
+
+        visit(node, None, 0)
+        return units
+
+    @staticmethod
+    def priorities(units: list[_Unit]) -> list[tuple[int, int, int]]:
+        """(tier, distance to the closest prioritized unit, position): lower is rendered first"""
+        tiers = [
+            0 if unit.node.computed_attributes.in_viewport else 1 if unit.node.id is not None else 2 for unit in units
+        ]
+        # distance (in document order) of every unit to the closest unit of the first two tiers
+        distances = [len(units)] * len(units)
+        last = None
+        for i, tier in enumerate(tiers):
+            if tier < 2:
+                last = i
+            if last is not None:
+                distances[i] = i - last
+        last = None
+        for i in reversed(range(len(units))):
+            if tiers[i] < 2:
+                last = i
+            if last is not None:
+                distances[i] = min(distances[i], last - i)
+        return [(tier, distance if tier == 2 else 0, i) for i, (tier, distance) in enumerate(zip(tiers, distances))]
+
+    @staticmethod
+    def select(units: list[_Unit], max_tokens: int) -> int:
+        """Selects units by priority within `max_tokens`, returns the number of tokens used"""
+        used = 0
+        queue = BudgetedMarkdownDomNodeRenderingPipe.priorities(units)
+        heapq.heapify(queue)
+        while queue and used < max_tokens:
+            _, _, i = heapq.heappop(queue)
+            if units[i].selected:
+                continue
+            # the unit and its ancestors that are not rendered yet
+            path: list[int] = []
+            current: int | None = i
+            while current is not None and not units[current].selected:
+                path.append(current)
+                current = units[current].parent
+            cost = sum(units[j].tokens for j in path)
+            if used + cost > max_tokens:
+                continue
+            for j in path:
+                units[j].selected = True
+            used += cost
+        return used
+
+    @staticmethod
+    def render(units: list[_Unit], buffer: list[str], i: int = 0) -> None:
+        unit = units[i]
+        if unit.is_text:
+            buffer.append(unit.line + "\n")
+            return
+        selected_children = [child for child in unit.children if units[child].selected]
+        if len(unit.node.children) == 0 or (len(unit.children) > 0 and len(selected_children) == 0):
+            # leaf or all the children were elided
+            buffer.append(unit.line + "\n")
+            return
+        buffer.append(unit.line + " {\n")
+        for child in selected_children:
+            BudgetedMarkdownDomNodeRenderingPipe.render(units, buffer, child)
+        buffer.append(" " * unit.indent_level + "}\n")
+
+    @staticmethod
+    def forward(
+        node: DomNode,
+        max_tokens: int,
+        include_ids: bool = True,
+        verbose: bool = False,
+    ) -> BudgetedRendering:
+        units = BudgetedMarkdownDomNodeRenderingPipe.units(node, include_ids)
+        nb_tokens = BudgetedMarkdownDomNodeRenderingPipe.select(units, max_tokens)
+        buffer: list[str] = []
+        if units[0].selected:
+            BudgetedMarkdownDomNodeRenderingPipe.render(units, buffer)
+        elided = [unit for unit in units if not unit.selected]
+        rendering = BudgetedRendering(
+            document="".join(buffer),
+            nb_tokens=nb_tokens,
+            nb_nodes=len(units),
+            nb_elided_nodes=len(elided),
+            elided_ids=[unit.node.id for unit in elided if unit.node.id is not None],
+        )
+        if verbose and rendering.clipped:
+            logger.trace(
+                (
+                    f"✂️ Markdown rendering exceeds {max_tokens} tokens: elided {rendering.nb_elided_nodes}/"
+                    f"{rendering.nb_nodes} nodes ({len(rendering.elided_ids)} interaction nodes)"
+                )
+            )
+        return rendering
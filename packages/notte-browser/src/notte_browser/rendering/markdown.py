@@ -25,16 +25,27 @@ class MarkdownDomNodeRenderingPipe:
         include_ids: bool = True,
         expand_non_interaction_subtree: bool = False,
     ) -> str:
+        buffer: list[str] = []
+        MarkdownDomNodeRenderingPipe.write(
+            node,
+            buffer,
+            indent_level=indent_level,
+            include_ids=include_ids,
+            expand_non_interaction_subtree=expand_non_interaction_subtree,
+        )
+        return "".join(buffer)
+
+    @staticmethod
+    def header(node: DomNode, indent_level: int = 0, include_ids: bool = True) -> str:
+        """Line of `node` without its children: role, id, text and attributes"""
         indent = " " * indent_level
 
         # Start with role and optional text
-        id_str = ""
+        header = f"{indent}{node.get_role_str()}"
         if node.id is not None and include_ids:
-            id_str = f" {node.id}"
-
-        result = f"{indent}{node.get_role_str()}{id_str}"
+            header += f" {node.id}"
         if len(node.text.strip()) > 0:
-            result += f' "{node.text}"'
+            header += f' "{node.text}"'
 
         # iterate dom attributes
         if node.attributes is not None:
@@ -47,25 +58,37 @@ class MarkdownDomNodeRenderingPipe:
             if dom_attrs:
                 # TODO: prompt engineering to select the most readable format
                 # for the LLM to understand this information
-                result += " " + " ".join(dom_attrs)
+                header += " " + " ".join(dom_attrs)
+        return header
+
+    @staticmethod
+    def write(
+        node: DomNode,
+        buffer: list[str],
+        indent_level: int = 0,
+        include_ids: bool = True,
+        expand_non_interaction_subtree: bool = False,
+    ) -> None:
+        """Appends the rendering of `node` to `buffer` (joined once by the caller)"""
+        indent = " " * indent_level
+        buffer.append(MarkdownDomNodeRenderingPipe.header(node, indent_level, include_ids))
 
         # Recursively format children
         if len(node.children) > 0:
-            result += " {\n"
+            buffer.append(" {\n")
             for child in node.children:
                 if len(child.subtree_ids) == 0 and not expand_non_interaction_subtree:
                     inner_text = child.inner_text().strip()
                     if len(inner_text) > 0:
-                        result += f"{indent} inner_text: {inner_text}\n"
+                        buffer.append(f"{indent} inner_text: {inner_text}\n")
                 else:
-                    result += MarkdownDomNodeRenderingPipe.format(
+                    MarkdownDomNodeRenderingPipe.write(
                         child,
+                        buffer,
                         indent_level + 1,
                         include_ids=include_ids,
                         expand_non_interaction_subtree=expand_non_interaction_subtree,
                     )
-            result += indent + "}\n"
+            buffer.append(indent + "}\n")
         else:
-            result += "\n"
-
-        return result
+            buffer.append("\n")
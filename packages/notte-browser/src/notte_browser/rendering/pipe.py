@@ -5,6 +5,7 @@ from loguru import logger
 from notte_core.browser.dom_tree import DomNode
 from notte_core.common.config import config
 
+from notte_browser.rendering.budget import BudgetedMarkdownDomNodeRenderingPipe, BudgetedRendering
 from notte_browser.rendering.interaction_only import InteractionOnlyDomNodeRenderingPipe
 from notte_browser.rendering.json import JsonDomNodeRenderingPipe
 from notte_browser.rendering.markdown import MarkdownDomNodeRenderingPipe
@@ -26,10 +27,50 @@ class DomNodeRenderingPipe:
 
     @staticmethod
     def forward(node: DomNode, type: DomNodeRenderingType, include_ids: bool = True) -> str:
-        if DomNodeRenderingPipe.prune_dom_tree and type != DomNodeRenderingType.INTERACTION_ONLY:
+        """
+        Renders `node` (usually the root of a snapshot). Renderings are cached on the node: the tree is immutable,
+        so rendering the same snapshot again (e.g. for another prompt of the same step) is free.
+        """
+        key = (
+            type,
+            include_ids,
+            DomNodeRenderingPipe.prune_dom_tree,
+            DomNodeRenderingPipe.max_len_per_attribute,
+            DomNodeRenderingPipe.include_links,
+        )
+        renders: dict[tuple[DomNodeRenderingType, bool, bool, int | None, bool], str] = node.__dict__.setdefault(
+            "_renders", {}
+        )
+        if key not in renders:
+            renders[key] = DomNodeRenderingPipe.render(node, type, include_ids)
+        return renders[key]
+
+    @staticmethod
+    def forward_with_budget(node: DomNode, max_tokens: int, include_ids: bool = True) -> BudgetedRendering:
+        """Markdown rendering of the most relevant nodes that fit in `max_tokens` (see `BudgetedRendering`)"""
+        if DomNodeRenderingPipe.prune_dom_tree:
+            node = DomNodeRenderingPipe.pruned(node)
+        return BudgetedMarkdownDomNodeRenderingPipe.forward(
+            node,
+            max_tokens=max_tokens,
+            include_ids=include_ids,
+            verbose=config.verbose,
+        )
+
+    @staticmethod
+    def pruned(node: DomNode) -> DomNode:
+        """`prune_dom_tree(node)`, computed once per tree"""
+        if "_pruned" not in node.__dict__:
             if config.verbose:
                 logger.trace("🫧 Pruning DOM tree...")
-            node = prune_dom_tree(node)
+            node.__dict__["_pruned"] = prune_dom_tree(node)
+        pruned: DomNode = node.__dict__["_pruned"]
+        return pruned
+
+    @staticmethod
+    def render(node: DomNode, type: DomNodeRenderingType, include_ids: bool = True) -> str:
+        if DomNodeRenderingPipe.prune_dom_tree and type != DomNodeRenderingType.INTERACTION_ONLY:
+            node = DomNodeRenderingPipe.pruned(node)
 
         # Exclude images if requested
         match type:
@@ -95,6 +95,9 @@ def fold_single_childs(node: DomNode) -> DomNode:
     pruned_children = [fold_single_childs(child) for child in node.children]
     if len(pruned_children) == 1:
         return _fold_single_child(node, pruned_children[0])
+    if all(pruned is child for pruned, child in zip(pruned_children, node.children)):
+        # nothing to fold in this subtree: share it
+        return node
     return DomNode(
         id=node.id,
         role=node.role,
@@ -203,7 +203,7 @@ class ImageScrapingPipe:
         self.verbose: bool = verbose
 
     async def forward(self, window: BrowserWindow, snapshot: BrowserSnapshot) -> list[ImageData]:
-        image_nodes = snapshot.dom_node.image_nodes()
+        image_nodes = snapshot.image_nodes()
         out_images: list[ImageData] = [
             # first image is the favicon
             ImageData(
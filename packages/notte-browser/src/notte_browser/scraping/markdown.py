@@ -1,11 +1,12 @@
 import markdownify  # type: ignore[import]
+from loguru import logger
 from main_content_extractor import MainContentExtractor  # type: ignore[import]
 from notte_core.browser.snapshot import BrowserSnapshot
 from notte_core.errors.llm import LLMnoOutputCompletionError
 from notte_core.llms.engine import StructuredContent
 from notte_core.llms.service import LLMService
 
-from notte_browser.rendering.pipe import DomNodeRenderingPipe, DomNodeRenderingType
+from notte_browser.rendering.pipe import DomNodeRenderingPipe
 from notte_browser.scraping.pruning import MarkdownPruningPipe
 from notte_browser.window import BrowserWindow
 
@@ -78,11 +79,18 @@ class Llm2MarkdownScrapingPipe:
         snapshot: BrowserSnapshot,
     ) -> str:
         # TODO: add DIVID & CONQUER once this is implemented
-        document = DomNodeRenderingPipe.forward(
-            node=snapshot.dom_node, type=DomNodeRenderingType.MARKDOWN, include_ids=False
+        rendering = DomNodeRenderingPipe.forward_with_budget(
+            node=snapshot.dom_node, max_tokens=self.llmserve.max_document_tokens(), include_ids=False
         )
-        document = self.llmserve.clip_tokens(document)
-        return document
+        if rendering.clipped:
+            logger.debug(
+                (
+                    f"Document exceeds max tokens: elided {rendering.nb_elided_nodes}/{rendering.nb_nodes} nodes "
+                    f"of {snapshot.metadata.url}"
+                )
+            )
+        # token counts of the rendering are estimates: clip the (already budget-sized) document to be safe
+        return self.llmserve.clip_tokens(rendering.document)
 
     async def forward(
         self,
@@ -1,6 +1,5 @@
 import asyncio
-import datetime as dt
-from collections.abc import Callable, Sequence
+from collections.abc import Awaitable, Callable, Sequence
 from pathlib import Path
 from typing import ClassVar, Unpack
 
@@ -14,6 +13,7 @@ from notte_core.actions import (
     ScrapeAction,
     ToolAction,
 )
+from notte_core.browser.diff import DomDiff
 from notte_core.browser.observation import Observation, StepResult
 from notte_core.browser.snapshot import BrowserSnapshot
 from notte_core.common.config import RaiseCondition, ScreenshotType, config
@@ -55,7 +55,8 @@ from notte_browser.errors import (
     NoStorageObjectProvidedError,
     NoToolProvidedError,
 )
-from notte_browser.playwright import PlaywrightManager
+from notte_browser.playwright import BaseWindowManager, PlaywrightManager
+from notte_browser.recording import ScreencastRecorder
 from notte_browser.resolution import NodeResolutionPipe
 from notte_browser.scraping.pipe import DataScrapingPipe
 from notte_browser.tagging.action.pipe import MainActionSpacePipe
@@ -73,13 +74,13 @@ class SessionTrajectoryStep(BaseModel):
 
 class NotteSession(AsyncResource, SyncResource):
     observe_max_retry_after_snapshot_update: ClassVar[int] = 2
-    nb_seconds_between_snapshots_check: ClassVar[int] = 10
 
     @track_usage("local.session.create")
     def __init__(
         self,
         enable_perception: bool = config.enable_perception,
         window: BrowserWindow | None = None,
+        window_manager: BaseWindowManager | None = None,
         storage: BaseStorage | None = None,
         tools: list[BaseTool] | None = None,
         act_callback: Callable[[SessionTrajectoryStep], None] | None = None,
@@ -90,6 +91,7 @@ class NotteSession(AsyncResource, SyncResource):
             raise CaptchaSolverNotAvailableError()
         self._enable_perception: bool = enable_perception
         self._window: BrowserWindow | None = window
+        self._window_manager: BaseWindowManager | None = window_manager
         self.controller: BrowserController = BrowserController(verbose=config.verbose, storage=storage)
         self.storage: BaseStorage | None = storage
         llmserve = LLMService.from_config()
@@ -100,8 +102,12 @@ class NotteSession(AsyncResource, SyncResource):
 
         self.trajectory: list[SessionTrajectoryStep] = []
         self._snapshot: BrowserSnapshot | None = None
+        # snapshot of the last observation (i.e the snapshot `last_step.obs.space` was listed on)
+        self._observed_snapshot: BrowserSnapshot | None = None
         self._action: BaseAction | None = None
         self._action_result: StepResult | None = None
+        # `screencast` recording mode: trajectory steps reference frames of the recorder instead of screenshots
+        self._recorder: ScreencastRecorder | None = ScreencastRecorder.from_config()
 
         self.act_callback: Callable[[SessionTrajectoryStep], None] | None = act_callback
 
@@ -123,12 +129,18 @@ class NotteSession(AsyncResource, SyncResource):
     async def astart(self) -> None:
         if self._window is not None:
             return
-        manager = PlaywrightManager()
+        # shared managers (e.g. `PooledPlaywrightManager`) outlive the session
+        manager = self._window_manager or PlaywrightManager()
         options = BrowserWindowOptions.from_request(self._request)
         self._window = await manager.new_window(options)
+        if self._recorder is not None:
+            await self._recorder.attach(self._window.page)
 
     @override
     async def astop(self) -> None:
+        # recorded frames are kept for `replay`
+        if self._recorder is not None:
+            await self._recorder.detach()
         await self.window.close()
         self._window = None
 
@@ -160,9 +172,15 @@ class NotteSession(AsyncResource, SyncResource):
         # And trajectory[-2] is the "previous observation" we're interested in.
         if len(self.trajectory) <= 0:
             return None
-        if self.snapshot.clean_url != self.last_step.obs.clean_url:
-            return None  # the page has significantly changed
         actions = self.last_step.obs.space.interaction_actions
+        if len(actions) == 0:
+            return None
+        if self._observed_snapshot is None:
+            if self.snapshot.clean_url != self.last_step.obs.clean_url:
+                return None  # the page has significantly changed
+            return actions
+        # ids shift when nodes are added or removed: only the actions of unchanged nodes are kept (with their new id)
+        actions = DomDiff.from_snapshots(self._observed_snapshot, self.snapshot).remap_actions(actions)
         if len(actions) == 0:
             return None
         return actions
@@ -175,7 +193,15 @@ class NotteSession(AsyncResource, SyncResource):
 
     @track_usage("local.session.replay")
     def replay(self, screenshot_type: ScreenshotType = config.screenshot_type) -> WebpReplay:
+        if self._recorder is not None:
+            # encode the recorded stream (frames are not annotated with the step bounding boxes)
+            frames = self._recorder.ring.frames()
+            if len(frames) == 0:
+                raise ValueError("No frames found in session recording")
+            return ScreenshotReplay.from_bytes(frames).get()
         screenshots: list[bytes] = [step.obs.screenshot.bytes(screenshot_type) for step in self.trajectory]
+        # steps observed without screenshot (e.g `screenshot_policy = "lazy"`) are skipped
+        screenshots = [screenshot for screenshot in screenshots if len(screenshot) > 0]
         if len(screenshots) == 0:
             raise ValueError("No screenshots found in agent trajectory")
         return ScreenshotReplay.from_bytes(screenshots).get()
@@ -194,29 +220,44 @@ class NotteSession(AsyncResource, SyncResource):
             previous_action_list=self.previous_interaction_actions,
             pagination=pagination,
         )
-        # TODO: improve this
-        # Check if the snapshot has changed since the beginning of the trajectory
-        # if it has, it means that the page was not fully loaded and that we should restart the oblisting
-        time_diff = dt.datetime.now() - self.snapshot.metadata.timestamp
-        if time_diff.total_seconds() > self.nb_seconds_between_snapshots_check:
+        # the page might have changed during the action listing (e.g. it was not fully loaded):
+        # in that case, the action space has to be listed again on a fresh snapshot.
+        # The fingerprint check is a single small evaluate: it runs after every listing
+        if retry > 0 and await self.window.page_changed(self.snapshot):
             if config.verbose:
                 logger.warning(
-                    (
-                        f"{time_diff.total_seconds()} seconds since the beginning of the action listing."
-                        "Check if page content has changed..."
-                    )
+                    "Page content changed since the beginning of the action listing, retrying to observe again"
                 )
-            check_snapshot = await self.window.snapshot(screenshot=False)
-            if not self.snapshot.compare_with(check_snapshot) and retry > 0:
-                if config.verbose:
-                    logger.warning(
-                        "Snapshot changed since the beginning of the action listing, retrying to observe again"
-                    )
-                self._snapshot = check_snapshot
-                return await self._interaction_action_listing(retry=retry - 1, pagination=pagination)
+            self._snapshot = await self.window.snapshot(screenshot=self._snapshot_screenshot)
+            return await self._interaction_action_listing(retry=retry - 1, pagination=pagination)
 
         return space
 
+    @property
+    def _snapshot_screenshot(self) -> bool | None:
+        # observation screenshots are read from the recording: capturing them again would be wasted
+        return False if self._recorder is not None else None
+
+    async def _recorded_frame_loader(self) -> Callable[[], bytes] | None:
+        if self._recorder is None:
+            return None
+        await self._recorder.attach(self.window.page)
+        frame_id = await self._recorder.mark(fallback=self.window.page)
+        return self._recorder.loader(frame_id)
+
+    def _screenshot_capture(self) -> Callable[[], Awaitable[bytes]] | None:
+        if config.screenshot_policy != "lazy":
+            return None
+        snapshot = self.snapshot
+
+        async def capture() -> bytes:
+            # the screenshot must show the observed page: skip it once the session has moved on
+            if self._snapshot is not snapshot or self._window is None:
+                return b""
+            return await self.window.screenshot()
+
+        return capture
+
     @timeit("observe")
     @track_usage("local.session.observe")
     @profiler.profiled()
@@ -243,7 +284,7 @@ class NotteSession(AsyncResource, SyncResource):
         last_action = self._action
         last_action_result = self._action_result
 
-        self._snapshot = await self.window.snapshot()
+        self._snapshot = await self.window.snapshot(screenshot=self._snapshot_screenshot)
         if config.verbose:
             logger.debug(f"ℹ️ previous actions IDs: {[a.id for a in self.previous_interaction_actions or []]}")
             logger.debug(f"ℹ️ snapshot inodes IDs: {[node.id for node in self.snapshot.interaction_nodes()]}")
@@ -269,12 +310,21 @@ class NotteSession(AsyncResource, SyncResource):
         # ------- Step 3: tracing --------
         # --------------------------------
 
-        obs = Observation.from_snapshot(self._snapshot, space=space)
+        frame_loader = await self._recorded_frame_loader()
+        obs = Observation.from_snapshot(
+            self._snapshot,
+            space=space,
+            screenshot_loader=frame_loader,
+            screenshot_capture=self._screenshot_capture() if frame_loader is None else None,
+            # frames stay in the recorder ring: steps must not retain a copy
+            cache_screenshot=frame_loader is None,
+        )
         # final step is to add obs, action pair to the trajectory and trigger the callback
         if isinstance(self._action, InteractionAction) and len(self.trajectory) > 0:
             # this is usefull if screenshot_type = "last_action"
             self.last_step.obs.screenshot.last_action_id = self._action.id
         self.trajectory.append(SessionTrajectoryStep(obs=obs, action=last_action, result=last_action_result))
+        self._observed_snapshot = self._snapshot
         if self.act_callback is not None:
             self.act_callback(self.trajectory[-1])
         return obs
@@ -405,13 +455,70 @@ class NotteSession(AsyncResource, SyncResource):
     ) -> DataSpace:
         if url is not None:
             _ = await self.astep(GotoAction(url=url))
-            self._snapshot = await self.window.snapshot()
+            # scraping never looks at the screenshot
+            self._snapshot = await self.window.snapshot(screenshot=False)
         params = ScrapeParams(**scrape_params)
         return await self._data_scraping_pipe.forward(self.window, self.snapshot, params)
 
     def scrape(self, url: str | None = None, **scrape_params: Unpack[ScrapeParamsDict]) -> DataSpace:
         return asyncio.run(self.ascrape(url=url, **scrape_params))
 
+    # ---------------------------- multi-tab functions ----------------------------
+
+    def _tab_windows(self, tab_indices: Sequence[int] | None) -> list[BrowserWindow]:
+        if tab_indices is None:
+            tab_indices = range(len(self.window.tabs))
+        return [self.window.for_tab(tab_idx) for tab_idx in tab_indices]
+
+    @track_usage("local.session.snapshot_tabs")
+    @profiler.profiled()
+    async def asnapshot_tabs(
+        self, tab_indices: Sequence[int] | None = None, screenshot: bool | None = None
+    ) -> list[BrowserSnapshot]:
+        """
+        Snapshot several tabs concurrently (all tabs by default), without switching the current tab.
+
+        By default, only the current tab is captured according to `screenshot_policy`: background tabs are not
+        screenshotted. The session state (current snapshot, trajectory) is left unchanged.
+        """
+        windows = self._tab_windows(tab_indices)
+        current_page = self.window.page
+        return list(
+            await asyncio.gather(
+                *[
+                    window.snapshot(
+                        screenshot=screenshot if screenshot is not None or window.page is current_page else False
+                    )
+                    for window in windows
+                ]
+            )
+        )
+
+    def snapshot_tabs(
+        self, tab_indices: Sequence[int] | None = None, screenshot: bool | None = None
+    ) -> list[BrowserSnapshot]:
+        return asyncio.run(self.asnapshot_tabs(tab_indices=tab_indices, screenshot=screenshot))
+
+    @track_usage("local.session.scrape_tabs")
+    @profiler.profiled()
+    async def ascrape_tabs(
+        self, tab_indices: Sequence[int] | None = None, **scrape_params: Unpack[ScrapeParamsDict]
+    ) -> list[DataSpace]:
+        """Scrape several tabs concurrently (all tabs by default), without switching the current tab."""
+        params = ScrapeParams(**scrape_params)
+
+        async def scrape_tab(window: BrowserWindow) -> DataSpace:
+            # scraping never looks at the screenshot
+            snapshot = await window.snapshot(screenshot=False)
+            return await self._data_scraping_pipe.forward(window, snapshot, params)
+
+        return list(await asyncio.gather(*[scrape_tab(window) for window in self._tab_windows(tab_indices)]))
+
+    def scrape_tabs(
+        self, tab_indices: Sequence[int] | None = None, **scrape_params: Unpack[ScrapeParamsDict]
+    ) -> list[DataSpace]:
+        return asyncio.run(self.ascrape_tabs(tab_indices=tab_indices, **scrape_params))
+
     @timeit("reset")
     @track_usage("local.session.reset")
     @override
@@ -420,6 +527,7 @@ class NotteSession(AsyncResource, SyncResource):
             logger.info("🌊 Resetting environment...")
         self.trajectory = []
         self._snapshot = None
+        self._observed_snapshot = None
         self._action = None
         # reset the window
         await super().areset()
@@ -435,5 +543,6 @@ class NotteSession(AsyncResource, SyncResource):
             raise ValueError("Session already has an act callback")
         self.trajectory = session.trajectory
         self._snapshot = session._snapshot
+        self._observed_snapshot = session._observed_snapshot
         self._action = session._action
         self.act_callback = session.act_callback
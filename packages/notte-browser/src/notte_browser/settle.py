@@ -0,0 +1,126 @@
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Any
+
+from notte_core.profiling import profiler
+from patchright.async_api import Page, Request
+
+# requests that can still change the DOM once they complete (images, fonts, media, beacons, websockets,
+# event sources... are ignored)
+TRACKED_RESOURCE_TYPES = frozenset({"document", "xhr", "fetch", "script", "stylesheet"})
+# requests in flight for longer are long-lived (long polling, streaming responses): they do not delay the settle
+LONG_LIVED_REQUEST_S = 1.0
+
+# Resolves once the DOM has not been mutated for `quiet_ms` and a frame has been rendered since the last mutation,
+# or after `timeout_ms`. The mutation observer is installed on first use and kept for the lifetime of the document.
+SETTLE_JS = """(args) => new Promise((resolve) => {
+    const start = performance.now();
+    let state = window.__notte_settle__;
+    if (!state) {
+        state = { lastMutation: start };
+        new MutationObserver(() => { state.lastMutation = performance.now(); }).observe(document, {
+            childList: true, subtree: true, attributes: true, characterData: true,
+        });
+        Object.defineProperty(window, "__notte_settle__", { value: state, enumerable: false, configurable: true });
+    }
+    let finished = false;
+    let timer = null;
+    const done = (settled) => {
+        if (finished) return;
+        finished = true;
+        clearTimeout(timer);
+        resolve({ settled, elapsed_ms: performance.now() - start });
+    };
+    // animation frames are throttled in background tabs: never wait longer than the timeout
+    timer = setTimeout(() => done(false), args.timeout_ms);
+    const check = () => {
+        // pages that never stop mutating: stop polling once the timeout resolved the promise
+        if (finished) return;
+        const now = performance.now();
+        const quiet = now - state.lastMutation;
+        if (quiet < args.quiet_ms) {
+            setTimeout(check, args.quiet_ms - quiet);
+            return;
+        }
+        requestAnimationFrame(() => setTimeout(() => (state.lastMutation <= now ? done(true) : check()), 0));
+    };
+    check();
+})"""
+
+
+@dataclass
+class SettleStats:
+    """Time spent waiting for pages to settle, compared to the fixed `wait_short_ms` sleeps it replaces"""
+
+    nb_waits: int = 0
+    waited_s: float = 0.0
+    saved_s: float = 0.0
+
+    def record(self, waited_s: float, baseline_s: float) -> None:
+        self.nb_waits += 1
+        self.waited_s += waited_s
+        self.saved_s += baseline_s - waited_s
+
+
+class RequestTracker:
+    """Counts in-flight requests of a page using playwright network events (the page is not instrumented)"""
+
+    def __init__(self, page: Page) -> None:
+        # in-flight requests and their start time
+        self.inflight: dict[Request, float] = {}
+        self.idle: asyncio.Event = asyncio.Event()
+        self.idle.set()
+        page.on("request", self.on_request)
+        page.on("requestfinished", self.on_request_done)
+        page.on("requestfailed", self.on_request_done)
+
+    def on_request(self, request: Request) -> None:
+        if request.resource_type in TRACKED_RESOURCE_TYPES:
+            self.inflight[request] = time.monotonic()
+            self.idle.clear()
+
+    def on_request_done(self, request: Request) -> None:
+        _ = self.inflight.pop(request, None)
+        if len(self.inflight) == 0:
+            self.idle.set()
+
+    def pending_s(self) -> float:
+        """Time until every in-flight request is either done or long-lived (0 if there is none)"""
+        if len(self.inflight) == 0:
+            return 0.0
+        return max(0.0, max(self.inflight.values()) + LONG_LIVED_REQUEST_S - time.monotonic())
+
+    async def wait_idle(self, timeout_s: float) -> bool:
+        """Wait for the in-flight requests that are not long-lived, returns `False` on timeout"""
+        deadline = time.monotonic() + timeout_s
+        while (pending_s := self.pending_s()) > 0:
+            remaining_s = deadline - time.monotonic()
+            if remaining_s <= 0:
+                return False
+            try:
+                _ = await asyncio.wait_for(self.idle.wait(), timeout=min(pending_s, remaining_s))
+            except asyncio.TimeoutError:
+                pass
+        return True
+
+
+@profiler.profiled()
+async def wait_for_settle(page: Page, tracker: RequestTracker, quiet_ms: int, timeout_ms: int) -> bool:
+    """
+    Wait until the page is stable: no in-flight request, no DOM mutation for `quiet_ms` and one rendered frame
+    since the last mutation. Returns `False` if the page did not settle within `timeout_ms`.
+    """
+    deadline = time.time() + timeout_ms / 1000
+    while True:
+        remaining_ms = int((deadline - time.time()) * 1000)
+        if remaining_ms <= 0:
+            return False
+        result: dict[str, Any] = await page.evaluate(SETTLE_JS, {"quiet_ms": quiet_ms, "timeout_ms": remaining_ms})
+        if not result["settled"]:
+            return False
+        if tracker.pending_s() == 0:
+            return True
+        # responses can still update the DOM: wait for them, then for the DOM to be quiet again
+        if not await tracker.wait_idle(max(deadline - time.time(), 0)):
+            return False
@@ -0,0 +1,64 @@
+from notte_core.browser.dom_tree import DomNode
+from notte_core.browser.snapshot import BrowserSnapshot
+
+from notte_browser.rendering.budget import BudgetedMarkdownDomNodeRenderingPipe
+
+
+def _keep_nodes(root: DomNode, kept: set[int]) -> DomNode | None:
+    """Subtree of the nodes whose `id()` is in `kept`"""
+    return root.subtree_filter(lambda node: id(node) in kept)
+
+
+def split_snapshot(snapshot: BrowserSnapshot, max_tokens: int) -> list[BrowserSnapshot]:
+    """
+    Splits the page into snapshots of at most ~`max_tokens` (markdown rendering estimate), in document order.
+
+    Subtrees that fit in the budget are packed together (consecutive subtrees only), larger ones are split along
+    their children. Every chunk keeps the ancestors of its subtrees so that the document structure is preserved.
+    Chunks without interaction nodes are dropped: there is nothing to list in them.
+    """
+    units = BudgetedMarkdownDomNodeRenderingPipe.units(snapshot.dom_node, include_ids=True)
+    # units are in document order: accumulate subtree sizes bottom-up
+    sizes = [unit.tokens for unit in units]
+    for i in reversed(range(1, len(units))):
+        parent = units[i].parent
+        assert parent is not None
+        sizes[parent] += sizes[i]
+    if sizes[0] <= max_tokens:
+        return [snapshot]
+
+    # subtrees that fit in the budget (or cannot be split further), in document order
+    roots: list[int] = []
+    stack = [0]
+    while stack:
+        i = stack.pop()
+        if sizes[i] <= max_tokens or len(units[i].children) == 0:
+            roots.append(i)
+        else:
+            stack.extend(reversed(units[i].children))
+
+    chunks: list[list[int]] = [[]]
+    chunk_size = 0
+    for i in roots:
+        if len(chunks[-1]) > 0 and chunk_size + sizes[i] > max_tokens:
+            chunks.append([])
+            chunk_size = 0
+        chunks[-1].append(i)
+        chunk_size += sizes[i]
+
+    snapshots: list[BrowserSnapshot] = []
+    for chunk in chunks:
+        if all(len(units[i].node.subtree_ids) == 0 for i in chunk):
+            continue
+        # nodes of the chunk: its subtrees and their ancestors
+        kept: set[int] = set()
+        for i in chunk:
+            kept.update(id(node) for node in units[i].node.flatten())
+            parent = units[i].parent
+            while parent is not None and id(units[parent].node) not in kept:
+                kept.add(id(units[parent].node))
+                parent = units[parent].parent
+        dom_node = _keep_nodes(snapshot.dom_node, kept)
+        if dom_node is not None:
+            snapshots.append(snapshot.with_dom_node(dom_node))
+    return snapshots
@@ -113,11 +113,12 @@ class ActionListingPipe(BaseActionListingPipe):
                     for act in previous_action_list
                 ],
             )
-        document = DomNodeRenderingPipe.forward(snapshot.dom_node, type=self.rendering_type)
-        incr_document = DomNodeRenderingPipe.forward(incremental_snapshot.dom_node, type=self.rendering_type)
-        total_length, incremental_length = len(document), len(incr_document)
-        reduction_perc = (total_length - incremental_length) / total_length * 100
         if config.verbose:
+            # the full document is only rendered for this log
+            document = DomNodeRenderingPipe.forward(snapshot.dom_node, type=self.rendering_type)
+            incr_document = DomNodeRenderingPipe.forward(incremental_snapshot.dom_node, type=self.rendering_type)
+            total_length, incremental_length = len(document), len(incr_document)
+            reduction_perc = (total_length - incremental_length) / total_length * 100
             logger.trace(f"🚀 Forward incremental reduces context length by {reduction_perc:.2f}%")
         variables = self.get_prompt_variables(incremental_snapshot, previous_action_list)
         response = await self.llm_completion(self.incremental_prompt_id, variables)
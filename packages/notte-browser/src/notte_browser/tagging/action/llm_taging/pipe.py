@@ -1,3 +1,4 @@
+import asyncio
 from collections.abc import Sequence
 from typing import ClassVar
 
@@ -16,10 +17,11 @@ from typing_extensions import override
 
 from notte_browser.tagging.action.base import BaseActionSpacePipe
 from notte_browser.tagging.action.llm_taging.base import BaseActionListingPipe
+from notte_browser.tagging.action.llm_taging.chunking import split_snapshot
 from notte_browser.tagging.action.llm_taging.listing import MainActionListingPipe
 from notte_browser.tagging.action.llm_taging.validation import ActionListValidationPipe
 from notte_browser.tagging.page import PageCategoryPipe
-from notte_browser.tagging.type import PossibleAction
+from notte_browser.tagging.type import PossibleAction, PossibleActionSpace
 
 
 class LlmActionSpacePipe(BaseActionSpacePipe):
@@ -28,6 +30,10 @@ class LlmActionSpacePipe(BaseActionSpacePipe):
     required_action_coverage: ClassVar[float] = 0.95
     max_listing_trials: ClassVar[int] = 3
     include_images: ClassVar[bool] = False
+    # divide & conquer: pages larger than `max_chunk_tokens` are split into chunks listed concurrently
+    chunked_listing: ClassVar[bool] = False
+    max_chunk_tokens: ClassVar[int] = 8000
+    max_concurrent_chunks: ClassVar[int] = 4
 
     def __init__(self, llmserve: LLMService) -> None:
         self.action_listing_pipe: BaseActionListingPipe = MainActionListingPipe(llmserve)
@@ -40,6 +46,16 @@ class LlmActionSpacePipe(BaseActionSpacePipe):
                 "'required_action_coverage' must be between 0.0 and 1.0",
                 advice="Check the `required_action_coverage` parameter in the `LlmActionSpaceConfig` class.",
             )
+        if self.max_chunk_tokens <= 0:
+            raise UnexpectedBehaviorError(
+                "'max_chunk_tokens' must be positive",
+                advice="Check the `max_chunk_tokens` parameter in the `LlmActionSpaceConfig` class.",
+            )
+        if self.max_concurrent_chunks <= 0:
+            raise UnexpectedBehaviorError(
+                "'max_concurrent_chunks' must be positive",
+                advice="Check the `max_concurrent_chunks` parameter in the `LlmActionSpaceConfig` class.",
+            )
         if self.max_listing_trials < 0:
             raise UnexpectedBehaviorError(
                 "'max_listing_trials' must be positive",
@@ -102,6 +118,38 @@ class LlmActionSpacePipe(BaseActionSpacePipe):
             )
         return False
 
+    async def list_actions(
+        self,
+        snapshot: BrowserSnapshot,
+        previous_action_list: list[InteractionAction],
+    ) -> PossibleActionSpace:
+        chunks = split_snapshot(snapshot, self.max_chunk_tokens) if self.chunked_listing else [snapshot]
+        if len(chunks) <= 1:
+            return await self.action_listing_pipe.forward(snapshot, previous_action_list)
+        if config.verbose:
+            logger.trace(f"[ActionListing] Listing actions of {len(chunks)} page chunks concurrently")
+        # bounds the number of concurrent LLM calls (and their rate limiting) on very large pages
+        semaphore = asyncio.Semaphore(self.max_concurrent_chunks)
+
+        async def list_chunk_actions(chunk: BrowserSnapshot) -> PossibleActionSpace:
+            async with semaphore:
+                return await self.action_listing_pipe.forward(
+                    chunk,
+                    [action for action in previous_action_list if action.id in chunk.index.interaction_nodes_by_id],
+                )
+
+        spaces = await asyncio.gather(*[list_chunk_actions(chunk) for chunk in chunks])
+        # the ancestors of the chunks are shared: keep the first listing of their actions
+        actions: dict[str, PossibleAction] = {}
+        for space in spaces:
+            for action in space.actions:
+                _ = actions.setdefault(action.id, action)
+        return PossibleActionSpace(
+            # the first chunk is the top of the page
+            description=next((space.description for space in spaces if len(space.description) > 0), ""),
+            actions=list(actions.values()),
+        )
+
     async def forward_unfiltered(
         self,
         snapshot: BrowserSnapshot,
@@ -113,9 +161,11 @@ class LlmActionSpacePipe(BaseActionSpacePipe):
         inodes_ids = [inode.id for inode in snapshot.interaction_nodes()]
         previous_action_list = previous_action_list or []
         # we keep only intersection of current context inodes and previous actions!
-        previous_action_list = [action for action in previous_action_list if action.id in inodes_ids]
+        previous_action_list = [
+            action for action in previous_action_list if action.id in snapshot.index.interaction_nodes_by_id
+        ]
         # TODO: question, can we already perform a `check_enough_actions` here ?
-        possible_space = await self.action_listing_pipe.forward(snapshot, previous_action_list)
+        possible_space = await self.list_actions(snapshot, previous_action_list)
         _merged_actions = self.merge_action_lists(inodes_ids, possible_space.actions, previous_action_list)
         merged_actions = self.possible_to_interaction(_merged_actions, snapshot)
         # check if we have enough actions to proceed.
@@ -187,7 +237,7 @@ class LlmActionSpacePipe(BaseActionSpacePipe):
         self, actions: Sequence[InteractionAction | PossibleAction], snapshot: BrowserSnapshot
     ) -> Sequence[InteractionAction]:
         interaction_actions: list[InteractionAction] = []
-        inodes = {inode.id: inode for inode in snapshot.interaction_nodes()}
+        inodes = snapshot.index.interaction_nodes_by_id
         for action in actions:
             if isinstance(action, PossibleAction):
                 inode = inodes[action.id]
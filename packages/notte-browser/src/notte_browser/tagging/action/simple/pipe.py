@@ -48,5 +48,5 @@ class SimpleActionSpacePipe(BaseActionSpacePipe):
         page_content = DomNodeRenderingPipe.forward(snapshot.dom_node, type=DomNodeRenderingType.INTERACTION_ONLY)
         return ActionSpace(
             description=page_content,
-            interaction_actions=self.actions(snapshot.dom_node),
+            interaction_actions=[self.node_to_interaction(inode) for inode in snapshot.interaction_nodes()],
         )
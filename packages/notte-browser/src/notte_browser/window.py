@@ -1,9 +1,12 @@
+import asyncio
+import base64
 import os
 import random
 import time
 from collections.abc import Awaitable
 from pathlib import Path
-from typing import Any, Callable, Self
+from typing import Any, Callable, Self, TypeVar
+from weakref import WeakKeyDictionary
 
 import httpx
 from loguru import logger
@@ -14,7 +17,7 @@ from notte_core.browser.snapshot import (
     TabsData,
     ViewportData,
 )
-from notte_core.common.config import BrowserType, PlaywrightProxySettings, config
+from notte_core.common.config import BrowserType, DomExtractionBackend, PlaywrightProxySettings, config
 from notte_core.errors.processing import SnapshotProcessingError
 from notte_core.profiling import profiler
 from notte_core.utils.url import is_valid_url
@@ -22,12 +25,14 @@ from notte_sdk.types import (
     DEFAULT_HEADLESS_VIEWPORT_HEIGHT,
     DEFAULT_HEADLESS_VIEWPORT_WIDTH,
     Cookie,
+    ResourceBlockingProfile,
     SessionStartRequest,
 )
 from patchright.async_api import CDPSession, Locator, Page
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, PrivateAttr
 from typing_extensions import override
 
+from notte_browser.dom.fingerprint import page_fingerprint
 from notte_browser.dom.parsing import ParseDomTreePipe
 from notte_browser.errors import (
     BrowserExpiredError,
@@ -38,6 +43,49 @@ from notte_browser.errors import (
     RemoteDebuggingNotAvailableError,
     UnexpectedBrowserError,
 )
+from notte_browser.network import ResourceBlocker
+from notte_browser.settle import RequestTracker, SettleStats, wait_for_settle
+
+T = TypeVar("T")
+
+PAGE_METADATA_JS = """() => ({
+    title: document.title,
+    scroll_x: window.scrollX,
+    scroll_y: window.scrollY,
+    viewport_width: window.innerWidth,
+    viewport_height: window.innerHeight,
+    total_width: document.documentElement.scrollWidth,
+    total_height: document.documentElement.scrollHeight,
+})"""
+
+# visible viewport in document coordinates, used to clip CDP screenshots
+VIEWPORT_CLIP_JS = """() => {
+    const viewport = window.visualViewport;
+    return viewport
+        ? { x: viewport.pageLeft, y: viewport.pageTop, width: viewport.width, height: viewport.height }
+        : { x: window.scrollX, y: window.scrollY, width: window.innerWidth, height: window.innerHeight };
+}"""
+
+
+class RetryBudget:
+    """Retries shared by all the concurrent captures of a snapshot, including its restarts on navigation"""
+
+    def __init__(self, retries: int) -> None:
+        self.retries: int = retries
+        self.left: int = retries
+
+    def consume(self, url: str) -> None:
+        if self.left <= 0:
+            raise EmptyPageContentError(url=url, nb_retries=self.retries)
+        self.left -= 1
+
+
+async def timed(timings: dict[str, float], name: str, coro: Awaitable[T]) -> T:
+    start_time = time.time()
+    try:
+        return await coro
+    finally:
+        timings[name] = time.time() - start_time
 
 
 class BrowserWindowOptions(BaseModel):
@@ -50,6 +98,7 @@ class BrowserWindowOptions(BaseModel):
     browser_type: BrowserType
     chrome_args: list[str] | None
     web_security: bool
+    resource_blocking: ResourceBlockingProfile | None = None
 
     # Debugging args
     cdp_url: str | None
@@ -130,6 +179,10 @@ class BrowserWindowOptions(BaseModel):
             web_security=config.web_security,
             debug_port=config.debug_port,
             custom_devtools_frontend=config.custom_devtools_frontend,
+            # presets are resolved by `SessionStartRequest`
+            resource_blocking=request.resource_blocking
+            if isinstance(request.resource_blocking, ResourceBlockingProfile)
+            else None,
         )
 
 
@@ -144,6 +197,14 @@ class BrowserResource(BaseModel):
     context_id: str | None = None
 
 
+# request trackers of every page, shared by all the windows using the page (e.g. `BrowserWindow.for_tab`): the
+# network listeners of a page are only registered once
+_REQUEST_TRACKERS: WeakKeyDictionary[Page, RequestTracker] = WeakKeyDictionary()
+# CDP sessions of every page, shared by all the windows using the page: sessions are only attached once per page
+# (and released with it) instead of once per window
+_PAGE_CDP_SESSIONS: WeakKeyDictionary[Page, CDPSession] = WeakKeyDictionary()
+
+
 class ScreenshotMask(BaseModel):
     async def mask(self, page: Page) -> list[Locator]:  # pyright: ignore[reportUnusedParameter]
         return []
@@ -153,16 +214,37 @@ class BrowserWindow(BaseModel):
     resource: BrowserResource
     screenshot_mask: ScreenshotMask | None = None
     on_close: Callable[[], Awaitable[None]] | None = None
+    # windows of other tabs (see `for_tab`) don't own the resource
+    _borrowed: bool = PrivateAttr(default=False)
+    _settle_stats: SettleStats = PrivateAttr(default_factory=SettleStats)
 
     @override
     def model_post_init(self, __context: Any) -> None:
         self.resource.page.set_default_timeout(config.timeout_default_ms)
+        _ = self.request_tracker()
+
+    @property
+    def resource_blocker(self) -> ResourceBlocker | None:
+        return ResourceBlocker.of(self.page.context)
+
+    @property
+    def settle_stats(self) -> SettleStats:
+        return self._settle_stats
+
+    def request_tracker(self) -> RequestTracker:
+        """In-flight requests of the current page, tracked from the moment the window starts using it"""
+        tracker = _REQUEST_TRACKERS.get(self.page)
+        if tracker is None:
+            tracker = _REQUEST_TRACKERS[self.page] = RequestTracker(self.page)
+        return tracker
 
     @property
     def page(self) -> Page:
         return self.resource.page
 
     async def close(self) -> None:
+        if self._borrowed:
+            return
         if self.on_close is not None:
             await self.on_close()
         for tab in self.tabs:
@@ -180,13 +262,44 @@ class BrowserWindow(BaseModel):
             data = response.json()
             return data["webSocketDebuggerUrl"]
 
+    def for_tab(self, tab_idx: int) -> "BrowserWindow":
+        """
+        Window bound to another tab of the same context, without bringing it to the front.
+
+        The returned window shares the browser resource but doesn't own it (closing it is a no-op).
+        """
+        window = BrowserWindow(
+            resource=self.resource.model_copy(update={"page": self.tabs[tab_idx]}),
+            screenshot_mask=self.screenshot_mask,
+        )
+        window._borrowed = True
+        return window
+
     async def get_cdp_session(self, tab_idx: int | None = None) -> CDPSession:
         cdp_page = self.tabs[tab_idx] if tab_idx is not None else self.page
         return await cdp_page.context.new_cdp_session(cdp_page)
 
+    async def page_cdp_session(self) -> CDPSession:
+        """CDP session of the current page, reused across snapshots (DOM extraction, screenshots) and windows"""
+        page = self.page
+        session = _PAGE_CDP_SESSIONS.get(page)
+        if session is not None:
+            return session
+        session = await self.get_cdp_session()
+        cached = _PAGE_CDP_SESSIONS.get(page)
+        if cached is not None:
+            # another window attached a session to the page in the meantime
+            await session.detach()
+            return cached
+        _PAGE_CDP_SESSIONS[page] = session
+        return session
+
     async def page_id(self, tab_idx: int | None = None) -> str:
         session = await self.get_cdp_session(tab_idx)
-        target_id: Any = await session.send("Target.getTargetInfo")  # pyright: ignore[reportUnknownMemberType]
+        try:
+            target_id: Any = await session.send("Target.getTargetInfo")  # pyright: ignore[reportUnknownMemberType]
+        finally:
+            await session.detach()
         return target_id["targetInfo"]["targetId"]
 
     async def ws_page_url(self, tab_idx: int | None = None) -> str:
@@ -196,6 +309,7 @@ class BrowserWindow(BaseModel):
     @page.setter
     def page(self, page: Page) -> None:
         self.resource.page = page
+        _ = self.request_tracker()
 
     @property
     def tabs(self) -> list[Page]:
@@ -216,7 +330,29 @@ class BrowserWindow(BaseModel):
 
     @profiler.profiled()
     async def short_wait(self) -> None:
-        await self.page.wait_for_timeout(config.wait_short_ms)
+        if not config.settle_detection:
+            await self.page.wait_for_timeout(config.wait_short_ms)
+            return
+        start_time = time.time()
+        try:
+            settled = await wait_for_settle(
+                self.page,
+                self.request_tracker(),
+                quiet_ms=config.wait_settle_quiet_ms,
+                timeout_ms=config.wait_settle_max_ms,
+            )
+        except Exception as e:
+            # e.g the page navigated while waiting: fall back to a fixed wait
+            if config.verbose:
+                logger.debug(f"Failed to wait for '{self.page.url}' to settle: {e}")
+            settled = False
+            await self.page.wait_for_timeout(config.wait_short_ms)
+        waited = time.time() - start_time
+        self.settle_stats.record(waited, baseline_s=config.wait_short_ms / 1000)
+        if config.verbose:
+            logger.trace(
+                f"Page '{self.page.url}' {'settled' if settled else 'not settled'} after {waited * 1000:.0f}ms"
+            )
 
     async def tab_metadata(self, tab_idx: int | None = None) -> TabsData:
         page = self.tabs[tab_idx] if tab_idx is not None else self.page
@@ -228,32 +364,66 @@ class BrowserWindow(BaseModel):
 
     @profiler.profiled()
     async def snapshot_metadata(self) -> SnapshotMetadata:
+        # single round trip for the current page, tab titles are fetched concurrently
+        page_metadata, tabs = await asyncio.gather(
+            self.page.evaluate(PAGE_METADATA_JS),
+            asyncio.gather(*[self.tab_metadata(i) for i, _ in enumerate(self.tabs)]),
+        )
         return SnapshotMetadata(
-            title=await self.page.title(),
+            title=page_metadata["title"],
             url=self.page.url,
             viewport=ViewportData(
-                scroll_x=int(await self.page.evaluate("window.scrollX")),
-                scroll_y=int(await self.page.evaluate("window.scrollY")),
-                viewport_width=int(await self.page.evaluate("window.innerWidth")),
-                viewport_height=int(await self.page.evaluate("window.innerHeight")),
-                total_width=int(await self.page.evaluate("document.documentElement.scrollWidth")),
-                total_height=int(await self.page.evaluate("document.documentElement.scrollHeight")),
+                scroll_x=int(page_metadata["scroll_x"]),
+                scroll_y=int(page_metadata["scroll_y"]),
+                viewport_width=int(page_metadata["viewport_width"]),
+                viewport_height=int(page_metadata["viewport_height"]),
+                total_width=int(page_metadata["total_width"]),
+                total_height=int(page_metadata["total_height"]),
             ),
-            tabs=[await self.tab_metadata(i) for i, _ in enumerate(self.tabs)],
+            tabs=list(tabs),
+            network=self.resource_blocker.stats.model_copy(deep=True) if self.resource_blocker is not None else None,
         )
 
     @profiler.profiled()
     async def screenshot(self, retries: int = config.empty_page_max_retry) -> bytes:
         if retries <= 0:
             raise EmptyPageContentError(url=self.page.url, nb_retries=config.empty_page_max_retry)
-        try:
-            mask = await self.screenshot_mask.mask(self.page) if self.screenshot_mask is not None else None
-            return await self.page.screenshot(mask=mask)
-        except PlaywrightTimeoutError:
-            if config.verbose:
-                logger.debug(f"Timeout while taking screenshot for {self.page.url}. Retrying...")
-            await self.short_wait()
-            return await self.screenshot(retries=retries - 1)
+        return await self._screenshot(RetryBudget(retries - 1))
+
+    async def _screenshot(self, budget: RetryBudget) -> bytes:
+        while True:
+            try:
+                return await self._capture_screenshot()
+            except PlaywrightTimeoutError:
+                budget.consume(self.page.url)
+                if config.verbose:
+                    logger.debug(f"Timeout while taking screenshot for {self.page.url}. Retrying...")
+                await self.short_wait()
+
+    async def _capture_screenshot(self) -> bytes:
+        screenshot_format, quality = config.screenshot_format, config.screenshot_quality
+        if screenshot_format == "webp" or config.screenshot_scale != 1:
+            if self.screenshot_mask is None:
+                # webp encoding and downscaling are only available through CDP
+                return await self._cdp_screenshot()
+            logger.debug("Screenshot masks require playwright screenshots: ignoring webp format and scale")
+        mask = await self.screenshot_mask.mask(self.page) if self.screenshot_mask is not None else None
+        if screenshot_format == "jpeg":
+            return await self.page.screenshot(mask=mask, type="jpeg", quality=quality)
+        return await self.page.screenshot(mask=mask)
+
+    async def _cdp_screenshot(self) -> bytes:
+        session = await self.page_cdp_session()
+        clip: dict[str, float] = await self.page.evaluate(VIEWPORT_CLIP_JS)
+        params: dict[str, Any] = {
+            "format": config.screenshot_format,
+            "clip": {**clip, "scale": config.screenshot_scale},
+            "captureBeyondViewport": False,
+        }
+        if config.screenshot_quality is not None and config.screenshot_format != "png":
+            params["quality"] = config.screenshot_quality
+        result: dict[str, Any] = await session.send("Page.captureScreenshot", params)  # pyright: ignore[reportUnknownMemberType, reportUnknownVariableType]
+        return base64.b64decode(result["data"])
 
     async def a11y(self) -> A11yTree | None:
         a11y_simple: A11yNode | None = await profiler.profiled()(self.page.accessibility.snapshot)()  # type: ignore[attr-defined]
@@ -266,46 +436,111 @@ class BrowserWindow(BaseModel):
             raw=a11y_raw,
         )
 
+    def _capture_error(self, e: Exception) -> Exception:
+        if "has been closed" in str(e):
+            return BrowserExpiredError()
+        return UnexpectedBrowserError(url=self.page.url)
+
+    async def _capture_html_content(self, budget: RetryBudget) -> str:
+        while True:
+            try:
+                return await profiler.profiled()(self.page.content)()
+            except Exception as e:
+                if "Unable to retrieve content because the page is navigating and changing the content" not in str(e):
+                    raise self._capture_error(e) from e
+            budget.consume(self.page.url)
+            # Should retry after the page is loaded
+            await self.short_wait()
+
+    async def _capture_dom_node(self, budget: RetryBudget) -> DomNode:
+        while True:
+            try:
+                cdp_session = (
+                    await self.page_cdp_session() if config.dom_extraction_backend is DomExtractionBackend.CDP else None
+                )
+                dom_node = await ParseDomTreePipe.forward(self.page, cdp_session)
+            except SnapshotProcessingError:
+                budget.consume(self.page.url)
+                await self.long_wait()
+                continue
+            except Exception as e:
+                if "Unable to retrieve content because the page is navigating and changing the content" not in str(e):
+                    raise self._capture_error(e) from e
+                dom_node = None
+            if dom_node is not None:
+                return dom_node
+            budget.consume(self.page.url)
+            if config.verbose:
+                logger.warning(f"Empty page content for {self.page.url}. Retry in {config.wait_retry_snapshot_ms}ms")
+            await self.page.wait_for_timeout(config.wait_retry_snapshot_ms)
+
     @profiler.profiled()
     async def snapshot(
         self, screenshot: bool | None = None, retries: int = config.empty_page_max_retry
     ) -> BrowserSnapshot:
         if retries <= 0:
             raise EmptyPageContentError(url=self.page.url, nb_retries=config.empty_page_max_retry)
-        html_content: str = ""
-        dom_node: DomNode | None = None
-        try:
-            html_content = await profiler.profiled()(self.page.content)()
-            dom_node = await ParseDomTreePipe.forward(self.page)
-
-        except SnapshotProcessingError:
-            await self.long_wait()
-            return await self.snapshot(screenshot=screenshot, retries=retries - 1)
-
-        except Exception as e:
-            if "has been closed" in str(e):
-                raise BrowserExpiredError() from e
-            if "Unable to retrieve content because the page is navigating and changing the content" in str(e):
-                # Should retry after the page is loaded
-                await self.short_wait()
-            else:
-                raise UnexpectedBrowserError(url=self.page.url) from e
-
-        if dom_node is None:
+        if screenshot is None:
+            screenshot = config.screenshot_policy == "always"
+        # all components are independent reads of the same page state: capture them concurrently
+        # and only retry the component that failed, within a single budget for the whole snapshot
+        budget = RetryBudget(retries - 1)
+        while True:
+            url = self.page.url
+            timings: dict[str, float] = {}
+            try:
+                # the other captures are cancelled as soon as one of them fails
+                async with asyncio.TaskGroup() as group:
+                    html_content = group.create_task(timed(timings, "html_content", self._capture_html_content(budget)))
+                    dom_node = group.create_task(timed(timings, "dom_node", self._capture_dom_node(budget)))
+                    snapshot_screenshot = group.create_task(
+                        timed(timings, "screenshot", self._screenshot(budget)) if screenshot else asyncio.sleep(0, b"")
+                    )
+                    metadata = group.create_task(timed(timings, "metadata", self.snapshot_metadata()))
+                    fingerprint = group.create_task(timed(timings, "fingerprint", page_fingerprint(self.page)))
+            except ExceptionGroup as errors:
+                e = errors.exceptions[0]
+                if isinstance(e, (BrowserExpiredError, EmptyPageContentError, UnexpectedBrowserError)):
+                    raise e from None
+                raise self._capture_error(e) from e
+
+            if metadata.result().url == url and self.page.url == url:
+                break
+            # the page navigated during capture: components may describe different pages
+            budget.consume(self.page.url)
             if config.verbose:
-                logger.warning(f"Empty page content for {self.page.url}. Retry in {config.wait_retry_snapshot_ms}ms")
-            await self.page.wait_for_timeout(config.wait_retry_snapshot_ms)
-            return await self.snapshot(screenshot=screenshot, retries=retries - 1)
+                logger.warning(f"Page navigated from '{url}' to '{self.page.url}' during snapshot. Retrying...")
+            await self.short_wait()
 
-        snapshot_screenshot = await self.screenshot()
+        if config.verbose:
+            logger.trace(f"Snapshot capture timings for '{url}': {timings}")
         return BrowserSnapshot(
-            metadata=await self.snapshot_metadata(),
-            html_content=html_content,
+            metadata=metadata.result(),
+            html_content=html_content.result(),
             a11y_tree=None,
-            dom_node=dom_node,
-            screenshot=snapshot_screenshot,
+            dom_node=dom_node.result(),
+            screenshot=snapshot_screenshot.result(),
+            capture_timings=timings,
+            fingerprint=fingerprint.result(),
         )
 
+    async def page_changed(self, snapshot: BrowserSnapshot) -> bool:
+        """
+        Whether the interactive content of the page changed since `snapshot` was taken.
+
+        Costs a single small evaluate (no hashing at all if the DOM was not mutated), unlike a full snapshot.
+        """
+        if snapshot.fingerprint is None:
+            return True
+        try:
+            fingerprint = await page_fingerprint(self.page, snapshot.fingerprint)
+        except Exception as e:
+            # e.g the page is navigating
+            if config.verbose:
+                logger.debug(f"Failed to fingerprint '{self.page.url}': {e}")
+            return True
+        return fingerprint.hash != snapshot.fingerprint.hash
+
     async def goto(self, url: str) -> None:
         if url == self.page.url:
             return
@@ -0,0 +1,137 @@
+from collections.abc import Sequence
+from dataclasses import dataclass, field
+
+from notte_core.actions import InteractionAction
+from notte_core.browser.dom_tree import AttributeValue, DomNode
+from notte_core.browser.node_type import NodeRole
+from notte_core.browser.snapshot import BrowserSnapshot
+
+# attributes that identify an element among its siblings: the other attributes (and the text) are its content
+IDENTITY_ATTRIBUTES: tuple[str, ...] = ("tag_name", "id_name", "name", "type", "href", "role")
+
+Signature = tuple[NodeRole | str | AttributeValue, ...]
+
+
+def node_signature(node: DomNode) -> Signature:
+    if node.attributes is None:
+        return (node.role,)
+    return (node.role, *(getattr(node.attributes, name) for name in IDENTITY_ATTRIBUTES))
+
+
+def node_hash(node: DomNode) -> int:
+    """Hash of the content of the node itself (children excluded). Ids are left out: they shift with the page"""
+    attributes = tuple(node.attributes.items()) if node.attributes is not None else ()
+    return hash((node.role, node.text, attributes))
+
+
+def subtree_hash(root: DomNode) -> int:
+    """Merkle hash of the subtree: equal hashes mean identical subtrees (ids excluded)"""
+    # not a dataclass field: cached on the node (subtrees are immutable and shared between trees).
+    # Like `hash`, only comparable within a process
+    stack: list[tuple[DomNode, bool]] = [(root, False)]
+    while stack:
+        node, visited = stack.pop()
+        if "_subtree_hash" in node.__dict__:
+            continue
+        if not visited:
+            stack.append((node, True))
+            stack.extend((child, False) for child in node.children)
+            continue
+        children = tuple(child.__dict__["_subtree_hash"] for child in node.children)
+        node.__dict__["_subtree_hash"] = hash((node_hash(node), children))
+    value: int = root.__dict__["_subtree_hash"]
+    return value
+
+
+def _child_keys(children: Sequence[DomNode]) -> list[tuple[Signature, int]]:
+    """Like an xpath step, a child is identified by its signature and its rank among the siblings with this signature"""
+    ranks: dict[Signature, int] = {}
+    keys: list[tuple[Signature, int]] = []
+    for child in children:
+        signature = node_signature(child)
+        rank = ranks.get(signature, 0)
+        ranks[signature] = rank + 1
+        keys.append((signature, rank))
+    return keys
+
+
+@dataclass
+class DomDiff:
+    """
+    Structural diff between two DOM trees. Nodes are matched by their position in the tree and their identity
+    attributes (see `IDENTITY_ATTRIBUTES`), not by id: ids are assigned sequentially and shift when nodes are added
+    or removed. Children are matched pairwise, top-down, and subtrees with the same Merkle hash are skipped: the
+    diff is computed in O(n).
+    """
+
+    current: DomNode
+    # roots of the subtrees that only exist in the current tree
+    added: list[DomNode] = field(default_factory=list)
+    # roots of the subtrees that only exist in the previous tree
+    removed: list[DomNode] = field(default_factory=list)
+    # nodes of the current tree whose text or attributes changed
+    changed: list[DomNode] = field(default_factory=list)
+    # ids of the interaction nodes of the unchanged subtrees: previous id -> current id
+    unchanged_ids: dict[str, str] = field(default_factory=dict)
+
+    @property
+    def is_empty(self) -> bool:
+        return len(self.added) == 0 and len(self.removed) == 0 and len(self.changed) == 0
+
+    @staticmethod
+    def from_nodes(previous: DomNode, current: DomNode) -> "DomDiff":
+        diff = DomDiff(current=current)
+        # (previous node, current node): one of them is None for removed and added subtrees
+        stack: list[tuple[DomNode | None, DomNode | None]] = (
+            [(previous, current)]
+            if node_signature(previous) == node_signature(current)
+            else [(None, current), (previous, None)]
+        )
+        while stack:
+            previous_node, node = stack.pop()
+            if node is None:
+                assert previous_node is not None
+                diff.removed.append(previous_node)
+                continue
+            if previous_node is None:
+                diff.added.append(node)
+                continue
+            if subtree_hash(previous_node) == subtree_hash(node):
+                diff.unchanged_ids.update(DomDiff._id_mapping(previous_node, node))
+                continue
+            if node_hash(previous_node) != node_hash(node):
+                diff.changed.append(node)
+            previous_children = dict(zip(_child_keys(previous_node.children), previous_node.children))
+            pairs: list[tuple[DomNode | None, DomNode | None]] = [
+                (previous_children.pop(key, None), child)
+                for key, child in zip(_child_keys(node.children), node.children)
+            ]
+            pairs.extend((child, None) for child in previous_children.values())
+            stack.extend(reversed(pairs))
+        return diff
+
+    @staticmethod
+    def from_snapshots(previous: BrowserSnapshot, current: BrowserSnapshot) -> "DomDiff":
+        return DomDiff.from_nodes(previous.dom_node, current.dom_node)
+
+    @staticmethod
+    def _id_mapping(previous: DomNode, current: DomNode) -> dict[str, str]:
+        # identical subtrees (same Merkle hash) have the same structure
+        mapping: dict[str, str] = {}
+        stack = [(previous, current)]
+        while stack:
+            previous_node, current_node = stack.pop()
+            if previous_node.id is not None and current_node.id is not None:
+                mapping[previous_node.id] = current_node.id
+            stack.extend(zip(previous_node.children, current_node.children))
+        return mapping
+
+    def remap_actions(self, actions: Sequence[InteractionAction]) -> list[InteractionAction]:
+        """Actions of the previous tree that target unchanged nodes, with the ids of these nodes in the current tree"""
+        remapped: list[InteractionAction] = []
+        for action in actions:
+            current_id = self.unchanged_ids.get(action.id)
+            if current_id is None:
+                continue
+            remapped.append(action if current_id == action.id else action.model_copy(update={"id": current_id}))
+        return remapped
@@ -1,9 +1,12 @@
 import time
-from collections.abc import Sequence
-from dataclasses import asdict, dataclass, field
-from typing import Callable, ClassVar, Required, TypeAlias, TypeVar
+from collections.abc import Collection, Iterator, Sequence
+from dataclasses import dataclass
+from itertools import islice
+from typing import Any, Callable, ClassVar, Required, TypeAlias, TypeVar, overload
 
 from loguru import logger
+from pydantic.annotated_handlers import GetCoreSchemaHandler
+from pydantic_core import core_schema
 from typing_extensions import TypedDict, override
 
 from notte_core.browser.highlighter import BoundingBox
@@ -117,98 +120,212 @@ These attributes should be added to the DomAttributes class. Fix this ASAP.
         DomErrorBuffer._buffer.clear()
 
 
-@dataclass
+# known attributes that are not kept in `DomAttributes`
+IGNORED_DOM_ATTRIBUTES = frozenset(
+    {
+        "browser_user_highlight_id",
+        "class",
+        "style",
+        "data_jsl10n",
+        "keyshortcuts",
+        "rel",
+        "ng_non_bindable",
+        "c_wiz",
+        "ssk",
+        "soy_skip",
+        "key",
+        "method",
+        "eid",
+        "view",
+        "pivot",
+    }
+)
+
+
+# attributes not rendered by `DomAttributes.relevant_attrs` (unless explicitly included)
+DISABLED_RELEVANT_ATTRIBUTES: frozenset[str] = frozenset(
+    {
+        "tag_name",
+        "class_name",
+        "width",
+        "height",
+        "size",
+        "lang",
+        "dir",
+        "action",
+        "role",
+        "aria_label",
+        "name",
+    }
+)
+
+
+class _DomAttribute:
+    """Read-only access to an attribute stored in `DomAttributes._values`"""
+
+    __slots__: tuple[str, ...] = ("name",)
+
+    def __init__(self) -> None:
+        self.name: str = ""
+
+    def __set_name__(self, owner: type, name: str) -> None:
+        self.name = name
+
+    def __get__(self, instance: "DomAttributes | None", owner: type) -> AttributeValue:
+        if instance is None:
+            return None
+        return instance._values.get(self.name)  # pyright: ignore[reportPrivateUsage]
+
+
+def _attribute() -> Any:
+    return _DomAttribute()
+
+
 class DomAttributes:
+    """
+    HTML attributes of a DOM node. Only the attributes present on the node are stored (most nodes set 2-3 of the
+    fields below): reading a missing attribute returns `None`.
+    """
+
+    __slots__: tuple[str, ...] = ("_values",)
+
     # State attributes
-    modal: bool | None
-    required: bool | None
-    visible: bool | None
-    selected: bool | None
-    checked: bool | None
-    enabled: bool | None
-    focused: bool | None
-    disabled: bool | None
-    pressed: bool | None
-    type: str | None
+    modal: bool | None = _attribute()
+    required: bool | None = _attribute()
+    visible: bool | None = _attribute()
+    selected: bool | None = _attribute()
+    checked: bool | None = _attribute()
+    enabled: bool | None = _attribute()
+    focused: bool | None = _attribute()
+    disabled: bool | None = _attribute()
+    pressed: bool | None = _attribute()
+    type: str | None = _attribute()
 
     # Value attributes
-    value: str | None
-    valuemin: str | None
-    valuemax: str | None
-    description: str | None
-    autocomplete: str | None
-    haspopup: bool | None
-    accesskey: str | None
-    autofocus: bool | None
-    tabindex: int | None
-    multiselectable: bool | None
+    value: str | None = _attribute()
+    valuemin: str | None = _attribute()
+    valuemax: str | None = _attribute()
+    description: str | None = _attribute()
+    autocomplete: str | None = _attribute()
+    haspopup: bool | None = _attribute()
+    accesskey: str | None = _attribute()
+    autofocus: bool | None = _attribute()
+    tabindex: int | None = _attribute()
+    multiselectable: bool | None = _attribute()
 
     # HTML element attributes
-    tag_name: str
-    class_name: str | None
-    id_name: str | None  # stores the id attribute
+    tag_name: str = _attribute()
+    class_name: str | None = _attribute()
+    id_name: str | None = _attribute()  # stores the id attribute
 
     # Resource attributes
-    href: str | None
-    src: str | None
-    srcset: str | None
-    target: str | None
-    ping: str | None
-    data_src: str | None
-    data_srcset: str | None
-    label_for: str | None  # stores the for attribute
+    href: str | None = _attribute()
+    src: str | None = _attribute()
+    srcset: str | None = _attribute()
+    target: str | None = _attribute()
+    ping: str | None = _attribute()
+    data_src: str | None = _attribute()
+    data_srcset: str | None = _attribute()
+    label_for: str | None = _attribute()  # stores the for attribute
 
     # Text attributes
-    placeholder: str | None
-    title: str | None
-    alt: str | None
-    name: str | None
-    autocorrect: str | None
-    autocapitalize: str | None
-    spellcheck: bool | None
-    maxlength: int | None
+    placeholder: str | None = _attribute()
+    title: str | None = _attribute()
+    alt: str | None = _attribute()
+    name: str | None = _attribute()
+    autocorrect: str | None = _attribute()
+    autocapitalize: str | None = _attribute()
+    spellcheck: bool | None = _attribute()
+    maxlength: int | None = _attribute()
 
     # Layout attributes
-    width: int | None
-    height: int | None
-    size: int | None
-    rows: int | None
+    width: int | None = _attribute()
+    height: int | None = _attribute()
+    size: int | None = _attribute()
+    rows: int | None = _attribute()
 
     # Internationalization attributes
-    lang: str | None
-    dir: str | None
+    lang: str | None = _attribute()
+    dir: str | None = _attribute()
 
     # aria attributes
-    action: str | None
-    role: str | None
-    aria_label: str | None
-    aria_labelledby: str | None
-    aria_describedby: str | None
-    aria_hidden: bool | None
-    aria_expanded: bool | None
-    aria_controls: str | None
-    aria_haspopup: bool | None
-    aria_current: str | None
-    aria_autocomplete: str | None
-    aria_selected: bool | None
-    aria_modal: bool | None
-    aria_disabled: bool | None
-    aria_valuenow: int | None
-    aria_live: str | None
-    aria_atomic: bool | None
-    aria_valuemax: int | None
-    aria_valuemin: int | None
-    aria_level: int | None
-    aria_owns: str | None
-    aria_multiselectable: bool | None
-    aria_colindex: int | None
-    aria_colspan: int | None
-    aria_rowindex: int | None
-    aria_rowspan: int | None
-    aria_description: str | None
-    aria_activedescendant: str | None
-    hidden: bool | None
-    expanded: bool | None
+    action: str | None = _attribute()
+    role: str | None = _attribute()
+    aria_label: str | None = _attribute()
+    aria_labelledby: str | None = _attribute()
+    aria_describedby: str | None = _attribute()
+    aria_hidden: bool | None = _attribute()
+    aria_expanded: bool | None = _attribute()
+    aria_controls: str | None = _attribute()
+    aria_haspopup: bool | None = _attribute()
+    aria_current: str | None = _attribute()
+    aria_autocomplete: str | None = _attribute()
+    aria_selected: bool | None = _attribute()
+    aria_modal: bool | None = _attribute()
+    aria_disabled: bool | None = _attribute()
+    aria_valuenow: int | None = _attribute()
+    aria_live: str | None = _attribute()
+    aria_atomic: bool | None = _attribute()
+    aria_valuemax: int | None = _attribute()
+    aria_valuemin: int | None = _attribute()
+    aria_level: int | None = _attribute()
+    aria_owns: str | None = _attribute()
+    aria_multiselectable: bool | None = _attribute()
+    aria_colindex: int | None = _attribute()
+    aria_colspan: int | None = _attribute()
+    aria_rowindex: int | None = _attribute()
+    aria_rowspan: int | None = _attribute()
+    aria_description: str | None = _attribute()
+    aria_activedescendant: str | None = _attribute()
+    hidden: bool | None = _attribute()
+    expanded: bool | None = _attribute()
+
+    def __init__(self, tag_name: str, **attributes: AttributeValue) -> None:
+        unknown = attributes.keys() - DOM_ATTRIBUTE_FIELDS.keys()
+        if len(unknown) > 0:
+            raise TypeError(f"Unknown DOM attributes: {sorted(unknown)}")
+        values: dict[str, AttributeValue] = {"tag_name": tag_name}
+        values.update((key, value) for key, value in attributes.items() if value is not None)
+        # keep the fields order (used to render attributes)
+        self._values: dict[str, AttributeValue] = {
+            key: values[key] for key in sorted(values, key=DOM_ATTRIBUTE_FIELDS.__getitem__)
+        }
+
+    @override
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, DomAttributes):
+            return NotImplemented
+        return self._values == other._values
+
+    __hash__: ClassVar[None] = None  # pyright: ignore[reportIncompatibleMethodOverride]
+
+    @override
+    def __getstate__(self) -> dict[str, AttributeValue]:
+        return self._values
+
+    def __setstate__(self, state: dict[str, AttributeValue]) -> None:
+        self._values = state
+
+    def items(self) -> Iterator[tuple[str, AttributeValue]]:
+        """Present attributes, in fields order"""
+        return iter(self._values.items())
+
+    def to_dict(self) -> dict[str, AttributeValue]:
+        """All fields, `None` for missing attributes"""
+        return {key: self._values.get(key) for key in DOM_ATTRIBUTE_FIELDS}
+
+    @classmethod
+    def __get_pydantic_core_schema__(cls, source: Any, handler: GetCoreSchemaHandler) -> core_schema.CoreSchema:
+        def from_dict(value: dict[str, AttributeValue]) -> "DomAttributes":
+            return cls(**{key: item for key, item in value.items() if item is not None})  # type: ignore[arg-type]
+
+        return core_schema.union_schema(
+            [
+                core_schema.is_instance_schema(cls),
+                core_schema.no_info_after_validator_function(from_dict, core_schema.dict_schema()),
+            ],
+            serialization=core_schema.plain_serializer_function_ser_schema(cls.to_dict),
+        )
 
     def get_resource_url(self) -> str | None:
         if self.src is not None and len(self.src) > 0:
@@ -252,56 +369,24 @@ class DomAttributes:
             )
         }
 
-        keys = set(DomAttributes.__dataclass_fields__.keys())
-        excluded_keys = set(
-            [
-                "browser_user_highlight_id",
-                "class",
-                "style",
-                "data_jsl10n",
-                "keyshortcuts",
-                "rel",
-                "ng_non_bindable",
-                "c_wiz",
-                "ssk",
-                "soy_skip",
-                "key",
-                "method",
-                "eid",
-                "view",
-                "pivot",
-            ]
-        )
-
-        extra_keys = set(kwargs.keys()).difference(keys).difference(excluded_keys)
+        extra_keys = kwargs.keys() - DOM_ATTRIBUTE_FIELDS.keys()
         if len(extra_keys) > 0:
-            DomErrorBuffer.add_error(extra_keys, kwargs)
+            if len(extra_keys - IGNORED_DOM_ATTRIBUTES) > 0:
+                DomErrorBuffer.add_error(extra_keys - IGNORED_DOM_ATTRIBUTES, kwargs)
+            kwargs = {key: value for key, value in kwargs.items() if key not in extra_keys}
 
-        return DomAttributes(**{key: kwargs.get(key, None) for key in keys})  # type: ignore[arg-type]
+        return DomAttributes(**kwargs)  # type: ignore[arg-type]
 
     def relevant_attrs(
         self,
         include_attributes: frozenset[str] | None = None,
         max_len_per_attribute: int | None = None,
     ) -> dict[str, str | bool | int]:
-        disabled_attrs = set(
-            [
-                "tag_name",
-                "class_name",
-                "width",
-                "height",
-                "size",
-                "lang",
-                "dir",
-                "action",
-                "role",
-                "aria_label",
-                "name",
-            ]
-        ).difference(include_attributes or frozenset())
-        dict_attrs = asdict(self)
+        disabled_attrs = DISABLED_RELEVANT_ATTRIBUTES
+        if include_attributes is not None:
+            disabled_attrs = disabled_attrs.difference(include_attributes)
         attrs: dict[str, str | bool | int] = {}
-        for key, value in dict_attrs.items():
+        for key, value in self._values.items():
             if (
                 key not in disabled_attrs
                 and (include_attributes is None or key in include_attributes)
@@ -319,6 +404,57 @@ class DomAttributes:
         return f"{self.__class__.__name__}({attrs})"
 
 
+# field name -> position (order of declaration)
+DOM_ATTRIBUTE_FIELDS: dict[str, int] = {
+    name: position
+    for position, name in enumerate(name for name in DomAttributes.__annotations__ if not name.startswith("_"))
+}
+
+
+# computes the selectors of a node on demand
+SelectorsResolver: TypeAlias = Callable[[], NodeSelectors]
+
+
+class _LazySelectors:
+    """
+    `ComputedDomAttributes.selectors` field: holds either the selectors or a `SelectorsResolver`, called on first
+    access. Selectors are only needed for the few nodes that are acted on.
+    """
+
+    def __init__(self) -> None:
+        self.name: str = "selectors"
+
+    def __set_name__(self, owner: type, name: str) -> None:
+        self.name = name
+
+    def __get__(self, instance: "ComputedDomAttributes | None", owner: type) -> NodeSelectors | None:
+        if instance is None:
+            # dataclass default
+            return None
+        # stored under the field name: set as is when validated by pydantic
+        selectors: NodeSelectors | SelectorsResolver | None = instance.__dict__.get(self.name)
+        if selectors is None or isinstance(selectors, NodeSelectors):
+            return selectors
+        resolved = selectors()
+        instance.__dict__[self.name] = resolved
+        return resolved
+
+    def __set__(self, instance: "ComputedDomAttributes", value: NodeSelectors | SelectorsResolver | None) -> None:
+        instance.__dict__[self.name] = value
+
+    @classmethod
+    def __get_pydantic_core_schema__(cls, source: Any, handler: GetCoreSchemaHandler) -> core_schema.CoreSchema:
+        def serialize(value: Any, serializer: core_schema.SerializerFunctionWrapHandler) -> Any:
+            # unresolved selectors are read from `__dict__` by the dataclass serializer
+            return serializer(value() if callable(value) else value)
+
+        return core_schema.no_info_wrap_validator_function(
+            lambda value, validator: value if callable(value) else validator(value),
+            handler.generate_schema(NodeSelectors | None),
+            serialization=core_schema.wrap_serializer_function_ser_schema(serialize),
+        )
+
+
 @dataclass(frozen=True)
 class ComputedDomAttributes:
     in_viewport: bool = False
@@ -327,12 +463,102 @@ class ComputedDomAttributes:
     is_editable: bool = False
     shadow_root: bool = False
     highlight_index: int | None = None
-    selectors: NodeSelectors | None = None
+    selectors: _LazySelectors = _LazySelectors()
 
-    def set_selectors(self, selectors: NodeSelectors) -> None:
+    def set_selectors(self, selectors: NodeSelectors | SelectorsResolver) -> None:
         object.__setattr__(self, "selectors", selectors)
 
 
+class DomSubtreeIndex:
+    """
+    Euler tour of a `DomNode` tree: node ids are listed in document order, so that the ids of any subtree form
+    the contiguous range `[start, end)` of `ids` (assigned to every node of the tree in a single pass).
+    """
+
+    __slots__: tuple[str, ...] = ("ids", "positions", "unique")
+
+    def __init__(self, root: "DomNode") -> None:
+        self.ids: list[str] = []
+        # position of each id in `ids`, for O(1) membership queries
+        self.positions: dict[str, int] = {}
+        self.unique: bool = True
+        # `start` is set when the node is exited (all its descendants have been numbered)
+        stack: list[tuple[DomNode, int | None]] = [(root, None)]
+        while stack:
+            node, start = stack.pop()
+            if start is not None:
+                object.__setattr__(node, "_subtree_ids", SubtreeIds(self, start, len(self.ids)))
+                continue
+            start = len(self.ids)
+            if node.id is not None:
+                if node.id in self.positions:
+                    self.unique = False
+                else:
+                    self.positions[node.id] = start
+                self.ids.append(node.id)
+            stack.append((node, start))
+            stack.extend((child, None) for child in reversed(node.children))
+
+
+class SubtreeIds(Sequence[str]):
+    """Lazy view of the ids of a subtree: a range of its `DomSubtreeIndex`"""
+
+    __slots__: tuple[str, ...] = ("tree_index", "start", "end")
+
+    def __init__(self, tree_index: DomSubtreeIndex, start: int, end: int) -> None:
+        self.tree_index: DomSubtreeIndex = tree_index
+        self.start: int = start
+        self.end: int = end
+
+    @override
+    def __len__(self) -> int:
+        return self.end - self.start
+
+    @overload
+    def __getitem__(self, i: int) -> str: ...
+
+    @overload
+    def __getitem__(self, i: slice) -> list[str]: ...
+
+    @override
+    def __getitem__(self, i: int | slice) -> str | list[str]:
+        if isinstance(i, slice):
+            return self.tree_index.ids[self.start : self.end][i]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("subtree id index out of range")
+        return self.tree_index.ids[self.start + i]
+
+    @override
+    def __iter__(self) -> Iterator[str]:
+        return islice(self.tree_index.ids, self.start, self.end)
+
+    @override
+    def __contains__(self, value: object) -> bool:
+        if not isinstance(value, str):
+            return False
+        if not self.tree_index.unique:
+            return value in self.tree_index.ids[self.start : self.end]
+        position = self.tree_index.positions.get(value)
+        return position is not None and self.start <= position < self.end
+
+    def isdisjoint(self, ids: Collection[str]) -> bool:
+        if len(ids) < len(self):
+            return not any(id in self for id in ids)
+        return not any(id in ids for id in self)
+
+    @override
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, (SubtreeIds, list)):
+            return list(self) == list(other)  # pyright: ignore[reportUnknownArgumentType]
+        return NotImplemented
+
+    @override
+    def __repr__(self) -> str:
+        return repr(list(self))
+
+
 @dataclass(frozen=True)
 class DomNode:
     id: str | None
@@ -342,7 +568,6 @@ class DomNode:
     children: list["DomNode"]
     attributes: DomAttributes | None
     computed_attributes: ComputedDomAttributes
-    subtree_ids: list[str] = field(init=False, default_factory=list)
     bbox: BoundingBox | None = None
     # parents cannot be set in the constructor because it is a recursive structure
     # we need to set it after the constructor
@@ -356,13 +581,18 @@ class DomNode:
         return f"{self.__class__.__name__}(id={self.id}, role={self.get_role_str()}, text={self.text[:40]}...)\n{children_repr}"
 
     def __post_init__(self) -> None:
-        subtree_ids: list[str] = [] if self.id is None else [self.id]
-        for child in self.children:
-            subtree_ids.extend(child.subtree_ids)
-        object.__setattr__(self, "subtree_ids", subtree_ids)
         if isinstance(self.role, str):
             object.__setattr__(self, "role", NodeRole.from_value(self.role))
 
+    @property
+    def subtree_ids(self) -> SubtreeIds:
+        """Ids of the subtree (this node included) in document order, indexed on first access"""
+        # not a dataclass field: set by `DomSubtreeIndex` (subtrees are immutable, so ranges stay valid)
+        if "_subtree_ids" not in self.__dict__:
+            _ = DomSubtreeIndex(self)
+        subtree_ids: SubtreeIds = self.__dict__["_subtree_ids"]
+        return subtree_ids
+
     def set_parent(self, parent: "DomNode | None") -> None:
         object.__setattr__(self, "parent", parent)
 
@@ -372,6 +602,10 @@ class DomNode:
 
         if self.type == NodeType.TEXT:
             return self.text
+        # memoized: subtrees are immutable (and `depth` does not limit the recursion)
+        if "_inner_text" in self.__dict__:
+            inner_text: str = self.__dict__["_inner_text"]
+            return inner_text
         texts: list[str] = []
         for child in self.children:
             # inner text is not allowed to be hidden
@@ -390,7 +624,9 @@ class DomNode:
                 continue
             else:
                 texts.append(child_text)
-        return " ".join(texts)
+        inner_text = " ".join(texts)
+        self.__dict__["_inner_text"] = inner_text
+        return inner_text
 
     def get_role_str(self) -> str:
         if isinstance(self.role, str):
@@ -483,19 +719,27 @@ class DomNode:
         return self.flatten(keep_filter=lambda node: node.is_image())
 
     def subtree_filter(self, ft: Callable[["DomNode"], bool], verbose: bool = False) -> "DomNode | None":
+        """
+        Subtree of the nodes accepted by `ft`. Unchanged subtrees are shared with this tree (nodes are immutable):
+        only the ancestors of removed nodes are copied.
+        """
+
         def inner(node: DomNode) -> DomNode | None:
             children = node.children
             if not ft(node):
                 return None
 
             filtered_children: list[DomNode] = []
+            changed = False
             for child in children:
                 filtered_child = inner(child)
+                changed = changed or filtered_child is not child
                 if filtered_child is not None:
                     filtered_children.append(filtered_child)
-                    # need copy the parent
             if node.id is None and len(filtered_children) == 0 and node.text.strip() == "":
                 return None
+            if not changed:
+                return node
             return DomNode(
                 id=node.id,
                 type=node.type,
@@ -1,9 +1,12 @@
+import asyncio
 import base64
 from base64 import b64encode
+from collections.abc import Awaitable, Callable
 from typing import Annotated, Any
 
+from loguru import logger
 from PIL import Image
-from pydantic import BaseModel, ConfigDict, Field, field_validator
+from pydantic import BaseModel, ConfigDict, Field, PrivateAttr, field_validator
 from typing_extensions import override
 
 from notte_core.browser.highlighter import BoundingBox, ScreenshotHighlighter
@@ -15,6 +18,14 @@ from notte_core.space import ActionSpace
 from notte_core.utils.url import clean_url
 
 
+def _in_event_loop() -> bool:
+    try:
+        _ = asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
 class TrajectoryProgress(BaseModel):
     current_step: int
     max_steps: int
@@ -24,6 +35,12 @@ class Screenshot(BaseModel):
     raw: bytes = Field(repr=False)
     bboxes: list[BoundingBox] = Field(default_factory=list)
     last_action_id: str | None = None
+    # deferred capture (`lazy` screenshot policy), resolved on first read
+    _loader: Callable[[], bytes] | None = PrivateAttr(default=None)
+    # deferred async capture of the page, resolved by `aload` (on first read when no event loop is running)
+    _capture: Callable[[], Awaitable[bytes]] | None = PrivateAttr(default=None)
+    # if False, the loader is called on every read and the bytes are never retained (e.g screencast frames)
+    _cache: bool = PrivateAttr(default=True)
 
     model_config = {  # type: ignore[reportUnknownMemberType]
         "json_encoders": {
@@ -31,25 +48,73 @@ class Screenshot(BaseModel):
         }
     }
 
+    @staticmethod
+    def lazy(loader: Callable[[], bytes], bboxes: list[BoundingBox], cache: bool = True) -> "Screenshot":
+        screenshot = Screenshot(raw=b"", bboxes=bboxes, last_action_id=None)
+        screenshot._loader = loader
+        screenshot._cache = cache
+        return screenshot
+
+    @staticmethod
+    def deferred(capture: Callable[[], Awaitable[bytes]], bboxes: list[BoundingBox]) -> "Screenshot":
+        screenshot = Screenshot(raw=b"", bboxes=bboxes, last_action_id=None)
+        screenshot._capture = capture
+        return screenshot
+
+    async def aload(self) -> bytes:
+        """Same as `load`: deferred captures must be awaited here when an event loop is running"""
+        if self._capture is not None:
+            capture, self._capture = self._capture, None
+            self.raw = await capture()
+        return self.load()
+
+    def load(self) -> bytes:
+        """Raw screenshot bytes, captured on first call for lazy screenshots (empty if it was never taken)"""
+        if self._capture is not None:
+            if not _in_event_loop():
+                return asyncio.run(self.aload())
+            raise RuntimeError("Deferred screenshot read from a running event loop: `await screenshot.aload()` first")
+        if self._loader is not None and not self._cache:
+            return self._loader()
+        if self._loader is not None:
+            loader, self._loader = self._loader, None
+            self.raw = loader()
+        return self.raw
+
     @override
     def model_dump(self, *args: Any, **kwargs: Any) -> dict[str, Any]:
+        if self._capture is not None and _in_event_loop():
+            # pending deferred captures cannot be awaited here: they are serialized as missing
+            logger.warning(
+                "Deferred screenshot serialized before being captured: `await screenshot.aload()` first to keep it"
+            )
+            raw = self.raw
+        else:
+            raw = self.load()
         data = super().model_dump(*args, **kwargs)
-        data["raw"] = b64encode(self.raw).decode("utf-8")
+        data["raw"] = b64encode(raw).decode("utf-8")
         return data
 
+    async def abytes(self, type: ScreenshotType | None = None) -> bytes:
+        _ = await self.aload()
+        return self.bytes(type)
+
     def bytes(self, type: ScreenshotType | None = None) -> bytes:
         type = type or ("full" if config.highlight_elements else "raw")
+        raw = self.load()
+        if len(raw) == 0:
+            return raw
         # config.highlight_elements
         match type:
             case "raw":
-                return self.raw
+                return raw
             case "full":
-                return ScreenshotHighlighter.forward(self.raw, self.bboxes)
+                return ScreenshotHighlighter.forward(raw, self.bboxes)
             case "last_action":
                 bboxes = [bbox for bbox in self.bboxes if bbox.notte_id == self.last_action_id]
                 if self.last_action_id is None or len(bboxes) == 0:
-                    return self.raw
-                return ScreenshotHighlighter.forward(self.raw, bboxes)
+                    return raw
+                return ScreenshotHighlighter.forward(raw, bboxes)
             case _:  # pyright: ignore[reportUnnecessaryComparison]
                 raise ValueError(f"Invalid screenshot type: {type}")  # pyright: ignore[reportUnreachable]
 
@@ -75,11 +140,24 @@ class Observation(BaseModel):
         return clean_url(self.metadata.url)
 
     @staticmethod
-    def from_snapshot(snapshot: BrowserSnapshot, space: ActionSpace) -> "Observation":
+    def from_snapshot(
+        snapshot: BrowserSnapshot,
+        space: ActionSpace,
+        screenshot_loader: Callable[[], bytes] | None = None,
+        cache_screenshot: bool = True,
+        screenshot_capture: Callable[[], Awaitable[bytes]] | None = None,
+    ) -> "Observation":
         bboxes = [node.bbox.with_id(node.id) for node in snapshot.interaction_nodes() if node.bbox is not None]
+        if len(snapshot.screenshot) > 0 or (screenshot_loader is None and screenshot_capture is None):
+            screenshot = Screenshot(raw=snapshot.screenshot, bboxes=bboxes, last_action_id=None)
+        elif screenshot_loader is not None:
+            screenshot = Screenshot.lazy(screenshot_loader, bboxes, cache=cache_screenshot)
+        else:
+            assert screenshot_capture is not None
+            screenshot = Screenshot.deferred(screenshot_capture, bboxes)
         return Observation(
             metadata=snapshot.metadata,
-            screenshot=Screenshot(raw=snapshot.screenshot, bboxes=bboxes, last_action_id=None),
+            screenshot=screenshot,
             space=space,
             progress=None,
         )
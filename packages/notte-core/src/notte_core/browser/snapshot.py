@@ -5,10 +5,11 @@ from dataclasses import field
 
 from loguru import logger
 from PIL import Image
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, PrivateAttr
 
 from notte_core.actions import InteractionAction
 from notte_core.browser.dom_tree import A11yTree, DomNode, InteractionDomNode
+from notte_core.browser.node_type import NodeRole
 from notte_core.utils.url import clean_url
 
 
@@ -35,26 +36,99 @@ class ViewportData(BaseModel):
         return self.total_height - self.scroll_y - self.viewport_height
 
 
+class NetworkData(BaseModel):
+    # requests seen by the resource blocking profile of the session (since the session started)
+    nb_allowed_requests: int = 0
+    nb_blocked_requests: int = 0
+    blocked_resource_types: dict[str, int] = Field(default_factory=dict)
+
+
 class SnapshotMetadata(BaseModel):
     title: str
     url: str
     viewport: ViewportData
     tabs: list[TabsData]
+    # only set for sessions with a resource blocking profile
+    network: NetworkData | None = None
     timestamp: dt.datetime = field(default_factory=lambda: dt.datetime.now())
 
 
+class PageFingerprint(BaseModel):
+    """Cheap in-page summary used to check whether the interactive content of a page changed"""
+
+    # random id of the page document (changes on navigation)
+    document_id: str
+    # number of DOM mutations observed in the document
+    nb_mutations: int
+    url: str
+    scroll: str
+    # hash of the url, scroll position and interactive elements of the page
+    hash: str
+
+
+class SnapshotIndex:
+    """Lookup tables over the DOM tree of a snapshot, built in a single traversal"""
+
+    def __init__(self, dom_node: DomNode) -> None:
+        self.dom_node: DomNode = dom_node
+        # first node of each id in document order (same as `DomNode.find`)
+        self.nodes: dict[str, DomNode] = {}
+        self.nodes_by_role: dict[NodeRole | str, list[DomNode]] = {}
+        self.image_nodes: list[DomNode] = []
+        self._interaction_sources: list[DomNode] = []
+        self._interaction_nodes: list[InteractionDomNode] | None = None
+        self._interaction_nodes_by_id: dict[str, InteractionDomNode] = {}
+        stack = [dom_node]
+        while stack:
+            node = stack.pop()
+            if node.id is not None:
+                _ = self.nodes.setdefault(node.id, node)
+            self.nodes_by_role.setdefault(node.role, []).append(node)
+            if node.is_interaction():
+                self._interaction_sources.append(node)
+            if node.is_image():
+                self.image_nodes.append(node)
+            stack.extend(reversed(node.children))
+
+    @property
+    def interaction_nodes(self) -> list[InteractionDomNode]:
+        # the conversion computes the inner text of every node: only done on first use
+        if self._interaction_nodes is None:
+            self._interaction_nodes = [node.to_interaction_node() for node in self._interaction_sources]
+            for inode in self._interaction_nodes:
+                _ = self._interaction_nodes_by_id.setdefault(inode.id, inode)
+        return self._interaction_nodes
+
+    @property
+    def interaction_nodes_by_id(self) -> dict[str, InteractionDomNode]:
+        _ = self.interaction_nodes
+        return self._interaction_nodes_by_id
+
+
 class BrowserSnapshot(BaseModel):
     metadata: SnapshotMetadata
     html_content: str
     a11y_tree: A11yTree | None
     dom_node: DomNode
     screenshot: bytes = Field(repr=False)
+    # time spent (in seconds) capturing each component of the snapshot
+    capture_timings: dict[str, float] = Field(default_factory=dict, repr=False)
+    fingerprint: PageFingerprint | None = Field(default=None, repr=False)
 
     model_config = {  # type: ignore[reportUnknownMemberType]
         "json_encoders": {
             bytes: lambda v: b64encode(v).decode("utf-8") if v else None,
         }
     }
+    _index: SnapshotIndex | None = PrivateAttr(default=None)
+
+    @property
+    def index(self) -> SnapshotIndex:
+        """Lookup tables of `dom_node`, built once per snapshot on first use"""
+        # private attributes survive `model_copy`: rebuild if the copy has a different tree
+        if self._index is None or self._index.dom_node is not self.dom_node:
+            self._index = SnapshotIndex(self.dom_node)
+        return self._index
 
     def display_screenshot(self) -> "Image.Image | None":
         from notte_core.utils.image import image_from_bytes
@@ -66,15 +140,31 @@ class BrowserSnapshot(BaseModel):
         return clean_url(self.metadata.url)
 
     def compare_with(self, other: "BrowserSnapshot") -> bool:
-        inodes = {node.id for node in self.dom_node.interaction_nodes()}
-        new_inodes = {node.id for node in other.dom_node.interaction_nodes()}
+        inodes = set(self.index.interaction_nodes_by_id)
+        new_inodes = set(other.index.interaction_nodes_by_id)
         identical = inodes == new_inodes
         if not identical:
             logger.trace(f"Interactive nodes changed: {new_inodes.difference(inodes)}")
         return identical
 
     def interaction_nodes(self) -> Sequence[InteractionDomNode]:
-        return self.dom_node.interaction_nodes()
+        return self.index.interaction_nodes
+
+    def interaction_node(self, id: str) -> InteractionDomNode | None:
+        return self.index.interaction_nodes_by_id.get(id)
+
+    def image_nodes(self) -> Sequence[DomNode]:
+        return self.index.image_nodes
+
+    def nodes_with_role(self, role: NodeRole | str) -> Sequence[DomNode]:
+        return self.index.nodes_by_role.get(NodeRole.from_value(role) if isinstance(role, str) else role, [])
+
+    def find(self, id: str) -> DomNode | None:
+        """Same as `dom_node.find(id)` (interaction nodes are returned as `InteractionDomNode`) without a DFS"""
+        node = self.index.nodes.get(id)
+        if node is not None and node.is_interaction():
+            return self.index.interaction_nodes_by_id.get(id, node)
+        return node
 
     def with_dom_node(self, dom_node: DomNode) -> "BrowserSnapshot":
         return BrowserSnapshot(
@@ -83,6 +173,8 @@ class BrowserSnapshot(BaseModel):
             a11y_tree=self.a11y_tree,
             dom_node=dom_node,
             screenshot=self.screenshot,
+            capture_timings=self.capture_timings,
+            fingerprint=self.fingerprint,
         )
 
     def subgraph_without(
@@ -92,10 +184,10 @@ class BrowserSnapshot(BaseModel):
             subgraph = self.dom_node.subtree_without(roles)
             return self.with_dom_node(subgraph)
         id_existing_actions = set([action.id for action in actions])
-        failed_actions = {node.id for node in self.interaction_nodes() if node.id not in id_existing_actions}
+        failed_actions = {id for id in self.index.interaction_nodes_by_id if id not in id_existing_actions}
 
         def only_failed_actions(node: DomNode) -> bool:
-            return len(set(node.subtree_ids).intersection(failed_actions)) > 0
+            return not node.subtree_ids.isdisjoint(failed_actions)
 
         filtered_graph = self.dom_node.subtree_filter(only_failed_actions)
         if filtered_graph is None:
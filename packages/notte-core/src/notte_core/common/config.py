@@ -16,6 +16,16 @@ if not DEFAULT_CONFIG_PATH.exists():
     raise FileNotFoundError(f"Config file not found: {DEFAULT_CONFIG_PATH}")
 
 ScreenshotType = Literal["raw", "full", "last_action"]
+# when to capture the page screenshot of a snapshot:
+# - always: with every snapshot
+# - lazy: only when the observation screenshot is read (before the next action)
+# - never: snapshots do not include screenshots
+ScreenshotPolicy = Literal["always", "lazy", "never"]
+ScreenshotFormat = Literal["png", "jpeg", "webp"]
+# how the session replay is recorded:
+# - screenshots: every trajectory step keeps its full screenshot
+# - screencast: compressed frames are streamed from the browser into a bounded ring, steps only keep a frame reference
+RecordingMode = Literal["screenshots", "screencast"]
 
 
 class PlaywrightProxySettings(TypedDict, total=False):
@@ -126,6 +136,13 @@ class ScrapingType(StrEnum):
     LLM_EXTRACT = "llm_extract"
 
 
+class DomExtractionBackend(StrEnum):
+    # walk the DOM in page javascript (`buildDomNode.js`)
+    JS = "js"
+    # build the DOM tree from a CDP `DOMSnapshot.captureSnapshot` (chromium only)
+    CDP = "cdp"
+
+
 class RaiseCondition(StrEnum):
     """How to raise an error when the agent fails to complete a step.
 
@@ -159,12 +176,22 @@ class NotteConfigDict(TypedDict, total=False):
     viewport_width: int | None
     viewport_height: int | None
     screenshot_type: ScreenshotType
+    screenshot_policy: ScreenshotPolicy
+    screenshot_format: ScreenshotFormat
+    screenshot_quality: int | None
+    screenshot_scale: float
+    recording_mode: RecordingMode
+    recording_max_frames: int
+    recording_quality: int
+    recording_dir: str | None
     cdp_url: str | None
     browser_type: BrowserType
     web_security: bool
     custom_devtools_frontend: str | None
     debug_port: int | None
     chrome_args: list[str] | None
+    http_cache_dir: str | None
+    http_cache_max_size_mb: int
 
     # [perception]
     enable_perception: bool
@@ -194,6 +221,10 @@ class NotteConfigDict(TypedDict, total=False):
     highlight_elements: bool
     focus_element: int
     viewport_expansion: int
+    incremental_snapshots: bool
+    incremental_max_mutations: int
+    columnar_dom_transfer: bool
+    dom_extraction_backend: DomExtractionBackend
 
     # [playwright wait/timeout]
     timeout_goto_ms: int
@@ -201,6 +232,9 @@ class NotteConfigDict(TypedDict, total=False):
     timeout_action_ms: int
     wait_retry_snapshot_ms: int
     wait_short_ms: int
+    settle_detection: bool
+    wait_settle_quiet_ms: int
+    wait_settle_max_ms: int
     empty_page_max_retry: int
 
     # [misc]
@@ -262,11 +296,21 @@ class NotteConfig(TomlConfig):
     viewport_height: int | None = None
     cdp_url: str | None = None
     screenshot_type: ScreenshotType = "last_action"
+    screenshot_policy: ScreenshotPolicy = "always"
+    screenshot_format: ScreenshotFormat = "png"
+    screenshot_quality: int | None = None
+    screenshot_scale: float = 1.0
+    recording_mode: RecordingMode = "screenshots"
+    recording_max_frames: int = 300
+    recording_quality: int = 60
+    recording_dir: str | None = None
     browser_type: BrowserType
     web_security: bool
     custom_devtools_frontend: str | None = None
     debug_port: int | None = None
     chrome_args: list[str] | None = None
+    http_cache_dir: str | None = None
+    http_cache_max_size_mb: int = 512
 
     # [perception]
     enable_perception: bool = True
@@ -296,6 +340,10 @@ class NotteConfig(TomlConfig):
     highlight_elements: bool
     focus_element: int
     viewport_expansion: int
+    incremental_snapshots: bool
+    incremental_max_mutations: int
+    columnar_dom_transfer: bool
+    dom_extraction_backend: DomExtractionBackend
 
     # [playwright wait/timeout]
     timeout_goto_ms: int
@@ -303,6 +351,9 @@ class NotteConfig(TomlConfig):
     timeout_action_ms: int
     wait_retry_snapshot_ms: int
     wait_short_ms: int
+    settle_detection: bool
+    wait_settle_quiet_ms: int
+    wait_settle_max_ms: int
     empty_page_max_retry: int
 
     # [misc]
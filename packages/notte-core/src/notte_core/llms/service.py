@@ -73,8 +73,15 @@ class LLMService:
             logger.debug(f"llm router '{router}' selected '{base_model}' for approx {token_len} tokens")
         return base_model, eid
 
+    def max_document_tokens(self) -> int:
+        """Token budget of a document in a prompt (keeps room for the instructions and the response)"""
+        return self.context_length() - 2000
+
     def clip_tokens(self, document: str, max_tokens: int | None = None) -> str:
-        max_tokens = max_tokens or (self.context_length() - 2000)
+        max_tokens = max_tokens or self.max_document_tokens()
+        # a token spans at least one byte: short documents do not need to be tokenized
+        if len(document.encode()) <= max_tokens:
+            return document
         tokens = self.tokenizer.encode(document)
         if len(tokens) > max_tokens:
             logger.debug(f"Cannot process document, exceeds max tokens: {len(tokens)} > {max_tokens}. Clipping...")
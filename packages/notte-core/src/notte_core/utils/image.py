@@ -17,6 +17,17 @@ def image_from_bytes(image_bytes: bytes) -> Image.Image | None:
     return image
 
 
+def image_mime_type(image_bytes: bytes) -> str:
+    """Mime type of an encoded image, from its magic number (screenshots can be png, jpeg or webp)"""
+    if image_bytes.startswith(b"\xff\xd8\xff"):
+        return "image/jpeg"
+    if image_bytes[:4] == b"RIFF" and image_bytes[8:12] == b"WEBP":
+        return "image/webp"
+    if image_bytes.startswith((b"GIF87a", b"GIF89a")):
+        return "image/gif"
+    return "image/png"
+
+
 def construct_image_url(base_page_url: str, image_src: str) -> str:
     """
     Constructs absolute URL for image source, handling relative and absolute paths.
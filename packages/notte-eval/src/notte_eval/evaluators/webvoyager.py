@@ -1,3 +1,4 @@
+import base64
 import time
 from typing import ClassVar
 
@@ -10,6 +11,8 @@ except ImportError:
     raise ImportError("WebVoyager evaluator requires installing langchain_openai")
 
 
+from notte_core.utils.image import image_mime_type
+
 from notte_eval.evaluators.evaluator import EvalEnum, EvaluationResponse, Evaluator
 
 
@@ -56,7 +59,8 @@ class WebvoyagerEvaluator(Evaluator):
         screenshot_content = [
             {
                 "type": "image_url",
-                "image_url": {"url": f"data:image/png;base64,{screenshot}"},
+                # 16 base64 characters decode to the 12 bytes needed to identify the format
+                "image_url": {"url": f"data:{image_mime_type(base64.b64decode(screenshot[:16]))};base64,{screenshot}"},
             }
             for screenshot in screenshots
         ]
@@ -409,6 +409,70 @@ class ReplayResponse(SdkBaseModel):
         return data
 
 
+ResourceType = Literal[
+    "document",
+    "stylesheet",
+    "image",
+    "media",
+    "font",
+    "script",
+    "texttrack",
+    "xhr",
+    "fetch",
+    "eventsource",
+    "websocket",
+    "manifest",
+    "other",
+]
+ResourceBlockingPreset = Literal["scraping", "agent"]
+
+# common ads & tracking domains (subdomains are blocked as well)
+DEFAULT_BLOCKED_DOMAINS = [
+    "doubleclick.net",
+    "googlesyndication.com",
+    "googleadservices.com",
+    "google-analytics.com",
+    "googletagmanager.com",
+    "adservice.google.com",
+    "connect.facebook.net",
+    "hotjar.com",
+    "segment.io",
+    "mixpanel.com",
+    "amplitude.com",
+    "adnxs.com",
+    "criteo.com",
+    "taboola.com",
+    "outbrain.com",
+]
+
+
+class ResourceBlockingProfile(SdkBaseModel):
+    resource_types: Annotated[list[ResourceType], Field(description="Resource types that should not be loaded")] = (
+        Field(default_factory=list)
+    )
+    domains: Annotated[list[str], Field(description="Domains (and their subdomains) that should not be loaded")] = (
+        Field(default_factory=list)
+    )
+    allowed_domains: Annotated[
+        list[str], Field(description="Domains that are always loaded, even if they match a blocking rule")
+    ] = Field(default_factory=list)
+    images_without_vision: Annotated[
+        bool, Field(description="Block images when the agent does not use vision (i.e screenshots are not used)")
+    ] = False
+
+    @staticmethod
+    def from_preset(preset: ResourceBlockingPreset) -> "ResourceBlockingProfile":
+        match preset:
+            case "scraping":
+                return ResourceBlockingProfile(
+                    resource_types=["image", "media", "font"], domains=DEFAULT_BLOCKED_DOMAINS
+                )
+            case "agent":
+                return ResourceBlockingProfile(
+                    resource_types=["media"], domains=DEFAULT_BLOCKED_DOMAINS, images_without_vision=True
+                )
+
+
 class SessionStartRequestDict(TypedDict, total=False):
     """Request dictionary for starting a session.
 
@@ -424,6 +488,7 @@ class SessionStartRequestDict(TypedDict, total=False):
         viewport_height: The height of the viewport
         cdp_url: The CDP URL of another remote session provider.
         use_file_storage: Whether FileStorage should be attached to the session.
+        resource_blocking: Requests that should not be loaded by the browser (e.g ads, fonts, media).
     """
 
     headless: bool
@@ -437,6 +502,7 @@ class SessionStartRequestDict(TypedDict, total=False):
     viewport_height: int | None
     cdp_url: str | None
     use_file_storage: bool
+    resource_blocking: ResourceBlockingProfile | ResourceBlockingPreset | None
 
 
 class SessionStartRequest(SdkBaseModel):
@@ -478,6 +544,22 @@ class SessionStartRequest(SdkBaseModel):
         False
     )
 
+    resource_blocking: Annotated[
+        ResourceBlockingProfile | ResourceBlockingPreset | None,
+        Field(
+            description="Requests that should not be loaded by the browser. Either a blocking profile or a preset name ('scraping', 'agent')."
+        ),
+    ] = None
+
+    @field_validator("resource_blocking")
+    @classmethod
+    def resolve_resource_blocking_preset(
+        cls, value: ResourceBlockingProfile | ResourceBlockingPreset | None
+    ) -> ResourceBlockingProfile | None:
+        if isinstance(value, str):
+            return ResourceBlockingProfile.from_preset(value)
+        return value
+
     @field_validator("timeout_minutes")
     @classmethod
     def validate_timeout_minutes(cls, value: int) -> int:
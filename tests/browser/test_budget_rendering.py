@@ -0,0 +1,84 @@
+from typing import cast
+
+from notte_browser.dom.builder import DomNodeBuilder
+from notte_browser.dom.cdp_snapshot import DomSnapshotTreeBuilder
+from notte_browser.dom.types import DomTreeDict
+from notte_browser.rendering.budget import BudgetedMarkdownDomNodeRenderingPipe
+from notte_browser.rendering.markdown import MarkdownDomNodeRenderingPipe
+from notte_core.browser.dom_tree import ComputedDomAttributes, DomNode
+from notte_core.browser.node_type import NodeRole, NodeType
+
+from tests.browser.test_cdp_snapshot import DOM_CONFIG, VIEWPORT, make_snapshot
+
+
+def node(
+    role: NodeRole,
+    text: str = "",
+    id: str | None = None,
+    in_viewport: bool = False,
+    children: list[DomNode] | None = None,
+) -> DomNode:
+    return DomNode(
+        id=id,
+        role=role,
+        type=NodeType.TEXT if role == NodeRole.TEXT else NodeType.INTERACTION if id is not None else NodeType.OTHER,
+        text=text,
+        children=children or [],
+        attributes=None,
+        computed_attributes=ComputedDomAttributes(in_viewport=in_viewport),
+    )
+
+
+def page() -> DomNode:
+    return node(
+        NodeRole.WEBAREA,
+        children=[
+            node(NodeRole.GROUP, children=[node(NodeRole.TEXT, "footer " * 30), node(NodeRole.LINK, "About", "L1")]),
+            node(
+                NodeRole.GROUP,
+                in_viewport=True,
+                children=[node(NodeRole.BUTTON, "Search", "B1", in_viewport=True)],
+            ),
+            node(NodeRole.TEXT, "Results of the search"),
+            node(NodeRole.TEXT, "far away text " * 30),
+        ],
+    )
+
+
+def test_budgeted_rendering_without_clipping_is_the_markdown_rendering():
+    rendering = BudgetedMarkdownDomNodeRenderingPipe.forward(page(), max_tokens=100_000)
+    assert not rendering.clipped
+    assert rendering.document == MarkdownDomNodeRenderingPipe.format(page())
+
+
+def test_budgeted_rendering_keeps_viewport_and_interactions_first():
+    full = BudgetedMarkdownDomNodeRenderingPipe.forward(page(), max_tokens=100_000)
+    rendering = BudgetedMarkdownDomNodeRenderingPipe.forward(page(), max_tokens=40)
+    assert rendering.clipped
+    assert rendering.nb_tokens <= 40 < full.nb_tokens
+    assert 'button B1 "Search"' in rendering.document
+    assert 'link L1 "About"' in rendering.document
+    # text next to the interaction nodes is kept before text far away from them
+    assert "Results of the search" in rendering.document
+    assert "far away text" not in rendering.document
+    assert "footer" not in rendering.document
+    assert rendering.elided_ids == []
+
+    rendering = BudgetedMarkdownDomNodeRenderingPipe.forward(page(), max_tokens=16)
+    assert 'button B1 "Search"' in rendering.document
+    assert rendering.elided_ids == ["L1"]
+
+
+def test_budgeted_rendering_prioritizes_the_viewport_from_the_page_geometry():
+    # every element is a top element: the link 2000px below the fold is visible and interactive but off screen
+    raw = DomSnapshotTreeBuilder(make_snapshot(), VIEWPORT, {**DOM_CONFIG, "viewport_expansion": -1}).build()
+    tree = DomNodeBuilder().build(cast(DomTreeDict, raw), notte_selector="https://example.com/")
+    assert tree is not None
+    units = BudgetedMarkdownDomNodeRenderingPipe.units(tree, include_ids=True)
+    priorities = BudgetedMarkdownDomNodeRenderingPipe.priorities(units)
+    tiers = {unit.node.id: tier for unit, (tier, _, _) in zip(units, priorities) if unit.node.id is not None}
+    assert tiers == {"B1": 0, "L1": 1}
+
+    rendering = BudgetedMarkdownDomNodeRenderingPipe.forward(tree, max_tokens=20)
+    assert 'button B1 "Click"' in rendering.document
+    assert rendering.elided_ids == ["L1"]
@@ -0,0 +1,111 @@
+from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from notte_browser.cache import SharedHttpCache, cache_lifetime
+from patchright.async_api import APIResponse, Route
+
+
+def fake_route(url: str, resource_type: str = "script") -> MagicMock:
+    route = MagicMock(spec=Route)
+    route.request.url = url
+    route.request.method = "GET"
+    route.request.resource_type = resource_type
+    route.request.headers = {}
+    route.fulfill = AsyncMock()
+    route.fallback = AsyncMock()
+    response = MagicMock(spec=APIResponse)
+    response.status = 200
+    response.headers = {"cache-control": "public, max-age=3600", "content-type": "text/javascript"}
+    response.body = AsyncMock(return_value=b"console.log('notte')")
+    route.fetch = AsyncMock(return_value=response)
+    return route
+
+
+def test_cache_lifetime():
+    assert cache_lifetime({"cache-control": "public, max-age=60"}) == 60
+    assert cache_lifetime({"cache-control": "private, max-age=60"}) is None
+    assert cache_lifetime({"cache-control": "no-store"}) is None
+    assert cache_lifetime({"cache-control": "max-age=60", "set-cookie": "session=1"}) is None
+    assert cache_lifetime({"cache-control": "max-age=60", "vary": "Accept-Encoding, Cookie"}) is None
+    assert cache_lifetime({"expires": "Thu, 01 Jan 1970 00:00:00 GMT"}) is None
+    assert cache_lifetime({}) is None, "responses without explicit freshness are not shared"
+
+
+@pytest.mark.asyncio
+async def test_cache_serves_static_assets_across_contexts(tmp_path: Path):
+    cache = SharedHttpCache(tmp_path, max_size_bytes=1024)
+    route = fake_route("https://example.com/app.js")
+    await cache.handle(route)
+    route.fetch.assert_awaited_once()
+    assert cache.stats.stored == 1
+
+    other = fake_route("https://example.com/app.js")
+    await SharedHttpCache(tmp_path, max_size_bytes=1024).handle(other)
+    other.fetch.assert_not_awaited()
+    kwargs = other.fulfill.await_args.kwargs
+    assert kwargs["body"] == b"console.log('notte')"
+    assert kwargs["headers"]["content-type"] == "text/javascript"
+
+    document = fake_route("https://example.com/", resource_type="document")
+    await cache.handle(document)
+    document.fallback.assert_awaited_once()
+
+
+def test_cache_evicts_least_recently_used_entries(tmp_path: Path):
+    cache = SharedHttpCache(tmp_path, max_size_bytes=10)
+    cache.put("https://example.com/a.css", 200, {}, b"aaaa", lifetime=60)
+    cache.put("https://example.com/b.css", 200, {}, b"bbbb", lifetime=60)
+    assert cache.get("https://example.com/a.css") is not None
+    cache.put("https://example.com/c.css", 200, {}, b"cccc", lifetime=60)
+    assert cache.get("https://example.com/b.css") is None
+    assert cache.get("https://example.com/a.css") is not None
+    assert cache.size == 8 and cache.stats.evicted == 1
+    assert len(list(tmp_path.glob("*.body"))) == 2
+
+
+def test_cache_only_serves_varied_responses_to_matching_requests(tmp_path: Path):
+    cache = SharedHttpCache(tmp_path, max_size_bytes=1024)
+    headers = {"cache-control": "max-age=60", "vary": "Accept-Language"}
+    cache.put("https://example.com/app.js", 200, headers, b"fr", lifetime=60, request_headers={"accept-language": "fr"})
+    assert cache.get("https://example.com/app.js", {"accept-language": "en"}) is None
+    assert cache.get("https://example.com/app.js") is None
+    cached = cache.get("https://example.com/app.js", {"accept-language": "fr", "user-agent": "notte"})
+    assert cached is not None and cached[1] == b"fr"
+
+
+def test_cache_eviction_accounts_for_other_processes(tmp_path: Path):
+    cache = SharedHttpCache(tmp_path, max_size_bytes=14)
+    other = SharedHttpCache(tmp_path, max_size_bytes=14)
+    other.put("https://example.com/a.css", 200, {}, b"aaaa", lifetime=60)
+    other.put("https://example.com/b.css", 200, {}, b"bbbb", lifetime=60)
+    # uses from another process also count
+    assert cache.get("https://example.com/a.css") is not None
+    other.put("https://example.com/c.css", 200, {}, b"cccc", lifetime=60)
+    assert other.size == 12, "the usage is tracked incrementally between two scans"
+    # the first write of a process scans the directory: it holds 16 bytes
+    cache.put("https://example.com/d.css", 200, {}, b"dddd", lifetime=60)
+    assert cache.get("https://example.com/b.css") is None
+    assert cache.get("https://example.com/a.css") is not None
+    assert cache.size == 12 and cache.stats.evicted == 1
+    assert len(list(tmp_path.glob("*.body"))) == 3
+
+
+def test_cache_rescans_the_directory_periodically(tmp_path: Path):
+    cache = SharedHttpCache(tmp_path, max_size_bytes=1024)
+    other = SharedHttpCache(tmp_path, max_size_bytes=1024)
+    with patch.object(SharedHttpCache, "rescan_interval", 2):
+        cache.put("https://example.com/a.css", 200, {}, b"aaaa", lifetime=60)
+        other.put("https://example.com/b.css", 200, {}, b"bbbb", lifetime=60)
+        cache.put("https://example.com/c.css", 200, {}, b"cccc", lifetime=60)
+        assert cache.size == 8
+        cache.put("https://example.com/d.css", 200, {}, b"dddd", lifetime=60)
+        assert cache.size == 16
+
+
+def test_cache_loads_entries_on_demand(tmp_path: Path):
+    SharedHttpCache(tmp_path, max_size_bytes=1024).put("https://example.com/a.css", 200, {}, b"aaaa", lifetime=60)
+    cache = SharedHttpCache(tmp_path, max_size_bytes=1024)
+    assert cache.index == {}
+    assert cache.get("https://example.com/a.css") is not None
+    assert list(cache.index) == [SharedHttpCache.key("https://example.com/a.css")]
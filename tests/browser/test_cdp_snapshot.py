@@ -0,0 +1,194 @@
+from pathlib import Path
+from typing import Any
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from notte_browser.dom import parsing
+from notte_browser.dom.cdp_snapshot import DomSnapshotTreeBuilder, Viewport, capture_dom_snapshot_tree
+from notte_browser.dom.parsing import ParseDomTreePipe
+from notte_browser.session import NotteSession
+from notte_core.common.config import DomExtractionBackend, config
+from patchright.async_api import Page
+
+VIEWPORT = Viewport(scroll_x=0, scroll_y=0, width=1280, height=720)
+DOM_CONFIG = {"highlight_elements": True, "focus_element": -1, "viewport_expansion": 0}
+
+
+# (type, name, value, parent, attributes, bounds)
+SnapshotNode = tuple[int, str, str, int, dict[str, str], list[float] | None]
+
+
+def make_snapshot(nodes: list[SnapshotNode] | None = None) -> dict[str, Any]:
+    strings: list[str] = []
+    string_indices: dict[str, int] = {}
+
+    def s(value: str) -> int:
+        if value not in string_indices:
+            string_indices[value] = len(strings)
+            strings.append(value)
+        return string_indices[value]
+
+    nodes = nodes or [
+        (9, "#document", "", -1, {}, None),
+        (1, "HTML", "", 0, {}, [0, 0, 1280, 3000]),
+        (1, "BODY", "", 1, {}, [0, 0, 1280, 3000]),
+        (1, "BUTTON", "", 2, {"id": "submit"}, [10, 10, 100, 30]),
+        (3, "#text", " Click ", 3, {}, [20, 15, 40, 20]),
+        (1, "DIV", "", 2, {}, [0, 100, 1280, 50]),
+        (1, "DIV", "", 2, {}, [0, 2000, 1280, 50]),
+        (1, "A", "", 6, {"href": "/"}, [0, 2000, 100, 20]),
+        (1, "SCRIPT", "", 2, {}, None),
+    ]
+    layout = [(index, bounds) for index, (*_, bounds) in enumerate(nodes) if bounds is not None]
+    styles = [s("block"), s("visible"), s("1"), s("auto"), s("auto")]
+    return {
+        "strings": strings,
+        "documents": [
+            {
+                "documentURL": s("https://example.com/"),
+                "scrollOffsetX": 0,
+                "scrollOffsetY": 0,
+                "nodes": {
+                    "parentIndex": [parent for _, _, _, parent, _, _ in nodes],
+                    "nodeType": [node_type for node_type, *_ in nodes],
+                    "nodeName": [s(name) for _, name, *_ in nodes],
+                    "nodeValue": [s(value) if value else -1 for _, _, value, *_ in nodes],
+                    "attributes": [
+                        [s(item) for pair in attributes.items() for item in pair] for *_, attributes, _ in nodes
+                    ],
+                },
+                "layout": {
+                    "nodeIndex": [index for index, _ in layout],
+                    "bounds": [bounds for _, bounds in layout],
+                    "styles": [styles for _ in layout],
+                    "paintOrders": list(range(len(layout))),
+                },
+            }
+        ],
+    }
+
+
+def test_builder_matches_js_tree_layout():
+    tree = DomSnapshotTreeBuilder(make_snapshot(), VIEWPORT, DOM_CONFIG).build()
+    assert tree is not None
+    assert tree["xpath"] == "html/body"
+    button, first_div, second_div = tree["children"][:3]
+    assert len(tree["children"]) == 4 and tree["children"][3] is None, "script tags should be skipped"
+    assert button["xpath"] == "html/body/button"
+    assert button["isInteractive"] and button["isVisible"] and button["isTopElement"]
+    assert button["highlightIndex"] == 0
+    assert button["isInViewport"] and first_div["isInViewport"] and not second_div["isInViewport"]
+    assert button["bbox"]["width"] == 100
+    assert button["children"] == [{"type": "TEXT_NODE", "text": "Click", "isVisible": True}]
+    assert first_div["xpath"] == "html/body/div[1]"
+    assert second_div["xpath"] == "html/body/div[2]"
+    link = second_div["children"][0]
+    assert link["isInteractive"] and not link["isTopElement"], "links outside of the viewport are not top elements"
+    assert "highlightIndex" not in link
+
+
+def test_builder_handles_deep_trees():
+    depth = 5000
+    nodes: list[SnapshotNode] = [
+        (9, "#document", "", -1, {}, None),
+        (1, "HTML", "", 0, {}, [0, 0, 1280, 720]),
+        (1, "BODY", "", 1, {}, [0, 0, 1280, 720]),
+    ]
+    # each div is the child of the previous node
+    nodes.extend((1, "DIV", "", parent, {}, [0, 0, 1280, 720]) for parent in range(2, 2 + depth))
+    nodes.append((1, "BUTTON", "", 1 + depth + 1, {}, [10, 10, 100, 30]))
+    tree = DomSnapshotTreeBuilder(make_snapshot(nodes), VIEWPORT, DOM_CONFIG).build()
+    node = tree
+    # body, then the divs
+    for _ in range(depth + 1):
+        assert node is not None and len(node["children"]) == 1
+        node = node["children"][0]
+    assert node is not None and node["tagName"] == "button"
+    assert node["xpath"] == "html/body" + "/div" * depth + "/button"
+    assert node["highlightIndex"] == 0
+
+
+@pytest.mark.asyncio
+async def test_cdp_backend_produces_interaction_ids(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(
+        parsing, "config", config.model_copy(update={"dom_extraction_backend": DomExtractionBackend.CDP})
+    )
+    page = MagicMock(spec=Page)
+    page.url = "https://example.com/"
+    page.evaluate = AsyncMock(return_value=[0, 0, 1280, 720])
+    session = MagicMock()
+    session.send = AsyncMock(return_value=make_snapshot())
+    node = await ParseDomTreePipe.forward(page, session)
+    assert [inode.id for inode in node.interaction_nodes()] == ["B1"]
+    assert session.send.await_args.args[0] == "DOMSnapshot.captureSnapshot"
+
+
+# edge cases of the CDP backend: default `draggable` values, visually hidden elements, shadow roots, iframes and
+# content below the fold
+PARITY_PAGE = """<html><body>
+<h1>Parity</h1>
+<img src="data:image/gif;base64,R0lGODlhAQABAAAAACw=" width="20" height="20" alt="default">
+<img src="data:image/gif;base64,R0lGODlhAQABAAAAACw=" width="20" height="20" draggable="auto" alt="auto">
+<img src="data:image/gif;base64,R0lGODlhAQABAAAAACw=" width="20" height="20" draggable="false" alt="not draggable">
+<div draggable="true">drag me</div>
+<span style="position:absolute;clip:rect(0,0,0,0);width:1px;height:1px;overflow:hidden">screen reader only</span>
+<div style="display:none"><button>hidden</button></div>
+<div style="visibility:hidden"><a href="/x">invisible</a></div>
+<custom-card><span>light</span></custom-card>
+<iframe srcdoc="<button>in frame</button><a href='/f'>frame link</a>" width="300" height="100"></iframe>
+<div style="height:2000px">tall</div>
+<button>far below</button>
+<script>
+customElements.define('custom-card', class extends HTMLElement {
+  constructor() { super(); this.attachShadow({mode: 'open'}).innerHTML = '<button>shadow</button><slot></slot>'; }
+});
+</script>
+</body></html>"""
+
+
+def tree_summary(tree: dict[str, Any] | None) -> list[tuple[Any, ...]]:
+    """Pre-order node fields compared between the backends (bboxes rounded to the pixel)"""
+    summary: list[tuple[Any, ...]] = []
+    stack = [tree]
+    while stack:
+        node = stack.pop()
+        if node is None:
+            continue
+        if node.get("type") == "TEXT_NODE":
+            summary.append((node["text"], node["isVisible"]))
+            continue
+        if node.get("tagName") is None:
+            # comments: dropped when building the notte nodes
+            continue
+        summary.append(
+            (
+                node["xpath"],
+                node["isInteractive"],
+                node["isVisible"],
+                node["isTopElement"],
+                node["isEditable"],
+                node["isInViewport"],
+                node.get("highlightIndex"),
+                node.get("shadowRoot", False),
+                {name: round(value) for name, value in (node.get("bbox") or {}).items()},
+            )
+        )
+        stack.extend(reversed(node["children"]))
+    return summary
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("page_file", ["github_signin.html", "duckduckgo.html", None])
+async def test_cdp_backend_matches_js_extractor(page_file: str | None):
+    async with NotteSession(
+        headless=True, enable_perception=False, viewport_width=1280, viewport_height=720
+    ) as session:
+        page = session.window.page
+        if page_file is None:
+            await page.set_content(PARITY_PAGE)
+        else:
+            _ = await page.goto((Path(__file__).parent.parent / "data" / page_file).resolve().as_uri())
+        js_tree = await ParseDomTreePipe.extract(page, {**DOM_CONFIG, "highlight_elements": True})
+        cdp_session = await page.context.new_cdp_session(page)
+        cdp_tree = await capture_dom_snapshot_tree(page, cdp_session, DOM_CONFIG)
+        assert tree_summary(cdp_tree) == tree_summary(js_tree)  # pyright: ignore[reportArgumentType]
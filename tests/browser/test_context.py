@@ -258,3 +258,22 @@ def test_subgraph_without_existing_actions(
         ]
     )
     assert subgraph is None
+
+
+def test_snapshot_index_is_built_once(nested_graph: DomNode, browser_snapshot: BrowserSnapshot) -> None:
+    context = browser_snapshot.with_dom_node(nested_graph)
+    inodes = context.interaction_nodes()
+    assert context.interaction_nodes() is inodes
+    assert [inode.id for inode in inodes] == [inode.id for inode in nested_graph.interaction_nodes()]
+    for inode in inodes:
+        assert context.interaction_node(inode.id) is inode
+        assert context.find(inode.id) is inode
+        assert context.find(inode.id) == nested_graph.find(inode.id)
+    assert context.find("unknown") is None
+    assert context.interaction_node("unknown") is None
+    assert list(context.nodes_with_role("button")) == [
+        node for node in nested_graph.flatten() if node.role == NodeRole.BUTTON
+    ]
+    # copies with another tree get their own index
+    copy = context.model_copy(update={"dom_node": browser_snapshot.dom_node})
+    assert [inode.id for inode in copy.interaction_nodes()] == ["B2"]
@@ -0,0 +1,171 @@
+import pickle
+from typing import Any
+
+from notte_browser.dom.builder import DomNodeBuilder
+from notte_browser.dom.id_generation import generate_sequential_ids
+from notte_browser.dom.parsing import ParseDomTreePipe
+from notte_browser.dom.types import DomTreeDict
+from notte_core.browser.dom_tree import DomNode
+
+BBOX = {
+    "x": 0,
+    "y": 0,
+    "width": 10,
+    "height": 10,
+    "scroll_x": 0,
+    "scroll_y": 0,
+    "viewport_width": 1280,
+    "viewport_height": 720,
+}
+
+
+def element(
+    tag: str, xpath: str, children: list[Any], highlight: int | None = None, **attributes: str
+) -> dict[str, Any]:
+    return {
+        "type": "ELEMENT_NODE",
+        "tagName": tag,
+        "xpath": xpath,
+        "attributes": attributes,
+        "isVisible": True,
+        "isInteractive": highlight is not None,
+        "isTopElement": True,
+        "isEditable": tag == "input",
+        "isInViewport": True,
+        "highlightIndex": highlight,
+        "shadowRoot": False,
+        "children": children,
+        "bbox": BBOX if highlight is not None else None,
+    }
+
+
+def text(value: str, visible: bool = True) -> dict[str, Any]:
+    return {"type": "TEXT_NODE", "text": value, "isVisible": visible}
+
+
+def page_tree() -> DomTreeDict:
+    tree = element(
+        "body",
+        "html/body",
+        [
+            element(
+                "button",
+                "html/body/button",
+                [text(" Sign "), element("b", "html/body/button/b", [text("in")])],
+                0,
+                type="button",
+            ),
+            element(
+                "a", "html/body/a", [element("span", "html/body/a/span", [text("Home")]), text("x", False)], 1, href="/"
+            ),
+            element("input", "html/body/input", [], 2, type="text", placeholder="Search", **{"aria-label": "query"}),
+            element("div", "html/body/div", [text("hello"), None, element("wiz_menu_item", "html/body/div/x", [])]),
+            element(
+                "iframe",
+                "html/body/iframe",
+                [element("html", "html", [element("a", "html/a", [text("Inner link")], 3, href="/inner")])],
+            ),
+        ],
+    )
+    tree["children"][3]["shadowRoot"] = True
+    return tree  # pyright: ignore[reportReturnType]
+
+
+def legacy_build(tree: DomTreeDict) -> DomNode:
+    parsed = ParseDomTreePipe._parse_node(  # pyright: ignore[reportPrivateUsage]
+        tree,
+        parent=None,
+        in_iframe=False,
+        in_shadow_root=False,
+        iframe_parent_css_paths=[],
+        notte_selector="https://example.com",
+    )
+    assert parsed is not None
+    return generate_sequential_ids(parsed).to_notte_domnode()
+
+
+def assert_same_tree(actual: DomNode, expected: DomNode) -> None:
+    assert actual.id == expected.id
+    assert actual.role == expected.role
+    assert actual.type == expected.type
+    assert actual.text == expected.text
+    assert actual.attributes == expected.attributes
+    assert actual.computed_attributes == expected.computed_attributes
+    assert actual.bbox == expected.bbox
+    assert actual.subtree_ids == expected.subtree_ids
+    assert len(actual.children) == len(expected.children)
+    for actual_child, expected_child in zip(actual.children, expected.children):
+        assert actual_child.parent is actual
+        assert_same_tree(actual_child, expected_child)
+
+
+def test_builder_matches_legacy_conversion():
+    expected = legacy_build(page_tree())
+    actual = DomNodeBuilder().build(page_tree(), notte_selector="https://example.com")
+    assert actual is not None
+    assert_same_tree(actual, expected)
+    assert [node.id for node in actual.interaction_nodes()] == ["B1", "L1", "I1", "L2"]
+    assert actual.children[0].text == "Sign in"
+    assert actual.children[1].text == "Home"
+
+
+def test_builder_handles_deep_trees():
+    depth = 5_000
+    tree = text("leaf")
+    for i in range(depth):
+        tree = element("div", f"div[{i}]", [tree])
+    node = DomNodeBuilder().build(tree, notte_selector="https://example.com")  # pyright: ignore[reportArgumentType]
+    assert node is not None
+    for _ in range(depth):
+        node = node.children[0]
+    assert node.text == "leaf"
+
+
+def test_builder_resolves_selectors_on_access():
+    expected = legacy_build(page_tree())
+    actual = DomNodeBuilder().build(page_tree(), notte_selector="https://example.com")
+    assert actual is not None
+    selectors = [node.computed_attributes.__dict__["selectors"] for node in actual.flatten()]
+    # text nodes have no selectors
+    assert all(callable(value) for value in selectors if value is not None)
+    # deepest node first: the selectors of its ancestors are resolved along the way
+    inner_link = actual.find("L2")
+    assert inner_link is not None
+    assert inner_link.computed_attributes.selectors == expected.find("L2").computed_attributes.selectors  # pyright: ignore[reportOptionalMemberAccess]
+    assert not callable(inner_link.computed_attributes.__dict__["selectors"])
+    assert callable(actual.find("B1").computed_attributes.__dict__["selectors"])  # pyright: ignore[reportOptionalMemberAccess]
+
+    # unresolved selectors survive serialization
+    restored = pickle.loads(pickle.dumps(actual))
+    assert_same_tree(restored, expected)
+    assert_same_tree(actual, expected)
+
+
+def test_builder_resolves_selectors_of_deep_trees():
+    depth = 5_000
+    tree = element("a", f"{'div/' * depth}a", [text("leaf")], 0, href="/")
+    for i in range(depth):
+        tree = element("div", "/".join(["div"] * (depth - i)), [tree])
+    node = DomNodeBuilder().build(tree, notte_selector="https://example.com")  # pyright: ignore[reportArgumentType]
+    assert node is not None
+    for _ in range(depth):
+        node = node.children[0]
+    selectors = node.computed_attributes.selectors
+    assert selectors is not None
+    assert selectors.notte_selector.startswith("https://example.com:")
+    assert selectors.notte_selector.count(":") == 2 * (depth + 1) + 1
+
+
+def test_builder_css_paths_use_the_page_attributes():
+    tree = element("body", "html/body", [element("button", "html/body/button", [], 0, **{"x-aria-label": "Buy"})])
+    node = DomNodeBuilder().build(tree, notte_selector="https://example.com")  # pyright: ignore[reportArgumentType]
+    assert node is not None
+    button = node.find("B1")
+    assert button is not None
+    assert button.attributes is not None and button.attributes.aria_label == "Buy"
+    selectors = button.computed_attributes.selectors
+    assert selectors is not None
+    # the attribute of the page is `x-aria-label`: the cleaned up name must not leak into the selectors
+    assert "aria-label" not in selectors.css_selector
+    # the raw tree is left untouched
+    assert tree["children"][0]["attributes"] == {"x-aria-label": "Buy"}
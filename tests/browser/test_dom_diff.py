@@ -0,0 +1,82 @@
+from notte_core.actions import ClickAction
+from notte_core.browser.diff import DomDiff
+from notte_core.browser.dom_tree import ComputedDomAttributes, DomAttributes, DomNode
+from notte_core.browser.node_type import NodeRole, NodeType
+
+
+def node(
+    role: NodeRole,
+    text: str = "",
+    id: str | None = None,
+    children: list[DomNode] | None = None,
+    **attributes: str,
+) -> DomNode:
+    return DomNode(
+        id=id,
+        role=role,
+        type=NodeType.TEXT if role == NodeRole.TEXT else NodeType.INTERACTION if id is not None else NodeType.OTHER,
+        text=text,
+        children=children or [],
+        attributes=DomAttributes.safe_init(**attributes) if len(attributes) > 0 else None,
+        computed_attributes=ComputedDomAttributes(),
+    )
+
+
+def link(id: str, href: str, text: str = "") -> DomNode:
+    return node(NodeRole.LINK, text or href, id, tag_name="a", href=href)
+
+
+def page(links: list[DomNode], title: str = "Results") -> DomNode:
+    return node(
+        NodeRole.WEBAREA,
+        children=[
+            node(NodeRole.HEADING, children=[node(NodeRole.TEXT, title)]),
+            node(NodeRole.LIST, children=links),
+            node(NodeRole.BUTTON, "Next", "B1", tag_name="button"),
+        ],
+    )
+
+
+def test_identical_trees_have_an_empty_diff():
+    previous = page([link("L1", "/a"), link("L2", "/b")])
+    current = page([link("L1", "/a"), link("L2", "/b")])
+    diff = DomDiff.from_nodes(previous, current)
+    assert diff.is_empty
+    assert diff.unchanged_ids == {"L1": "L1", "L2": "L2", "B1": "B1"}
+
+
+def test_diff_matches_nodes_by_identity_not_by_id():
+    previous = page([link("L1", "/a"), link("L2", "/b"), link("L3", "/c")])
+    # a link is inserted first (ids shift), another one is removed and the title changes
+    current = page([link("L1", "/new"), link("L2", "/a"), link("L3", "/b")], title="More results")
+    diff = DomDiff.from_nodes(previous, current)
+    assert [n.attributes.href for n in diff.added if n.attributes is not None] == ["/new"]
+    assert [n.attributes.href for n in diff.removed if n.attributes is not None] == ["/c"]
+    assert [n.text for n in diff.changed] == ["More results"]
+    assert diff.unchanged_ids == {"L1": "L2", "L2": "L3", "B1": "B1"}
+
+
+def test_remap_actions_to_the_current_ids():
+    previous = page([link("L1", "/a"), link("L2", "/b")])
+    current = page([link("L1", "/new"), link("L2", "/a"), link("L3", "/b", text="changed")])
+    actions = [
+        ClickAction(id="L1", description="Open a", category="Navigation"),
+        ClickAction(id="L2", description="Open b", category="Navigation"),
+        ClickAction(id="B1", description="Next page", category="Navigation"),
+    ]
+    remapped = DomDiff.from_nodes(previous, current).remap_actions(actions)
+    # `/b` changed: its action has to be listed again
+    assert [(action.id, action.description) for action in remapped] == [("L2", "Open a"), ("B1", "Next page")]
+    assert actions[0].id == "L1"
+
+
+def test_diff_of_deep_trees():
+    depth = 5_000
+    previous = node(NodeRole.TEXT, "leaf")
+    current = node(NodeRole.TEXT, "new leaf")
+    for _ in range(depth):
+        previous = node(NodeRole.GROUP, children=[previous])
+        current = node(NodeRole.GROUP, children=[current])
+    diff = DomDiff.from_nodes(previous, current)
+    assert [n.text for n in diff.changed] == ["new leaf"]
+    assert diff.added == [] and diff.removed == []
@@ -0,0 +1,167 @@
+import json
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from notte_browser.dom import parsing
+from notte_browser.dom.columnar import decode_columnar_tree
+from notte_browser.dom.parsing import (
+    DOM_EXTRACTOR_CALL_JS,
+    ParseDomTreePipe,
+    dom_extractor_install_js,
+    dom_extractor_version,
+)
+from notte_core.common.config import config
+from patchright.async_api import Page
+
+
+def body_tree() -> dict[str, object]:
+    return {
+        "type": "ELEMENT_NODE",
+        "tagName": "body",
+        "xpath": "html/body",
+        "attributes": {},
+        "isVisible": True,
+        "isInteractive": False,
+        "isTopElement": True,
+        "isEditable": False,
+        "isInViewport": True,
+        "highlightIndex": None,
+        "shadowRoot": False,
+        "children": [{"type": "TEXT_NODE", "text": "hello", "isVisible": True}],
+        "bbox": None,
+    }
+
+
+def test_install_script_is_cached_and_versioned():
+    assert dom_extractor_install_js() is dom_extractor_install_js()
+    assert dom_extractor_version() in dom_extractor_install_js()
+
+
+@pytest.mark.asyncio
+async def test_extractor_is_invoked_by_name():
+    page = MagicMock(spec=Page)
+    page.url = "https://example.com"
+    page.evaluate = AsyncMock(return_value={"tree": body_tree()})
+    _ = await ParseDomTreePipe.parse_dom_tree(page)
+    assert page.evaluate.await_count == 1
+    assert page.evaluate.await_args_list[0].args[0] == DOM_EXTRACTOR_CALL_JS
+
+
+@pytest.mark.asyncio
+async def test_extractor_is_reinjected_when_missing():
+    page = MagicMock(spec=Page)
+    page.url = "https://example.com"
+    page.evaluate = AsyncMock(side_effect=[None, None, {"tree": body_tree()}])
+    _ = await ParseDomTreePipe.parse_dom_tree(page)
+    scripts = [call.args[0] for call in page.evaluate.await_args_list]
+    assert scripts == [DOM_EXTRACTOR_CALL_JS, dom_extractor_install_js(), DOM_EXTRACTOR_CALL_JS]
+
+
+def element(nid: int, tag: str, children: list[dict[str, object]]) -> dict[str, object]:
+    return {**body_tree(), "nid": nid, "tagName": tag, "xpath": f"html/body/{tag}", "children": children}
+
+
+def text(value: str) -> dict[str, object]:
+    return {"type": "TEXT_NODE", "text": value, "isVisible": True}
+
+
+@pytest.mark.asyncio
+async def test_incremental_snapshot_patches_changed_subtrees(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(parsing, "config", config.model_copy(update={"incremental_snapshots": True}))
+    full = {**body_tree(), "nid": 0, "children": [element(1, "div", [text("old")]), element(2, "p", [text("same")])]}
+    page = MagicMock(spec=Page)
+    page.url = "https://example.com"
+    page.evaluate = AsyncMock(
+        side_effect=[
+            {"tree": {"generation": "g1", "tree": full}},
+            {"tree": {"generation": "g1", "patches": [{"nid": 1, "tree": element(1, "div", [text("new")])}]}},
+        ]
+    )
+    first = await ParseDomTreePipe.parse_dom_tree(page)
+    assert "old" in first.to_notte_domnode().inner_text()
+    second = await ParseDomTreePipe.parse_dom_tree(page)
+    assert "new" in second.to_notte_domnode().inner_text() and "same" in second.to_notte_domnode().inner_text()
+    assert "old" not in second.to_notte_domnode().inner_text()
+    # the previous generation is sent to the page so that it can decide between patch and full resync
+    assert page.evaluate.await_args_list[1].args[1][1]["generation"] == "g1"
+
+
+@pytest.mark.asyncio
+async def test_incremental_snapshot_resyncs_on_unknown_subtree(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(parsing, "config", config.model_copy(update={"incremental_snapshots": True}))
+    page = MagicMock(spec=Page)
+    page.url = "https://example.com"
+    page.evaluate = AsyncMock(
+        side_effect=[
+            {"tree": {"generation": "g1", "tree": {**body_tree(), "nid": 0}}},
+            {"tree": {"generation": "g1", "patches": [{"nid": 42, "tree": element(42, "div", [])}]}},
+            {"tree": {"generation": "g2", "tree": {**body_tree(), "nid": 0, "children": [text("resync")]}}},
+        ]
+    )
+    _ = await ParseDomTreePipe.parse_dom_tree(page)
+    node = await ParseDomTreePipe.parse_dom_tree(page)
+    assert "resync" in node.to_notte_domnode().inner_text()
+    assert page.evaluate.await_args_list[2].args[1][1]["generation"] is None
+    assert ParseDomTreePipe.incremental_cache[page].generation == "g2"
+
+
+def test_decode_columnar_tree():
+    payload = json.dumps(
+        {
+            "strings": ["body", "html/body", "class", "main", "div", "div[1]", "hello"],
+            "parents": [-1, 0, 1],
+            "flags": [2 | 8, 2 | 4 | 8 | 64, 1 | 2],
+            "tags": [0, 4, -1],
+            "texts": [-1, -1, 6],
+            "xpaths": [1, 5, -1],
+            "highlights": [-1, 0, -1],
+            "nids": [-1, -1, -1],
+            "attributes": [2, 3],
+            "attribute_offsets": [0, 0, 2, 2],
+            "bboxes": {"1": {"x": 1.0, "y": 2.0}},
+        }
+    )
+    tree = decode_columnar_tree(payload)
+    assert tree is not None
+    div = tree["children"][0]
+    assert div["xpath"] == "html/body/div[1]"
+    assert div["attributes"] == {"class": "main"}
+    assert div["isInteractive"] and div["highlightIndex"] == 0
+    assert div["bbox"] == {"x": 1.0, "y": 2.0}
+    assert div["children"] == [{"type": "TEXT_NODE", "text": "hello", "isVisible": True}]
+    assert "highlightIndex" not in tree and not tree["isInteractive"]
+
+
+@pytest.mark.asyncio
+async def test_incremental_snapshot_refreshes_geometry_of_unchanged_elements(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(parsing, "config", config.model_copy(update={"incremental_snapshots": True}))
+    button = {**element(1, "button", [text("Buy")]), "isInteractive": True, "highlightIndex": 0}
+    page = MagicMock(spec=Page)
+    page.url = "https://example.com"
+    page.evaluate = AsyncMock(
+        side_effect=[
+            {"tree": {"generation": "g1", "tree": {**body_tree(), "nid": 0, "children": [button]}}},
+            # the button got covered by an overlay: its subtree did not change but it is no longer the top element
+            {
+                "tree": {
+                    "generation": "g1",
+                    "patches": [],
+                    "updates": [
+                        {
+                            "nid": 1,
+                            "isVisible": True,
+                            "isTopElement": False,
+                            "isInViewport": True,
+                            "highlightIndex": None,
+                            "bbox": None,
+                        }
+                    ],
+                }
+            },
+        ]
+    )
+    first = await ParseDomTreePipe.extract_dom_tree(page)
+    assert first["children"][0]["highlightIndex"] == 0  # pyright: ignore[reportOptionalSubscript]
+    second = await ParseDomTreePipe.extract_dom_tree(page)
+    assert second["children"][0]["highlightIndex"] is None  # pyright: ignore[reportOptionalSubscript]
+    assert second["children"][0]["isTopElement"] is False  # pyright: ignore[reportOptionalSubscript]
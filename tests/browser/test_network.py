@@ -0,0 +1,61 @@
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from notte_browser.network import ResourceBlocker
+from notte_browser.window import BrowserWindowOptions
+from notte_sdk.types import ResourceBlockingProfile, SessionStartRequest
+from patchright.async_api import BrowserContext, Route
+
+
+def fake_route(resource_type: str, url: str, navigation: bool = False) -> MagicMock:
+    route = MagicMock(spec=Route)
+    route.request.resource_type = resource_type
+    route.request.url = url
+    route.request.is_navigation_request.return_value = navigation
+    route.request.frame.parent_frame = None
+    route.abort = AsyncMock()
+    route.fallback = AsyncMock()
+    return route
+
+
+def test_presets_are_resolved_by_the_session_request():
+    options = BrowserWindowOptions.from_request(SessionStartRequest(resource_blocking="scraping"))
+    assert options.resource_blocking is not None
+    assert "font" in options.resource_blocking.resource_types
+    assert BrowserWindowOptions.from_request(SessionStartRequest()).resource_blocking is None
+
+
+def test_blocking_rules():
+    blocker = ResourceBlocker(
+        ResourceBlockingProfile(
+            resource_types=["font"],
+            domains=["doubleclick.net"],
+            allowed_domains=["fonts.example.com"],
+            images_without_vision=True,
+        )
+    )
+    assert blocker.should_block("font", "https://example.com/font.woff2")
+    assert not blocker.should_block("font", "https://fonts.example.com/font.woff2")
+    assert blocker.should_block("script", "https://ad.doubleclick.net/tag.js")
+    assert not blocker.should_block("script", "https://notdoubleclick.net/tag.js")
+    assert not blocker.should_block("image", "https://example.com/logo.png")
+    blocker.use_vision = False
+    assert blocker.should_block("image", "https://example.com/logo.png")
+
+
+@pytest.mark.asyncio
+async def test_blocker_counts_requests_and_never_blocks_page_navigations():
+    context = MagicMock(spec=BrowserContext)
+    context.route = AsyncMock()
+    assert await ResourceBlocker.install(context, ResourceBlockingProfile()) is None, "empty profiles are not routed"
+    blocker = await ResourceBlocker.install(context, ResourceBlockingProfile(domains=["example.com"]))
+    assert blocker is not None and ResourceBlocker.of(context) is blocker
+    navigation = fake_route("document", "https://example.com", navigation=True)
+    await blocker.handle(navigation)
+    navigation.fallback.assert_awaited_once()
+    script = fake_route("script", "https://cdn.example.com/app.js")
+    await blocker.handle(script)
+    script.abort.assert_awaited_once()
+    assert blocker.stats.nb_allowed_requests == 1
+    assert blocker.stats.nb_blocked_requests == 1
+    assert blocker.stats.blocked_resource_types == {"script": 1}
@@ -1,4 +1,10 @@
+import copy
+import pickle
+
 import pytest
+from notte_browser.rendering.markdown import MarkdownDomNodeRenderingPipe
+from notte_browser.rendering.pipe import DomNodeRenderingPipe, DomNodeRenderingType
+from notte_browser.rendering.pruning import prune_dom_tree
 from notte_core.browser.dom_tree import ComputedDomAttributes, DomAttributes, DomNode, NodeSelectors
 from notte_core.browser.node_type import NodeCategory, NodeRole, NodeType
 
@@ -238,6 +244,27 @@ def test_node_attributes():
     assert post_attrs.selectors == selector
 
 
+def test_dom_attributes_only_store_present_values():
+    attrs = DomAttributes.safe_init(tag_name="a", href="/home", title="Home", **{"class": "link", "data-id": "1"})
+    assert attrs.href == "/home"
+    assert attrs.class_name == "link"
+    assert attrs.src is None
+    assert list(attrs.items()) == [("tag_name", "a"), ("class_name", "link"), ("href", "/home"), ("title", "Home")]
+    # rendered in fields order
+    assert list(attrs.relevant_attrs()) == ["href", "title"]
+    assert attrs.relevant_attrs(include_attributes=frozenset({"class_name", "href"})) == {
+        "class_name": "link",
+        "href": "/home",
+    }
+    assert attrs == DomAttributes(tag_name="a", class_name="link", title="Home", href="/home", src=None)
+    assert copy.deepcopy(attrs) == attrs
+    assert pickle.loads(pickle.dumps(attrs)) == attrs
+    with pytest.raises(AttributeError):
+        attrs.href = "/other"  # pyright: ignore[reportAttributeAccessIssue]
+    with pytest.raises(TypeError):
+        _ = DomAttributes(tag_name="a", unknown="value")
+
+
 def test_consistency_node_role_and_category():
     for role in NodeRole:
         assert role.value in role.category().roles(), f"Role {role.value} is not in category {role.category()}"
@@ -434,3 +461,60 @@ def test_non_intersecting_category_roles():
         _all = all_except(category)
         cat_roles = category.roles()
         assert len(cat_roles.intersection(_all)) == 0, f"Category {category.value} has intersecting roles"
+
+
+def test_subtree_ids_are_intervals_of_the_document_order(nested_graph: DomNode):
+    all_ids = [node.id for node in nested_graph.flatten() if node.id is not None]
+    assert list(nested_graph.subtree_ids) == all_ids
+    for node in nested_graph.flatten():
+        expected = [inner.id for inner in node.flatten() if inner.id is not None]
+        assert node.subtree_ids == expected
+        assert len(node.subtree_ids) == len(expected)
+        assert all(id in node.subtree_ids for id in expected)
+        assert all(id not in node.subtree_ids for id in set(all_ids) - set(expected))
+        assert node.subtree_ids.isdisjoint(set(all_ids) - set(expected))
+
+
+def test_subtree_ids_index_is_shared_by_the_tree(nested_graph: DomNode):
+    child = nested_graph.children[-1]
+    # indexing a subtree first, then the whole tree
+    child_ids = list(child.subtree_ids)
+    assert len(child_ids) > 0
+    assert list(nested_graph.subtree_ids)[-len(child_ids) :] == child_ids
+    assert child.subtree_ids.tree_index is nested_graph.subtree_ids.tree_index
+    assert child.subtree_ids == child_ids
+
+
+def test_subtree_filter_shares_unchanged_subtrees(nested_graph: DomNode):
+    assert nested_graph.subtree_filter(lambda node: True) is nested_graph
+
+    filtered_graph = nested_graph.subtree_filter(lambda node: node.id != "L1")
+    assert filtered_graph is not None
+    assert filtered_graph is not nested_graph
+    # only the path to the removed node is copied
+    assert [child is original for child, original in zip(filtered_graph.children, nested_graph.children)] == [
+        True,
+        True,
+        True,
+        True,
+        True,
+        True,
+        False,
+    ]
+    assert filtered_graph.children[-1].children[0] is nested_graph.children[-1].children[1]
+    assert list(filtered_graph.subtree_ids) == ["B1", "B2", "B3", "B4"]
+    assert list(nested_graph.subtree_ids) == ["B1", "B2", "B3", "B4", "L1"]
+
+
+def test_prune_dom_tree_shares_unfolded_subtrees(nested_graph: DomNode):
+    assert prune_dom_tree(nested_graph) is nested_graph
+
+
+def test_markdown_rendering_is_cached_per_tree(nested_graph: DomNode):
+    document = DomNodeRenderingPipe.forward(nested_graph, type=DomNodeRenderingType.MARKDOWN)
+    assert document == MarkdownDomNodeRenderingPipe.format(nested_graph)
+    assert document.startswith('WebArea "Root" {\n button B1 "Button 1"\n')
+    assert " inner_text: Some text 3\n" in document
+    assert DomNodeRenderingPipe.forward(nested_graph, type=DomNodeRenderingType.MARKDOWN) is document
+    without_ids = DomNodeRenderingPipe.forward(nested_graph, type=DomNodeRenderingType.MARKDOWN, include_ids=False)
+    assert "B1" not in without_ids
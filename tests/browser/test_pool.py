@@ -0,0 +1,202 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from notte_browser.pool import PooledPlaywrightManager, SharedPlaywrightManager
+from notte_browser.window import BrowserWindowOptions
+from notte_sdk.types import SessionStartRequest
+from patchright.async_api import Page
+from pydantic import Field
+
+
+def fake_browser() -> MagicMock:
+    browser = MagicMock()
+    browser.is_connected.return_value = True
+    browser.close = AsyncMock()
+    return browser
+
+
+def fake_context() -> MagicMock:
+    context = MagicMock()
+    context.pages = [MagicMock(spec=Page)]
+    context.close = AsyncMock()
+    context.add_init_script = AsyncMock()
+    return context
+
+
+class FakePooledManager(PooledPlaywrightManager):
+    async def create_playwright_browser(self, options: BrowserWindowOptions) -> MagicMock:  # pyright: ignore
+        return fake_browser()
+
+    async def create_browser_context(self, options: BrowserWindowOptions, browser: MagicMock) -> MagicMock:  # pyright: ignore
+        return fake_context()
+
+
+@pytest.fixture
+def options() -> BrowserWindowOptions:
+    return BrowserWindowOptions.from_request(SessionStartRequest(headless=True))
+
+
+@pytest.fixture
+def manager() -> FakePooledManager:
+    manager = FakePooledManager(pool_size=2, max_reuse=3)
+    manager.set_playwright(AsyncMock())
+    return manager
+
+
+@pytest.mark.asyncio
+async def test_pool_reuses_browsers_across_windows(manager: FakePooledManager, options: BrowserWindowOptions):
+    window = await manager.new_window(options)
+    assert manager.metrics.misses == 1
+    page = window.page
+    await window.close()
+    assert manager.nb_idle(options) == 1
+
+    window = await manager.new_window(options)
+    assert manager.metrics.hits == 1
+    assert manager.metrics.launched == 1
+    assert window.page is not page, "a fresh context should be created for every window"
+    await window.close()
+
+
+@pytest.mark.asyncio
+async def test_pool_retires_browsers_after_max_reuse(manager: FakePooledManager, options: BrowserWindowOptions):
+    for _ in range(manager.max_reuse):
+        window = await manager.new_window(options)
+        await window.close()
+    assert manager.metrics.retired == 1
+    assert manager.nb_idle(options) == 0
+
+
+@pytest.mark.asyncio
+async def test_pool_discards_unhealthy_browsers(manager: FakePooledManager, options: BrowserWindowOptions):
+    await manager.warmup(options)
+    assert manager.nb_idle(options) == manager.pool_size
+    for pooled in manager._pool[manager.browser_key(options)]:
+        pooled.browser.is_connected.return_value = False  # pyright: ignore[reportAttributeAccessIssue]
+    window = await manager.new_window(options)
+    assert manager.metrics.unhealthy == manager.pool_size
+    assert manager.metrics.misses == 1
+    await window.close()
+
+
+@pytest.mark.asyncio
+async def test_pool_prewarmed_contexts(options: BrowserWindowOptions):
+    manager = FakePooledManager(pool_size=1, prewarm_contexts=1)
+    manager.set_playwright(AsyncMock())
+    await manager.warmup(options)
+    window = await manager.new_window(options)
+    assert manager.metrics.context_hits == 1
+    await window.close()
+    await manager.astop()
+    assert manager.nb_idle() == 0
+
+
+class FakeSharedManager(SharedPlaywrightManager):
+    async def create_playwright_browser(self, options: BrowserWindowOptions) -> MagicMock:  # pyright: ignore
+        assert options.proxy is None, "shared browsers should be launched without proxy"
+        browser = fake_browser()
+        browser.new_context = AsyncMock(side_effect=lambda **kwargs: fake_context())  # pyright: ignore
+        return browser
+
+
+@pytest.fixture
+def shared_manager() -> FakeSharedManager:
+    manager = FakeSharedManager(contexts_per_browser=2, max_browsers=2)
+    manager.set_playwright(AsyncMock())
+    return manager
+
+
+@pytest.mark.asyncio
+async def test_shared_manager_hosts_many_windows_per_browser(shared_manager: FakeSharedManager):
+    windows = [
+        await shared_manager.new_window(BrowserWindowOptions.from_request(SessionStartRequest(headless=True)))
+        for _ in range(3)
+    ]
+    assert shared_manager.nb_browsers() == 2
+    assert shared_manager.nb_windows() == 3
+    # closing a window should not close the browser used by its neighbour
+    await windows[0].close()
+    assert shared_manager.nb_windows() == 2
+    assert shared_manager.nb_browsers() == 2
+    for window in windows[1:]:
+        await window.close()
+    # a single idle browser is kept warm
+    assert shared_manager.nb_browsers() == 1
+    assert shared_manager.nb_windows() == 0
+    await shared_manager.astop()
+    assert shared_manager.nb_browsers() == 0
+
+
+@pytest.mark.asyncio
+async def test_shared_manager_oversubscribes_after_max_browsers(shared_manager: FakeSharedManager):
+    options = BrowserWindowOptions.from_request(SessionStartRequest(headless=True))
+    windows = [await shared_manager.new_window(options) for _ in range(5)]
+    assert shared_manager.nb_browsers() == shared_manager.max_browsers
+    assert shared_manager.nb_windows() == 5
+    for window in windows:
+        await window.close()
+
+
+@pytest.mark.asyncio
+async def test_shared_manager_applies_proxy_and_user_agent_per_context(shared_manager: FakeSharedManager):
+    proxy = {"server": "http://localhost:8080"}
+    options = BrowserWindowOptions.from_request(SessionStartRequest(headless=True, user_agent="notte-agent"))
+    options.proxy = proxy  # pyright: ignore[reportAttributeAccessIssue]
+    window = await shared_manager.new_window(options)
+    other = await shared_manager.new_window(BrowserWindowOptions.from_request(SessionStartRequest(headless=True)))
+    assert shared_manager.nb_browsers() == 1, "proxy and user-agent should not require a new browser"
+    shared = shared_manager._browsers[shared_manager.browser_key(options)][0]
+    first_call = shared.browser.new_context.call_args_list[0].kwargs  # pyright: ignore[reportAttributeAccessIssue, reportUnknownMemberType, reportUnknownVariableType]
+    assert first_call["proxy"] == proxy
+    assert first_call["user_agent"] == "notte-agent"
+    await window.close()
+    await other.close()
+
+
+class GatedSharedManager(FakeSharedManager):
+    """Browser launches block until `gate` is set"""
+
+    fail: bool = False
+    gate: asyncio.Event = Field(default_factory=asyncio.Event, exclude=True)
+    nb_launches: int = 0
+
+    async def create_playwright_browser(self, options: BrowserWindowOptions) -> MagicMock:  # pyright: ignore
+        self.nb_launches += 1
+        _ = await self.gate.wait()
+        if self.fail:
+            raise RuntimeError("browser launch failed")
+        return await super().create_playwright_browser(options)
+
+
+@pytest.mark.asyncio
+async def test_shared_manager_launches_browsers_concurrently():
+    manager = GatedSharedManager(contexts_per_browser=2, max_browsers=2)
+    manager.set_playwright(AsyncMock())
+    options = BrowserWindowOptions.from_request(SessionStartRequest(headless=True))
+    tasks = [asyncio.create_task(manager.new_window(options)) for _ in range(3)]
+    await asyncio.sleep(0.01)
+    # the second browser is launched while the first one is still launching: slots are reserved under the lock
+    assert manager.nb_launches == 2
+    assert manager.nb_browsers() == 2 and manager.nb_windows() == 3
+    manager.gate.set()
+    windows = await asyncio.gather(*tasks)
+    assert manager.nb_launches == 2
+    for window in windows:
+        await window.close()
+    assert manager.nb_browsers() == 1 and manager.nb_windows() == 0
+
+
+@pytest.mark.asyncio
+async def test_shared_manager_releases_the_slots_of_failed_launches():
+    manager = GatedSharedManager(contexts_per_browser=2, max_browsers=2, fail=True)
+    manager.set_playwright(AsyncMock())
+    options = BrowserWindowOptions.from_request(SessionStartRequest(headless=True))
+    tasks = [asyncio.create_task(manager.new_window(options)) for _ in range(2)]
+    await asyncio.sleep(0.01)
+    manager.gate.set()
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+    # the window waiting for the browser fails with the launcher
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert manager.nb_launches == 1
+    assert manager.nb_browsers() == 0 and manager.nb_windows() == 0
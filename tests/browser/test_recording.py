@@ -0,0 +1,78 @@
+import base64
+from pathlib import Path
+from typing import Any
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from notte_browser.recording import FrameRing, ScreencastRecorder
+from notte_core.browser.observation import Screenshot
+from patchright.async_api import Page
+
+
+@pytest.mark.parametrize("on_disk", [False, True])
+def test_frame_ring_drops_oldest_frames(tmp_path: Path, on_disk: bool):
+    ring = FrameRing(max_frames=3, directory=tmp_path if on_disk else None, min_interval_s=0)
+    ids = [ring.put(f"frame {i}".encode(), timestamp=i) for i in range(5)]
+    assert ids == [0, 1, 2, 3, 4]
+    assert len(ring) == 3
+    assert ring.get(0) is None
+    assert ring.get(4) == b"frame 4"
+    assert ring.frames() == [b"frame 2", b"frame 3", b"frame 4"]
+    if on_disk:
+        assert ring.directory is not None
+        assert len(list(ring.directory.iterdir())) == 3
+
+
+def test_frame_ring_merges_close_frames_unless_marked():
+    ring = FrameRing(max_frames=10, min_interval_s=1.0)
+    assert ring.put(b"a", timestamp=0.0) == 0
+    # animation frame: replaces the previous one
+    assert ring.put(b"b", timestamp=0.5) == 0
+    assert ring.get(0) == b"b"
+    # referenced by a step: never overwritten
+    assert ring.mark() == 0
+    assert ring.put(b"c", timestamp=0.6) == 1
+    assert ring.get(0) == b"b"
+    assert ring.put(b"d", timestamp=2.0) == 2
+    assert len(ring) == 3
+
+
+@pytest.mark.asyncio
+async def test_screencast_recorder_streams_frames():
+    handlers: dict[str, Any] = {}
+    cdp_session = MagicMock()
+    cdp_session.on = lambda event, handler: handlers.__setitem__(event, handler)  # pyright: ignore[reportUnknownLambdaType]
+    cdp_session.send = AsyncMock(return_value={})
+    cdp_session.detach = AsyncMock()
+    page = MagicMock(spec=Page)
+    page.context.new_cdp_session = AsyncMock(return_value=cdp_session)
+    page.screenshot = AsyncMock(return_value=b"fallback")
+
+    recorder = ScreencastRecorder(ring=FrameRing(max_frames=10, min_interval_s=0))
+    await recorder.attach(page)
+    cdp_session.send.assert_awaited_with("Page.startScreencast", {"format": "jpeg", "quality": 60})
+
+    # no frame streamed yet: the page is captured instead
+    assert await recorder.mark(fallback=page) == 0
+    assert recorder.loader(0)() == b"fallback"
+
+    for i in range(3):
+        frame = {"data": base64.b64encode(f"frame {i}".encode()).decode(), "metadata": {"timestamp": i}, "sessionId": i}
+        await handlers["Page.screencastFrame"](frame)
+        cdp_session.send.assert_awaited_with("Page.screencastFrameAck", {"sessionId": i})
+    frame_id = await recorder.mark(fallback=page)
+    assert recorder.loader(frame_id)() == b"frame 2"
+    assert recorder.ring.frames() == [b"fallback", b"frame 0", b"frame 1", b"frame 2"]
+
+    await recorder.detach()
+    cdp_session.send.assert_awaited_with("Page.stopScreencast")
+    assert recorder.page is None
+
+
+def test_uncached_lazy_screenshot_is_not_retained():
+    frames = [b"first", b"second"]
+    screenshot = Screenshot.lazy(lambda: frames[-1], bboxes=[], cache=False)
+    assert screenshot.bytes("raw") == b"second"
+    _ = frames.pop()
+    assert screenshot.bytes("raw") == b"first"
+    assert screenshot.raw == b""
@@ -0,0 +1,72 @@
+import asyncio
+from collections.abc import Callable
+from typing import Any
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from notte_browser import settle as settle_module
+from notte_browser.settle import RequestTracker, wait_for_settle
+from patchright.async_api import Page, Request
+
+
+def fake_page() -> tuple[MagicMock, dict[str, Callable[[Any], None]]]:
+    handlers: dict[str, Callable[[Any], None]] = {}
+    page = MagicMock(spec=Page)
+    page.on = MagicMock(side_effect=lambda event, handler: handlers.__setitem__(event, handler))  # pyright: ignore
+    page.evaluate = AsyncMock(return_value={"settled": True, "elapsed_ms": 100})
+    return page, handlers
+
+
+def fake_request(resource_type: str) -> MagicMock:
+    request = MagicMock(spec=Request)
+    request.resource_type = resource_type
+    return request
+
+
+def test_request_tracker_ignores_passive_resources():
+    page, handlers = fake_page()
+    tracker = RequestTracker(page)
+    image, xhr = fake_request("image"), fake_request("xhr")
+    handlers["request"](image)
+    assert tracker.idle.is_set()
+    handlers["request"](xhr)
+    assert not tracker.idle.is_set()
+    handlers["requestfailed"](xhr)
+    assert tracker.idle.is_set()
+
+
+@pytest.mark.asyncio
+async def test_wait_for_settle_waits_for_pending_requests():
+    page, handlers = fake_page()
+    tracker = RequestTracker(page)
+    request = fake_request("fetch")
+    handlers["request"](request)
+    asyncio.get_running_loop().call_later(0.05, handlers["requestfinished"], request)
+    assert await wait_for_settle(page, tracker, quiet_ms=100, timeout_ms=1000)
+    # the DOM is checked again once the response has been received
+    assert page.evaluate.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_wait_for_settle_is_capped():
+    page, handlers = fake_page()
+    tracker = RequestTracker(page)
+    handlers["request"](fake_request("fetch"))
+    assert not await wait_for_settle(page, tracker, quiet_ms=100, timeout_ms=50)
+    page.evaluate = AsyncMock(return_value={"settled": False, "elapsed_ms": 50})
+    assert not await wait_for_settle(page, RequestTracker(page), quiet_ms=100, timeout_ms=50)
+
+
+@pytest.mark.asyncio
+async def test_wait_for_settle_ignores_long_lived_requests(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(settle_module, "LONG_LIVED_REQUEST_S", 0.05)
+    page, handlers = fake_page()
+    tracker = RequestTracker(page)
+    # e.g a long polling request that never completes
+    handlers["request"](fake_request("fetch"))
+    assert not tracker.idle.is_set()
+    assert await wait_for_settle(page, tracker, quiet_ms=100, timeout_ms=1000)
+    assert page.evaluate.await_count == 2
+    # long-lived requests are ignored right away by the next waits
+    assert await wait_for_settle(page, tracker, quiet_ms=100, timeout_ms=1000)
+    assert page.evaluate.await_count == 3
@@ -0,0 +1,335 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from loguru import logger
+from notte_browser import window as window_module
+from notte_browser.dom.fingerprint import PAGE_FINGERPRINT_JS
+from notte_browser.dom.parsing import ParseDomTreePipe
+from notte_browser.errors import BrowserExpiredError, EmptyPageContentError
+from notte_browser.window import BrowserResource, BrowserWindow, BrowserWindowOptions
+from notte_core.browser.dom_tree import DomNode
+from notte_core.browser.observation import Screenshot
+from notte_core.browser.snapshot import BrowserSnapshot, PageFingerprint
+from notte_core.common.config import config
+from notte_sdk.types import SessionStartRequest
+from patchright.async_api import Page
+
+
+def fake_page(title: str, url: str) -> MagicMock:
+    page = MagicMock(spec=Page)
+    page.url = url
+    page.title = AsyncMock(return_value=title)
+    metadata = {
+        "title": title,
+        "scroll_x": 0,
+        "scroll_y": 120,
+        "viewport_width": 1280,
+        "viewport_height": 720,
+        "total_width": 1280,
+        "total_height": 4000,
+    }
+    fingerprint = {"document_id": "doc", "nb_mutations": 0, "url": url, "scroll": "0,120", "hash": "abc"}
+    page.evaluate = AsyncMock(
+        side_effect=lambda expression, *args: fingerprint if expression == PAGE_FINGERPRINT_JS else metadata  # pyright: ignore
+    )
+    return page
+
+
+@pytest.mark.asyncio
+async def test_snapshot_metadata_uses_single_evaluate():
+    tabs = [fake_page(f"tab {i}", f"https://example.com/{i}") for i in range(3)]
+    page = tabs[-1]
+    page.context.pages = tabs
+    window = BrowserWindow(
+        resource=BrowserResource(
+            page=page, options=BrowserWindowOptions.from_request(SessionStartRequest(headless=True))
+        )
+    )
+    metadata = await window.snapshot_metadata()
+    assert page.evaluate.await_count == 1
+    assert metadata.title == "tab 2"
+    assert metadata.viewport.scroll_y == 120
+    assert metadata.viewport.total_height == 4000
+    assert [tab.title for tab in metadata.tabs] == ["tab 0", "tab 1", "tab 2"]
+    assert [tab.tab_id for tab in metadata.tabs] == [0, 1, 2]
+
+
+@pytest.mark.asyncio
+async def test_snapshot_only_retries_failed_component(monkeypatch: pytest.MonkeyPatch):
+    page = fake_page("page", "https://example.com")
+    page.context.pages = [page]
+    contents = AsyncMock(
+        side_effect=[
+            Exception("Unable to retrieve content because the page is navigating and changing the content"),
+            "<html></html>",
+        ]
+    )
+
+    async def content() -> str:
+        return await contents()
+
+    page.content = content
+    page.screenshot = AsyncMock(return_value=b"screenshot")
+    page.wait_for_timeout = AsyncMock()
+    parse = AsyncMock(return_value=MagicMock(spec=DomNode))
+    monkeypatch.setattr(ParseDomTreePipe, "forward", parse)
+    window = BrowserWindow(
+        resource=BrowserResource(
+            page=page, options=BrowserWindowOptions.from_request(SessionStartRequest(headless=True))
+        )
+    )
+    snapshot = await window.snapshot()
+    assert contents.await_count == 2
+    assert parse.await_count == 1
+    assert page.screenshot.await_count == 1
+    assert snapshot.html_content == "<html></html>"
+    assert set(snapshot.capture_timings) == {"html_content", "dom_node", "screenshot", "metadata", "fingerprint"}
+
+
+@pytest.mark.asyncio
+async def test_snapshot_components_share_a_single_retry_budget(monkeypatch: pytest.MonkeyPatch):
+    page = fake_page("page", "https://example.com")
+    page.context.pages = [page]
+    contents = AsyncMock(
+        side_effect=Exception("Unable to retrieve content because the page is navigating and changing the content")
+    )
+
+    async def content() -> str:
+        return await contents()
+
+    page.content = content
+    page.screenshot = AsyncMock(return_value=b"screenshot")
+    page.wait_for_timeout = AsyncMock()
+    # empty page: the dom node is retried as well
+    parse = AsyncMock(return_value=None)
+    monkeypatch.setattr(ParseDomTreePipe, "forward", parse)
+    window = BrowserWindow(
+        resource=BrowserResource(
+            page=page, options=BrowserWindowOptions.from_request(SessionStartRequest(headless=True))
+        )
+    )
+    with pytest.raises(EmptyPageContentError):
+        _ = await window.snapshot(retries=4)
+    # 4 attempts in total: the first capture of each component and 3 retries
+    assert (contents.await_count - 1) + (parse.await_count - 1) == 3
+
+
+@pytest.mark.asyncio
+async def test_snapshot_cancels_the_other_captures_on_failure(monkeypatch: pytest.MonkeyPatch):
+    page = fake_page("page", "https://example.com")
+    page.context.pages = [page]
+
+    async def content() -> str:
+        raise Exception("Target page, context or browser has been closed")
+
+    cancelled = asyncio.Event()
+
+    async def screenshot(**kwargs: object) -> bytes:
+        try:
+            await asyncio.sleep(60)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+        return b"screenshot"
+
+    page.content = content
+    page.screenshot = screenshot
+    monkeypatch.setattr(ParseDomTreePipe, "forward", AsyncMock(return_value=MagicMock(spec=DomNode)))
+    window = BrowserWindow(
+        resource=BrowserResource(
+            page=page, options=BrowserWindowOptions.from_request(SessionStartRequest(headless=True))
+        )
+    )
+    with pytest.raises(BrowserExpiredError):
+        _ = await asyncio.wait_for(window.snapshot(screenshot=True), timeout=5)
+    assert cancelled.is_set()
+
+
+@pytest.mark.asyncio
+async def test_snapshot_skips_screenshot_unless_policy_is_always(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(window_module, "config", config.model_copy(update={"screenshot_policy": "lazy"}))
+    page = fake_page("page", "https://example.com")
+    page.context.pages = [page]
+
+    async def content() -> str:
+        return "<html></html>"
+
+    page.content = content
+    page.screenshot = AsyncMock(return_value=b"screenshot")
+    monkeypatch.setattr(ParseDomTreePipe, "forward", AsyncMock(return_value=MagicMock(spec=DomNode)))
+    window = BrowserWindow(
+        resource=BrowserResource(
+            page=page, options=BrowserWindowOptions.from_request(SessionStartRequest(headless=True))
+        )
+    )
+    snapshot = await window.snapshot()
+    assert snapshot.screenshot == b""
+    assert page.screenshot.await_count == 0
+    snapshot = await window.snapshot(screenshot=True)
+    assert snapshot.screenshot == b"screenshot"
+
+
+@pytest.mark.asyncio
+async def test_webp_screenshots_are_captured_through_cdp(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(
+        window_module,
+        "config",
+        config.model_copy(update={"screenshot_format": "webp", "screenshot_quality": 60, "screenshot_scale": 0.5}),
+    )
+    page = fake_page("page", "https://example.com")
+    page.evaluate = AsyncMock(return_value={"x": 0, "y": 120, "width": 1280, "height": 720})
+    session = MagicMock()
+    session.send = AsyncMock(return_value={"data": "d2VicA=="})
+    page.context.new_cdp_session = AsyncMock(return_value=session)
+    window = BrowserWindow(
+        resource=BrowserResource(
+            page=page, options=BrowserWindowOptions.from_request(SessionStartRequest(headless=True))
+        )
+    )
+    assert await window.screenshot() == b"webp"
+    method, params = session.send.await_args.args
+    assert method == "Page.captureScreenshot"
+    assert params["format"] == "webp" and params["quality"] == 60
+    assert params["clip"] == {"x": 0, "y": 120, "width": 1280, "height": 720, "scale": 0.5}
+    _ = await window.screenshot()
+    assert page.context.new_cdp_session.await_count == 1, "the page CDP session should be reused"
+
+
+def test_lazy_screenshot_is_loaded_once():
+    loader = MagicMock(return_value=b"screenshot")
+    screenshot = Screenshot.lazy(loader, bboxes=[])
+    assert loader.call_count == 0
+    assert screenshot.bytes("raw") == b"screenshot"
+    assert screenshot.bytes("last_action") == b"screenshot"
+    assert loader.call_count == 1
+
+
+def test_deferred_screenshot_is_captured_outside_of_event_loops():
+    capture = AsyncMock(return_value=b"screenshot")
+    screenshot = Screenshot.deferred(capture, bboxes=[])
+    assert capture.await_count == 0
+    assert screenshot.bytes("raw") == b"screenshot"
+    assert screenshot.bytes("raw") == b"screenshot"
+    assert capture.await_count == 1
+
+
+@pytest.mark.asyncio
+async def test_deferred_screenshot_is_awaited_in_event_loops():
+    capture = AsyncMock(return_value=b"screenshot")
+    screenshot = Screenshot.deferred(capture, bboxes=[])
+    with pytest.raises(RuntimeError, match="aload"):
+        _ = screenshot.bytes("raw")
+    warnings: list[str] = []
+    sink = logger.add(lambda message: warnings.append(str(message)), level="WARNING")
+    try:
+        assert screenshot.model_dump()["raw"] == ""
+    finally:
+        logger.remove(sink)
+    assert any("aload" in warning for warning in warnings)
+    assert await screenshot.abytes("raw") == b"screenshot"
+    assert screenshot.bytes("raw") == b"screenshot"
+    assert capture.await_count == 1
+
+
+@pytest.mark.asyncio
+async def test_page_changed_compares_fingerprints():
+    page = fake_page("page", "https://example.com")
+    window = BrowserWindow(
+        resource=BrowserResource(
+            page=page, options=BrowserWindowOptions.from_request(SessionStartRequest(headless=True))
+        )
+    )
+    fingerprint = PageFingerprint(document_id="doc", nb_mutations=3, url=page.url, scroll="0,0", hash="abc")
+    snapshot = MagicMock(spec=BrowserSnapshot)
+    snapshot.fingerprint = fingerprint
+    page.evaluate = AsyncMock(return_value=fingerprint.model_dump())
+    assert not await window.page_changed(snapshot)
+    assert page.evaluate.await_args.args[1] == fingerprint.model_dump(), (
+        "the previous fingerprint enables the fast path"
+    )
+    page.evaluate = AsyncMock(return_value={**fingerprint.model_dump(), "nb_mutations": 5, "hash": "def"})
+    assert await window.page_changed(snapshot)
+    page.evaluate = AsyncMock(side_effect=Exception("Execution context was destroyed"))
+    assert await window.page_changed(snapshot)
+
+
+@pytest.mark.asyncio
+async def test_tab_windows_snapshot_concurrently(monkeypatch: pytest.MonkeyPatch):
+    tabs = [fake_page(f"tab {i}", f"https://example.com/{i}") for i in range(3)]
+    started: list[str] = []
+
+    async def forward(page: MagicMock, cdp_session: None = None) -> DomNode:
+        started.append(page.url)
+        # every tab is being parsed before any of them completes
+        while len(started) < len(tabs):
+            await asyncio.sleep(0)
+        return MagicMock(spec=DomNode)
+
+    for tab in tabs:
+        tab.context.pages = tabs
+
+        async def content() -> str:
+            return "<html></html>"
+
+        tab.content = content
+    monkeypatch.setattr(ParseDomTreePipe, "forward", forward)
+    window = BrowserWindow(
+        resource=BrowserResource(
+            page=tabs[0], options=BrowserWindowOptions.from_request(SessionStartRequest(headless=True))
+        )
+    )
+    snapshots = await asyncio.gather(*[window.for_tab(i).snapshot(screenshot=False) for i in range(len(tabs))])
+    assert [snapshot.metadata.url for snapshot in snapshots] == [tab.url for tab in tabs]
+    assert window.page is tabs[0], "the current tab should not change"
+    for tab in tabs:
+        tab.bring_to_front.assert_not_called()
+
+
+def test_tab_windows_share_request_trackers():
+    tabs = [fake_page(f"tab {i}", f"https://example.com/{i}") for i in range(2)]
+    for tab in tabs:
+        tab.context.pages = tabs
+    window = BrowserWindow(
+        resource=BrowserResource(
+            page=tabs[0], options=BrowserWindowOptions.from_request(SessionStartRequest(headless=True))
+        )
+    )
+    for _ in range(3):
+        assert window.for_tab(1).request_tracker() is window.for_tab(1).request_tracker()
+        assert window.for_tab(0).request_tracker() is window.request_tracker()
+    # request, requestfinished and requestfailed listeners are registered once per tab
+    assert [tab.on.call_count for tab in tabs] == [3, 3]
+
+
+@pytest.mark.asyncio
+async def test_tab_windows_share_cdp_sessions_and_are_not_closed():
+    tabs = [fake_page(f"tab {i}", f"https://example.com/{i}") for i in range(2)]
+    created: list[MagicMock] = []
+
+    async def new_cdp_session(page: Page) -> MagicMock:
+        await asyncio.sleep(0)
+        created.append(MagicMock(detach=AsyncMock()))
+        return created[-1]
+
+    for tab in tabs:
+        tab.context.pages = tabs
+        tab.context.new_cdp_session = new_cdp_session
+        tab.close = AsyncMock()
+    window = BrowserWindow(
+        resource=BrowserResource(
+            page=tabs[0], options=BrowserWindowOptions.from_request(SessionStartRequest(headless=True))
+        )
+    )
+    sessions = await asyncio.gather(*[window.for_tab(1).page_cdp_session() for _ in range(3)])
+    # concurrent windows attach a single session per page: the extra ones are detached
+    assert all(session is sessions[0] for session in sessions)
+    assert await window.for_tab(1).page_cdp_session() is sessions[0]
+    assert await window.page_cdp_session() is not sessions[0]
+    assert len(created) == 3 + 1
+    assert [session.detach.await_count for session in created[:3]].count(1) == 2
+    assert sessions[0].detach.await_count == 0
+    # windows of other tabs don't own the context
+    await window.for_tab(1).close()
+    for tab in tabs:
+        tab.close.assert_not_awaited()
@@ -2,6 +2,7 @@ from dataclasses import dataclass
 from typing import Any, final
 
 from loguru import logger
+from notte_browser.settle import SettleStats
 from notte_core.browser.dom_tree import ComputedDomAttributes, DomNode
 from notte_core.browser.node_type import NodeType
 from notte_core.browser.snapshot import BrowserSnapshot, SnapshotMetadata, TabsData, ViewportData
@@ -94,6 +95,7 @@ class MockBrowserDriver(AsyncResource):
             screenshot=screenshot,
         )
 
+        self._settle_stats = SettleStats()
         self._mock_dom_node = DomNode(
             id="mock",
             role="WebArea",
@@ -189,6 +191,17 @@ class MockBrowserDriver(AsyncResource):
     async def short_wait(self) -> None:
         pass
 
+    @property
+    def resource_blocker(self) -> None:
+        return None
+
+    @property
+    def settle_stats(self) -> SettleStats:
+        return self._settle_stats
+
+    async def page_changed(self, snapshot: BrowserSnapshot) -> bool:
+        return False
+
     async def long_wait(self) -> None:
         pass
 
@@ -199,5 +212,5 @@ class MockBrowserDriver(AsyncResource):
     def page(self) -> MockBrowserPage:
         return MockBrowserPage()
 
-    async def snapshot(self) -> BrowserSnapshot:
+    async def snapshot(self, screenshot: bool | None = None) -> BrowserSnapshot:
         return self._mock_snapshot
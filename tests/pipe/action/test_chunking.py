@@ -0,0 +1,127 @@
+import asyncio
+from typing import Any
+from unittest.mock import patch
+
+import pytest
+from litellm import ModelResponse
+from notte_browser.tagging.action.llm_taging.chunking import split_snapshot
+from notte_browser.tagging.action.llm_taging.pipe import LlmActionSpacePipe
+from notte_core.browser.dom_tree import ComputedDomAttributes, DomNode
+from notte_core.browser.node_type import NodeRole, NodeType
+from notte_core.browser.snapshot import BrowserSnapshot
+
+from tests.mock.mock_service import MockLLMService
+from tests.pipe.action.test_main import context_from_ids, interaction_actions_from_ids
+
+
+def group(ids: list[str], text: str = "") -> DomNode:
+    return DomNode(
+        id=None,
+        role=NodeRole.GROUP,
+        text="",
+        type=NodeType.OTHER,
+        attributes=None,
+        computed_attributes=ComputedDomAttributes(),
+        children=[
+            DomNode(
+                id=id,
+                role=NodeRole.LINK,
+                text=f"{text} link {id}",
+                type=NodeType.INTERACTION,
+                children=[],
+                attributes=None,
+                computed_attributes=ComputedDomAttributes(),
+            )
+            for id in ids
+        ],
+    )
+
+
+def chunked_snapshot() -> BrowserSnapshot:
+    snapshot = context_from_ids(["L1"])
+    return snapshot.with_dom_node(
+        DomNode(
+            id=None,
+            role=NodeRole.WEBAREA,
+            text="Root Webarea",
+            type=NodeType.OTHER,
+            attributes=None,
+            computed_attributes=ComputedDomAttributes(),
+            children=[
+                group(["L1", "L2"], text="short"),
+                group(["L3", "L4"], text="long " * 20),
+                group([]),
+                group(["L5"], text="short"),
+            ],
+        )
+    )
+
+
+def test_split_snapshot_in_bounded_chunks():
+    snapshot = chunked_snapshot()
+    assert split_snapshot(snapshot, max_tokens=10_000) == [snapshot]
+
+    chunks = split_snapshot(snapshot, max_tokens=30)
+    assert [[node.id for node in chunk.interaction_nodes()] for chunk in chunks] == [
+        ["L1", "L2"],
+        ["L3"],
+        ["L4"],
+        ["L5"],
+    ]
+    for chunk in chunks:
+        # the document structure is kept
+        assert chunk.dom_node.role == NodeRole.WEBAREA
+        assert chunk.metadata == snapshot.metadata
+
+
+@pytest.mark.asyncio
+async def test_list_actions_by_chunks():
+    # the mock lists every action of the page, whatever the chunk
+    llm = MockLLMService(
+        mock_response="""
+<document-summary>
+Search results
+</document-summary>
+<action-listing>
+| ID | Description | Parameters | Category |
+| L1 | Opens the first result | | Navigation |
+| L2 | Opens the second result | | Navigation |
+| L3 | Opens the third result | | Navigation |
+| L4 | Opens the fourth result | | Navigation |
+| L5 | Opens the fifth result | | Navigation |
+</action-listing>
+"""
+    )
+    calls: list[tuple[str, dict[str, Any]]] = []
+    running = 0
+    max_running = 0
+
+    async def completion(prompt_id: str, variables: dict[str, Any] | None = None) -> ModelResponse:
+        nonlocal running, max_running
+        calls.append((prompt_id, variables or {}))
+        running += 1
+        max_running = max(max_running, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        return await MockLLMService.completion(llm, prompt_id, variables)
+
+    with (
+        patch.object(LlmActionSpacePipe, "chunked_listing", True),
+        patch.object(LlmActionSpacePipe, "max_chunk_tokens", 30),
+        patch.object(LlmActionSpacePipe, "max_concurrent_chunks", 2),
+        patch.object(llm, "completion", completion),
+    ):
+        pipe = LlmActionSpacePipe(llmserve=llm)
+        space = await pipe.list_actions(chunked_snapshot(), list(interaction_actions_from_ids(["L1", "L3"])))
+
+    # all the nodes of the chunk of L3 were already listed: no LLM call
+    assert len(calls) == 3
+    assert max_running == 2
+    # each chunk only gets the previous actions of its own nodes
+    incremental = [variables for prompt_id, variables in calls if prompt_id == "action-listing-incr"]
+    assert len(incremental) == 1
+    assert "L1" in incremental[0]["previous_action_list"] and "L3" not in incremental[0]["previous_action_list"]
+    assert "L1" not in incremental[0]["document"]
+    # the actions listed by several chunks are only kept once
+    assert [action.id for action in space.actions] == ["L1", "L2", "L3", "L4", "L5"]
+    assert space.description == "Search results"
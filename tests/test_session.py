@@ -1,10 +1,13 @@
 from collections import Counter
+from unittest.mock import AsyncMock, MagicMock
 
 import notte_core
 import pytest
 from notte_browser.captcha import CaptchaHandler
 from notte_browser.errors import CaptchaSolverNotAvailableError, NoSnapshotObservedError
+from notte_browser.scraping.pipe import DataScrapingPipe
 from notte_browser.session import NotteSession, SessionTrajectoryStep
+from notte_browser.window import BrowserResource, BrowserWindow, BrowserWindowOptions
 from notte_core.actions import (
     ClickAction,
     GotoAction,
@@ -13,9 +16,12 @@ from notte_core.actions import (
     WaitAction,
 )
 from notte_core.browser.snapshot import BrowserSnapshot
+from notte_core.data.space import DataSpace
 from notte_core.llms.service import LLMService
+from notte_sdk.types import SessionStartRequest
 from pydantic import ValidationError
 
+from tests.browser.test_window import fake_page
 from tests.mock.mock_browser import MockBrowserDriver
 from tests.mock.mock_service import MockLLMService
 from tests.mock.mock_service import patch_llm_service as _patch_llm_service
@@ -98,6 +104,26 @@ async def test_valid_observation_after_observation(patch_llm_service: MockLLMSer
     ]
 
 
+@pytest.mark.asyncio
+async def test_fast_listing_on_changed_page_is_observed_again(patch_llm_service: MockLLMService) -> None:
+    """Test that the page is snapshotted again when it changed during the action listing, however fast"""
+    window = MockBrowserDriver()
+    # unchanged during the first observation, changed during the listing of the second one
+    page_changed = AsyncMock(side_effect=[False, True, False])
+    snapshot = AsyncMock(side_effect=window.snapshot)
+    window.page_changed = page_changed  # pyright: ignore[reportAttributeAccessIssue]
+    window.snapshot = snapshot  # pyright: ignore[reportAttributeAccessIssue]
+    async with NotteSession(window=window) as page:
+        _ = await page.aobserve("https://example.com")
+        nb_snapshots = snapshot.await_count
+        obs = await page.aobserve()
+
+    assert page_changed.await_count == 3
+    # the snapshot of the observation and the one taken after the page changed
+    assert snapshot.await_count == nb_snapshots + 2
+    assert len(obs.space.interaction_actions) == 1
+
+
 @pytest.mark.skip(reason="TODO: fix this")
 @pytest.mark.asyncio
 async def test_valid_observation_after_step(patch_llm_service: MockLLMService) -> None:
@@ -222,3 +248,67 @@ def test_captcha_solver_not_available_error():
     CaptchaHandler.is_available = True
     _ = NotteSession(enable_perception=False, solve_captchas=True)
     CaptchaHandler.is_available = False
+
+
+def tabs_window(nb_tabs: int) -> BrowserWindow:
+    tabs = [fake_page(f"tab {i}", f"https://example.com/{i}") for i in range(nb_tabs)]
+    for tab in tabs:
+        tab.context.pages = tabs
+    return BrowserWindow(
+        resource=BrowserResource(
+            page=tabs[0], options=BrowserWindowOptions.from_request(SessionStartRequest(headless=True))
+        )
+    )
+
+
+@pytest.mark.asyncio
+async def test_snapshot_tabs_only_screenshots_the_current_tab(
+    patch_llm_service: MockLLMService, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    window = tabs_window(3)
+    captures: list[tuple[str, bool | None]] = []
+
+    async def snapshot(self: BrowserWindow, screenshot: bool | None = None) -> BrowserSnapshot:
+        captures.append((self.page.url, screenshot))
+        return MagicMock(spec=BrowserSnapshot)
+
+    monkeypatch.setattr(BrowserWindow, "snapshot", snapshot)
+    session = NotteSession(window=window)
+    snapshots = await session.asnapshot_tabs()
+    assert len(snapshots) == 3
+    assert captures == [
+        ("https://example.com/0", None),
+        ("https://example.com/1", False),
+        ("https://example.com/2", False),
+    ]
+    captures.clear()
+    _ = await session.asnapshot_tabs(tab_indices=[2], screenshot=True)
+    assert captures == [("https://example.com/2", True)]
+    # the session state is left untouched
+    assert session.window.page is window.page
+    assert len(session.trajectory) == 0
+
+
+@pytest.mark.asyncio
+async def test_scrape_tabs_scrapes_every_tab(
+    patch_llm_service: MockLLMService, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    window = tabs_window(2)
+
+    async def snapshot(self: BrowserWindow, screenshot: bool | None = None) -> BrowserSnapshot:
+        assert screenshot is False
+        return MagicMock(spec=BrowserSnapshot)
+
+    async def forward(
+        self: DataScrapingPipe, window: BrowserWindow, snapshot: BrowserSnapshot, params: object
+    ) -> DataSpace:
+        return DataSpace(markdown=f"content of {window.page.url}")
+
+    monkeypatch.setattr(BrowserWindow, "snapshot", snapshot)
+    monkeypatch.setattr(DataScrapingPipe, "forward", forward)
+    session = NotteSession(window=window)
+    spaces = await session.ascrape_tabs()
+    assert [space.markdown for space in spaces] == [
+        "content of https://example.com/0",
+        "content of https://example.com/1",
+    ]
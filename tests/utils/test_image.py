@@ -1,4 +1,7 @@
-from notte_core.utils.image import construct_image_url
+import io
+
+from notte_core.utils.image import construct_image_url, image_mime_type
+from PIL import Image
 
 
 def test_construct_image_url() -> None:
@@ -25,3 +28,11 @@ def test_construct_image_url() -> None:
     for src, expected in zip(cases, expected_results):
         result = construct_image_url(base_url, src)
         assert result == expected, f"Failed for case: {src} ({result} != {expected})"
+
+
+def test_image_mime_type() -> None:
+    image = Image.new("RGB", (4, 4))
+    for format, mime_type in [("PNG", "image/png"), ("JPEG", "image/jpeg"), ("WEBP", "image/webp")]:
+        output = io.BytesIO()
+        image.save(output, format=format)
+        assert image_mime_type(output.getvalue()) == mime_type